@@ -0,0 +1,53 @@
+"""alert listing indexes
+
+Composite (organization_id, created_at, id) index for keyset pagination of
+alerts, replacing the single-column organization_id index, and partial
+indexes over unresolved / unacknowledged alerts. Built CONCURRENTLY so the
+alerts table stays writable; the tables themselves come from ensure_schema.
+
+Revision ID: 3b9c1f7a2d41
+Revises:
+Create Date: 2026-10-19 10:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b9c1f7a2d41"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_alerts_org_created", "alerts", ["organization_id", "created_at", "id"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_alerts_org_unresolved", "alerts", ["organization_id", "created_at"],
+            postgresql_where=sa.text("NOT resolved"), postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_alerts_org_unacknowledged", "alerts", ["organization_id", "created_at"],
+            postgresql_where=sa.text("NOT acknowledged"), postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_alerts_organization_id", table_name="alerts",
+            postgresql_concurrently=True, if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_alerts_organization_id", "alerts", ["organization_id"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index("ix_alerts_org_unacknowledged", table_name="alerts", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_alerts_org_unresolved", table_name="alerts", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_alerts_org_created", table_name="alerts", postgresql_concurrently=True, if_exists=True)
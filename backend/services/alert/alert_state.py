@@ -0,0 +1,221 @@
+"""
+Per-(rule, vehicle) alert state machine.
+Each rule or geofence zone tracks every vehicle it has fired for:
+
+    inactive ──match──▶ firing ──clear──▶ cooldown ──cooldown elapsed──▶ inactive
+                          ▲                   │
+                          └───match (silent)──┘
+
+An alert is raised only on the inactive → firing transition, so a vehicle
+hovering at 19 % battery produces one alert rather than one per frame. A
+rule's optional clear condition (hysteresis) decides when firing ends;
+without one it ends as soon as the condition stops matching. Matching again
+during `cooldown_seconds` after the alert re-arms the state silently.
+
+States live in memory and are written behind to a Redis hash, so they survive
+restarts; inactive entries are simply absent. On load and every
+ALERT_STATE_SWEEP_SECONDS, entries whose vehicle has not been evaluated for
+ALERT_STATE_TTL_SECONDS (it stopped reporting mid-episode) and entries of rules
+or zones no longer in the rule cache are dropped.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+
+from backend.shared.config import get_base_settings
+from backend.shared.database.redis import RedisKeys, get_redis
+
+from .rule_engine import Predicate
+
+logger = logging.getLogger(__name__)
+
+FIRING = "firing"
+COOLDOWN = "cooldown"
+
+
+class AlertStateTracker:
+    """Tracks firing/cooldown state per "{rule_or_zone_id}:{vehicle_id}" key."""
+
+    def __init__(self):
+        # key -> (state, epoch of the alert that started the episode)
+        self._states: dict[str, tuple[str, float]] = {}
+        # key -> epoch the key was last evaluated, and the value last written to Redis
+        self._seen: dict[str, float] = {}
+        self._written_seen: dict[str, float] = {}
+        # vehicle_id -> number of keys with a state (lets batches skip quiet vehicles)
+        self._vehicles: dict[str, int] = {}
+        self._dirty: set[str] = set()
+        self._task: asyncio.Task | None = None
+        # Ids of the rules and zones in the rule cache; None while unknown
+        self._known_ids: Callable[[], set[str] | None] = lambda: None
+
+    def step(
+        self, key: str, matched: bool, clears: Predicate | None, frame, cooldown: float, now: float,
+    ) -> bool:
+        """Advance one key with a new frame; True when an alert must be raised."""
+        entry = self._states.get(key)
+        if entry is None:
+            if not matched:
+                return False
+            self._set(key, FIRING, now)
+            self._seen[key] = now
+            return True
+
+        self._seen[key] = now
+        state, fired_at = entry
+        if state == FIRING:
+            if (not matched) if clears is None else clears(frame):
+                self._set(key, COOLDOWN, fired_at)
+            return False
+
+        if now - fired_at >= cooldown:
+            if matched:
+                self._set(key, FIRING, now)
+                return True
+            self._discard(key)
+            return False
+        if matched:
+            self._set(key, FIRING, fired_at)
+        return False
+
+    def tracks(self, vehicle_id: str) -> bool:
+        """Whether any rule or zone holds a firing/cooldown state for the vehicle."""
+        return vehicle_id in self._vehicles
+
+    def _set(self, key: str, state: str, fired_at: float) -> None:
+        if key not in self._states:
+            vehicle_id = key.partition(":")[2]
+            self._vehicles[vehicle_id] = self._vehicles.get(vehicle_id, 0) + 1
+        self._states[key] = (state, fired_at)
+        self._dirty.add(key)
+
+    def sweep(self, now: float) -> int:
+        """Drop expired entries and those of unknown rules or zones; returns how many."""
+        ttl = get_base_settings().ALERT_STATE_TTL_SECONDS
+        known = self._known_ids()
+        expired = []
+        for key in self._states:
+            seen = self._seen.get(key, now)
+            if now - seen >= ttl or (known is not None and key.partition(":")[0] not in known):
+                expired.append(key)
+            elif seen - self._written_seen.get(key, seen) >= ttl / 2:
+                # Persist the refresh so a restart does not expire a still-reporting vehicle
+                self._dirty.add(key)
+        for key in expired:
+            self._discard(key)
+        return len(expired)
+
+    def _discard(self, key: str) -> None:
+        del self._states[key]
+        self._seen.pop(key, None)
+        self._written_seen.pop(key, None)
+        self._dirty.add(key)
+        vehicle_id = key.partition(":")[2]
+        remaining = self._vehicles[vehicle_id] - 1
+        if remaining:
+            self._vehicles[vehicle_id] = remaining
+        else:
+            del self._vehicles[vehicle_id]
+
+    async def start(self, known_ids: Callable[[], set[str] | None] | None = None) -> None:
+        """Load persisted states and start the write-behind.
+
+        `known_ids` returns the ids of the rules and zones currently cached (None
+        while the cache is not loaded); states of any other id are dropped.
+        """
+        if self._task is not None:
+            return
+        if known_ids is not None:
+            self._known_ids = known_ids
+        try:
+            await self.load()
+        except Exception as e:
+            logger.error(f"Alert state load failed: {e}")
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final alert state flush failed: {e}")
+
+    async def load(self) -> None:
+        raw = await get_redis().hgetall(RedisKeys.alert_state())
+        stale = []
+        for key, encoded in raw.items():
+            # "state:fired_at:seen_at"; entries written before seen_at existed lack it
+            state, _, times = encoded.partition(":")
+            fired_at, _, seen_at = times.partition(":")
+            try:
+                fired = float(fired_at)
+                seen = float(seen_at) if seen_at else fired
+            except ValueError:
+                stale.append(key)
+                continue
+            if state not in (FIRING, COOLDOWN):
+                stale.append(key)
+                continue
+            # States changed since startup are newer than the persisted ones
+            if key not in self._states:
+                self._set(key, state, fired)
+                self._seen[key] = self._written_seen[key] = seen
+                self._dirty.discard(key)
+        if stale:
+            await get_redis().hdel(RedisKeys.alert_state(), *stale)
+        expired = self.sweep(time.time())
+        logger.info(f"Alert state loaded: {len(self._states)} active entries, {len(stale) + expired} dropped")
+
+    async def flush(self) -> None:
+        """Write changed states in one pipelined round trip."""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        upserts = {}
+        removed = []
+        for key in dirty:
+            entry = self._states.get(key)
+            if entry is None:
+                removed.append(key)
+            else:
+                seen = self._seen.get(key, entry[1])
+                upserts[key] = f"{entry[0]}:{entry[1]}:{seen}"
+                self._written_seen[key] = seen
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            if upserts:
+                pipe.hset(RedisKeys.alert_state(), mapping=upserts)
+            if removed:
+                pipe.hdel(RedisKeys.alert_state(), *removed)
+            await pipe.execute()
+        except Exception:
+            self._dirty |= dirty
+            raise
+
+    async def _flush_loop(self) -> None:
+        settings = get_base_settings()
+        swept_at = time.monotonic()
+        while True:
+            await asyncio.sleep(settings.ALERT_STATE_FLUSH_SECONDS)
+            if time.monotonic() - swept_at >= settings.ALERT_STATE_SWEEP_SECONDS:
+                swept_at = time.monotonic()
+                expired = self.sweep(time.time())
+                if expired:
+                    logger.info(f"Alert state sweep dropped {expired} entries")
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Alert state flush failed: {e}")
+
+
+# Singleton instance
+alert_state = AlertStateTracker()
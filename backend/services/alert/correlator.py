@@ -0,0 +1,185 @@
+"""
+Alert storm correlation.
+A shared cause (a ground station losing its uplink, a weather front) makes
+many vehicles raise the same kind of alert at once. Alerts are grouped by
+(organization, category, optional spatial cell); once ALERT_STORM_THRESHOLD of
+a group arrive within ALERT_STORM_WINDOW_SECONDS, a parent incident alert is
+opened and every further alert of the group is attached to it: still
+persisted, tagged with `incident_id`, but neither pushed nor notified on its
+own. The incident carries the running count and is re-published at most every
+ALERT_STORM_UPDATE_SECONDS, and a last time when the group has been quiet for
+a whole window.
+
+Spatial cells (ALERT_STORM_CELL_DEGREES) use the vehicle's last position known
+to this replica; alerts without one fall in the organization-wide group.
+"""
+from __future__ import annotations
+
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from uuid import UUID
+
+from backend.shared.config import get_base_settings
+from backend.shared.schemas.alert import AlertCategory, AlertCreate, AlertResponse, AlertSeverity
+
+from backend.services.telemetry.fleet_state import fleet_state
+
+_SEVERITY_RANK = {severity: rank for rank, severity in enumerate(AlertSeverity)}
+# Vehicle ids listed in an incident's metadata; the vehicle count covers all of them
+_MAX_LISTED_VEHICLES = 100
+
+StormKey = tuple[str, AlertCategory, tuple[int, int] | None]
+
+
+class Incident:
+    """Parent alert standing for a burst of alerts of one group."""
+
+    def __init__(self, key: StormKey, count: int, now: float):
+        org_id, category, cell = key
+        self.key = key
+        self.id = uuid.uuid4()
+        self.organization_id = UUID(org_id)
+        self.category = category
+        self.cell = cell
+        self.count = count
+        self.severity = AlertSeverity.INFO
+        self.vehicles: set[str] = set()
+        self.created_at = datetime.now(timezone.utc)
+        self.last_at = now
+        self.open = True
+        # Count at the last publication (opening is one), and when it happened
+        self.published_count = count
+        self.published_at = now
+        # Severity the incident is counted under in the open-alert counters
+        self.counted_severity: AlertSeverity | None = None
+
+    def add(self, alert: AlertCreate, now: float) -> None:
+        if _SEVERITY_RANK[alert.severity] > _SEVERITY_RANK[self.severity]:
+            self.severity = alert.severity
+        if alert.vehicle_id is not None:
+            self.vehicles.add(str(alert.vehicle_id))
+        self.last_at = now
+
+    def row(self) -> dict:
+        """Alert row of the incident, upserted on every publication."""
+        title = f"Alert storm: {self.count} {self.category.value} alerts"
+        vehicles = len(self.vehicles)
+        message = (
+            f"{self.count} {self.category.value} alerts from {vehicles} vehicle{'s' if vehicles != 1 else ''} "
+            f"since {self.created_at:%H:%M:%S} UTC"
+        )
+        return {
+            "id": self.id,
+            "vehicle_id": None,
+            "organization_id": self.organization_id,
+            "severity": self.severity,
+            "category": self.category,
+            "title": title,
+            "message": message,
+            "metadata_json": {
+                "incident": {
+                    "count": self.count,
+                    "vehicles": vehicles,
+                    "vehicle_ids": sorted(self.vehicles)[:_MAX_LISTED_VEHICLES],
+                    "cell": list(self.cell) if self.cell is not None else None,
+                    "open": self.open,
+                },
+            },
+            "acknowledged": False,
+            "resolved": False,
+            "created_at": self.created_at,
+        }
+
+    def response(self, row: dict) -> AlertResponse:
+        return AlertResponse(
+            id=row["id"], vehicle_id=None, organization_id=row["organization_id"],
+            severity=row["severity"], category=row["category"], title=row["title"],
+            message=row["message"], metadata=row["metadata_json"], created_at=row["created_at"],
+        )
+
+
+class _Storm:
+    """Recent arrivals of one group and its open incident, if any."""
+
+    __slots__ = ("arrivals", "incident")
+
+    def __init__(self):
+        # (monotonic time, alert) inside the window, kept only until an incident opens
+        self.arrivals: deque[tuple[float, AlertCreate]] = deque()
+        self.incident: Incident | None = None
+
+
+class AlertCorrelator:
+    """Groups bursts of similar alerts into incidents."""
+
+    def __init__(self):
+        self._storms: dict[StormKey, _Storm] = {}
+
+    def correlate(self, org_id: str, alert: AlertCreate, now: float) -> tuple[Incident | None, bool]:
+        """The incident the alert belongs to (if any), and whether this alert opened it."""
+        settings = get_base_settings()
+        threshold = settings.ALERT_STORM_THRESHOLD
+        if threshold <= 0:
+            return None, False
+        key = (org_id, alert.category, self._cell(org_id, alert, settings.ALERT_STORM_CELL_DEGREES))
+        storm = self._storms.get(key)
+        if storm is None:
+            storm = self._storms[key] = _Storm()
+
+        incident = storm.incident
+        if incident is not None:
+            incident.count += 1
+            incident.add(alert, now)
+            return incident, False
+
+        arrivals = storm.arrivals
+        arrivals.append((now, alert))
+        cutoff = now - settings.ALERT_STORM_WINDOW_SECONDS
+        while arrivals[0][0] < cutoff:
+            arrivals.popleft()
+        if len(arrivals) < threshold:
+            return None, False
+
+        # The alerts before this one already went out individually but count towards the storm
+        incident = storm.incident = Incident(key, len(arrivals), now)
+        for _, earlier in arrivals:
+            incident.add(earlier, now)
+        arrivals.clear()
+        return incident, True
+
+    def due(self, now: float, final: bool = False) -> list[Incident]:
+        """Incidents whose count changed since their last publication and are due for one.
+
+        Groups quiet for a whole window are forgotten; their incident is closed
+        and returned a last time. With `final`, every open incident is closed.
+        """
+        settings = get_base_settings()
+        window = settings.ALERT_STORM_WINDOW_SECONDS
+        every = settings.ALERT_STORM_UPDATE_SECONDS
+        due = []
+        for key, storm in list(self._storms.items()):
+            incident = storm.incident
+            if incident is None:
+                if not storm.arrivals or storm.arrivals[-1][0] < now - window:
+                    del self._storms[key]
+                continue
+            if final or now - incident.last_at >= window:
+                incident.open = False
+                del self._storms[key]
+                due.append(incident)
+            elif incident.count != incident.published_count and now - incident.published_at >= every:
+                due.append(incident)
+        for incident in due:
+            incident.published_count = incident.count
+            incident.published_at = now
+        return due
+
+    @staticmethod
+    def _cell(org_id: str, alert: AlertCreate, cell_degrees: float) -> tuple[int, int] | None:
+        if cell_degrees <= 0 or alert.vehicle_id is None:
+            return None
+        position = fleet_state.position(org_id, str(alert.vehicle_id))
+        if position is None:
+            return None
+        return int(position[0] // cell_degrees), int(position[1] // cell_degrees)
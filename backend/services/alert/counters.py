@@ -0,0 +1,93 @@
+"""
+Cached open-alert counts per organization, by severity (the dashboard badge).
+`aero:alert:open:{org_id}` holds "open:{severity}" (unresolved) and
+"unacked:{severity}" (unresolved and unacknowledged) counters. Writers adjust
+them with HINCRBY as alerts are raised, acknowledged and resolved; readers
+recount from the table (served by the partial indexes on alerts) when the hash
+is missing or lacks its "loaded" marker, e.g. after an increment recreated an
+expired key. The hash expires ALERT_COUNTS_TTL_SECONDS after a recount, so
+drift from lost updates never outlives it.
+"""
+from __future__ import annotations
+
+import logging
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.shared.config import get_base_settings
+from backend.shared.database.redis import RedisKeys, get_redis
+from backend.shared.schemas.alert import AlertSeverity, AlertStats
+
+from .models import Alert
+
+logger = logging.getLogger(__name__)
+
+_LOADED = "loaded"
+
+
+def open_field(severity: AlertSeverity) -> str:
+    return f"open:{AlertSeverity(severity).value}"
+
+
+def unacked_field(severity: AlertSeverity) -> str:
+    return f"unacked:{AlertSeverity(severity).value}"
+
+
+async def adjust_open_counts(deltas: dict[tuple[str, str], int]) -> None:
+    """Apply (org_id, field) -> delta to the cached counters, in one round trip."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for (org_id, field), delta in deltas.items():
+            pipe.hincrby(RedisKeys.alert_open_counts(org_id), field, delta)
+        await pipe.execute()
+    except Exception as e:
+        # The next recount after the TTL corrects the counters
+        logger.error(f"Open alert counter update failed: {e}")
+
+
+async def open_alert_counts(db: AsyncSession, org_id: UUID) -> AlertStats:
+    key = RedisKeys.alert_open_counts(str(org_id))
+    cached: dict[str, str] = {}
+    try:
+        cached = await get_redis().hgetall(key)
+    except Exception as e:
+        logger.error(f"Open alert counters unavailable for org {org_id}: {e}")
+
+    if _LOADED not in cached:
+        cached = await _recount(db, org_id)
+        try:
+            pipe = get_redis().pipeline(transaction=True)
+            pipe.delete(key)
+            pipe.hset(key, mapping=cached)
+            pipe.expire(key, get_base_settings().ALERT_COUNTS_TTL_SECONDS)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Caching open alert counters failed for org {org_id}: {e}")
+
+    # Concurrent decrements can briefly undershoot a recount
+    open_counts = {s: max(int(cached.get(open_field(s), 0)), 0) for s in AlertSeverity}
+    unacked = {s: max(int(cached.get(unacked_field(s), 0)), 0) for s in AlertSeverity}
+    return AlertStats(
+        open=open_counts,
+        unacknowledged=unacked,
+        total_open=sum(open_counts.values()),
+        total_unacknowledged=sum(unacked.values()),
+    )
+
+
+async def _recount(db: AsyncSession, org_id: UUID) -> dict[str, str]:
+    result = await db.execute(
+        select(Alert.severity, func.count(), func.count().filter(Alert.acknowledged == False))
+        .where(Alert.organization_id == org_id, Alert.resolved == False)
+        .group_by(Alert.severity)
+    )
+    counts = {_LOADED: "1"}
+    for severity, open_count, unacked_count in result.all():
+        counts[open_field(severity)] = str(open_count)
+        counts[unacked_field(severity)] = str(unacked_count)
+    return counts
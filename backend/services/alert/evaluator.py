@@ -0,0 +1,365 @@
+"""
+Streaming alert evaluation.
+The telemetry pipeline hands every frame to `alert_evaluator.submit`, which
+only enqueues it; a background worker drains the queue in batches and checks
+each frame against its organization's enabled rules and geofence zones.
+Alerts are raised on state transitions only (see alert_state) and handed to
+alert_sink, which pushes them to WebSocket clients and persists them. When a batch
+holds enough frames of one organization, its rules and zones are evaluated
+column-wise with NumPy (see batch_eval and GeofenceIndex.violations_batch).
+
+Rules and zones are held in an in-memory cache loaded once at startup, so
+evaluating a frame costs no I/O. Whoever changes an organization's rules or
+zones calls `alert_rule_cache.invalidate(org_id)`: the local cache reloads that
+organization at once and bumps its revision in Redis, which other replicas
+poll every ALERT_RULES_POLL_SECONDS. A full reload every
+ALERT_RULES_RELOAD_SECONDS picks up edits made outside the API.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+
+from backend.shared.config import get_base_settings
+from backend.shared.database.postgres import get_direct_postgres_session
+from backend.shared.database.redis import RedisKeys, get_redis
+from backend.shared.schemas.alert import AlertCreate, GeofenceZone
+from backend.shared.schemas.telemetry import TelemetryFrame
+
+from .alert_state import alert_state
+from .batch_eval import BatchRulePlan
+from .geofence_index import GeofenceIndex
+from .models import AlertRuleRecord, GeofenceZoneRecord
+from .rule_engine import Predicate, compile_clear_condition, compile_condition, is_temporal
+from .service import geofence_alert, rule_alert, zone_from_record
+from .sink import alert_sink
+from .windows import temporal_state
+
+logger = logging.getLogger(__name__)
+
+# Max frames evaluated per worker iteration
+_EVAL_BATCH = 500
+# Below this many frames of one organization, per-frame evaluation is cheaper
+_VECTOR_MIN_FRAMES = 16
+
+
+class _CompiledRule:
+    """A rule record with its condition (and optional clear condition) compiled to predicates."""
+
+    def __init__(self, record: AlertRuleRecord, matches: Predicate, clears: Predicate | None):
+        self.record = record
+        self.matches = matches
+        self.clears = clears
+        self.cooldown = float(record.cooldown_seconds or 0)
+        self.state_prefix = f"{record.id}:"
+
+
+class _OrgRules:
+    """Enabled rules and geofence zones of one organization."""
+
+    def __init__(self):
+        self.rules: list[_CompiledRule] = []
+        # rule id -> notification channels
+        self.channels: dict[str, list] = {}
+        self.zones: list[GeofenceZone] = []
+        self._geofences: GeofenceIndex | None = None
+        self._batch_plan: BatchRulePlan | None = None
+
+    def add_rule(self, record: AlertRuleRecord) -> None:
+        try:
+            # Window/sustained state outlives this compile, see windows.temporal_state
+            state = temporal_state.rule(str(record.id), record.condition) if is_temporal(record.condition) else None
+            matches = compile_condition(record.condition, state)
+            clears = compile_clear_condition(record.condition)
+        except ValueError as e:
+            logger.warning(f"Skipping alert rule {record.id} ({record.name}): {e}")
+            return
+        self.rules.append(_CompiledRule(record, matches, clears))
+        self.channels[str(record.id)] = record.notification_channels or []
+        self._batch_plan = None
+
+    def add_zone(self, record: GeofenceZoneRecord) -> None:
+        self.zones.append(zone_from_record(record))
+        self._geofences = None
+
+    def channels_for(self, alert: AlertCreate) -> list | None:
+        """Notification channels of the rule that raised the alert, None for zone alerts."""
+        rule_id = (alert.metadata or {}).get("rule_id")
+        return self.channels.get(rule_id, []) if rule_id else None
+
+    @property
+    def geofences(self) -> GeofenceIndex:
+        if self._geofences is None:
+            settings = get_base_settings()
+            self._geofences = GeofenceIndex(
+                self.zones, settings.ALERT_GEOFENCE_CELL_DEGREES, settings.ALERT_GEOFENCE_MAX_CELLS,
+            )
+        return self._geofences
+
+    @property
+    def batch_plan(self) -> BatchRulePlan:
+        if self._batch_plan is None:
+            self._batch_plan = BatchRulePlan([(rule.record.condition, rule.matches) for rule in self.rules])
+        return self._batch_plan
+
+
+class AlertRuleCache:
+    """Per-organization snapshot of enabled alert rules and geofence zones."""
+
+    def __init__(self):
+        self._orgs: dict[str, _OrgRules] = {}
+        # org_id -> revision the cached entry was loaded at
+        self._versions: dict[str, int] = {}
+        self.loaded = False
+
+    def get(self, org_id: str) -> _OrgRules | None:
+        return self._orgs.get(org_id)
+
+    def ids(self) -> set[str] | None:
+        """Ids of every cached rule and zone; None until the cache has loaded."""
+        if not self.loaded:
+            return None
+        ids = set()
+        for org in self._orgs.values():
+            ids.update(str(rule.record.id) for rule in org.rules)
+            ids.update(str(zone.id) for zone in org.zones)
+        return ids
+
+    async def load_all(self) -> None:
+        """(Re)load the rules and zones of every organization."""
+        # Read revisions first: a change racing the load triggers another reload
+        versions = await self._fetch_versions()
+        session = await get_direct_postgres_session()
+        async with session:
+            rules = (await session.execute(
+                select(AlertRuleRecord).where(AlertRuleRecord.enabled == True)
+            )).scalars().all()
+            zones = (await session.execute(
+                select(GeofenceZoneRecord).where(GeofenceZoneRecord.enabled == True)
+            )).scalars().all()
+
+        orgs: dict[str, _OrgRules] = {}
+        for rule in rules:
+            orgs.setdefault(str(rule.organization_id), _OrgRules()).add_rule(rule)
+        for zone in zones:
+            orgs.setdefault(str(zone.organization_id), _OrgRules()).add_zone(zone)
+        self._orgs = orgs
+        self._versions = versions
+        self.loaded = True
+        temporal_state.retain(self.ids())
+        logger.info(f"Alert rule cache loaded: {len(rules)} rules, {len(zones)} zones, {len(orgs)} organizations")
+
+    async def reload(self, org_id: str) -> None:
+        """Reload a single organization's rules and zones."""
+        org_uuid = UUID(org_id)
+        session = await get_direct_postgres_session()
+        async with session:
+            rules = (await session.execute(
+                select(AlertRuleRecord).where(
+                    AlertRuleRecord.organization_id == org_uuid,
+                    AlertRuleRecord.enabled == True,
+                )
+            )).scalars().all()
+            zones = (await session.execute(
+                select(GeofenceZoneRecord).where(
+                    GeofenceZoneRecord.organization_id == org_uuid,
+                    GeofenceZoneRecord.enabled == True,
+                )
+            )).scalars().all()
+        if not rules and not zones:
+            self._orgs.pop(org_id, None)
+        else:
+            org = _OrgRules()
+            for rule in rules:
+                org.add_rule(rule)
+            for zone in zones:
+                org.add_zone(zone)
+            self._orgs[org_id] = org
+        if self.loaded:
+            temporal_state.retain(self.ids())
+
+    async def invalidate(self, org_id: str) -> None:
+        """Call after creating, updating or deleting an organization's rules or zones."""
+        try:
+            self._versions[org_id] = await get_redis().hincrby(RedisKeys.alert_rules_version(), org_id, 1)
+        except Exception as e:
+            logger.error(f"Alert rule revision bump failed for org {org_id}: {e}")
+        await self.reload(org_id)
+
+    async def poll(self) -> None:
+        """Reload the organizations whose revision changed on another replica."""
+        versions = await self._fetch_versions()
+        for org_id, version in versions.items():
+            if self._versions.get(org_id) != version:
+                await self.reload(org_id)
+                self._versions[org_id] = version
+
+    async def _fetch_versions(self) -> dict[str, int]:
+        raw = await get_redis().hgetall(RedisKeys.alert_rules_version())
+        return {org_id: int(version) for org_id, version in raw.items()}
+
+
+class AlertEvaluator:
+    """Evaluates telemetry frames against cached rules off the ingest path."""
+
+    def __init__(self, cache: AlertRuleCache):
+        self.cache = cache
+        self._queue: asyncio.Queue[tuple[str, TelemetryFrame]] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self.dropped = 0
+
+    def submit(self, org_id: str, frame: TelemetryFrame) -> None:
+        """Queue a frame for evaluation without blocking the caller."""
+        # Until the cache has loaded every organization looks rule-less
+        if self._queue is None or self.cache.get(org_id) is None:
+            return
+        try:
+            self._queue.put_nowait((org_id, frame))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Alert evaluation queue full, {self.dropped} frames dropped")
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        try:
+            await self.cache.load_all()
+        except Exception as e:
+            # Retried by the refresh loop; frames are not evaluated until then
+            logger.error(f"Alert rule cache load failed: {e}")
+        await alert_state.start(self.cache.ids)
+        self._queue = asyncio.Queue(maxsize=get_base_settings().ALERT_EVAL_QUEUE_SIZE)
+        self._tasks = [
+            asyncio.create_task(self._eval_loop()),
+            asyncio.create_task(self._refresh_loop()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._queue = None
+        await alert_state.stop()
+
+    def evaluate(self, org_id: str, frame: TelemetryFrame, now: float | None = None) -> list[AlertCreate]:
+        """Check one frame against the cached rules and zones of its organization.
+
+        Only rules/zones that start firing for the vehicle produce an alert.
+        """
+        org = self.cache.get(org_id)
+        if org is None:
+            return []
+        now = time.time() if now is None else now
+        vehicle_id = frame.vehicle_id
+        step = alert_state.step
+        triggered = [
+            rule_alert(rule.record, frame) for rule in org.rules
+            if step(rule.state_prefix + vehicle_id, rule.matches(frame), rule.clears, frame, rule.cooldown, now)
+        ]
+        # Without a position fix lat/lng are meaningless and every zone would report a violation
+        if org.zones and frame.gps.fix_type >= 2:
+            gps = frame.gps
+            cooldown = get_base_settings().ALERT_GEOFENCE_COOLDOWN_SECONDS
+            violations = org.geofences.violations(gps.lat, gps.lng, gps.alt)
+            for zone, violated in zip(org.zones, violations):
+                if step(f"{zone.id}:{vehicle_id}", violated, None, frame, cooldown, now):
+                    triggered.append(geofence_alert(zone, frame))
+        return triggered
+
+    def evaluate_batch(
+        self, org_id: str, frames: list[TelemetryFrame], now: float | None = None,
+    ) -> list[AlertCreate]:
+        """Vectorized `evaluate` over frames of one organization, in order."""
+        org = self.cache.get(org_id)
+        if org is None or not frames:
+            return []
+        now = time.time() if now is None else now
+        step = alert_state.step
+        rules = org.rules
+        zones = org.zones
+
+        matched = org.batch_plan.matches(frames) if rules else np.zeros((len(frames), 0), dtype=bool)
+        any_matched = matched.any(axis=1)
+        if zones:
+            lat = np.array([f.gps.lat for f in frames])
+            lng = np.array([f.gps.lng for f in frames])
+            alt = np.array([f.gps.alt for f in frames])
+            fixed = np.array([f.gps.fix_type >= 2 for f in frames])
+            violated = org.geofences.violations_batch(lat, lng, alt)
+            any_violated = violated.any(axis=1) & fixed
+            zone_cooldown = get_base_settings().ALERT_GEOFENCE_COOLDOWN_SECONDS
+
+        triggered = []
+        for k, frame in enumerate(frames):
+            vehicle_id = frame.vehicle_id
+            # Keys without state only change when they match, so quiet vehicles only visit the hits
+            tracked = alert_state.tracks(vehicle_id)
+            if tracked or any_matched[k]:
+                row = matched[k]
+                for r in (range(len(rules)) if tracked else np.flatnonzero(row)):
+                    rule = rules[r]
+                    if step(rule.state_prefix + vehicle_id, bool(row[r]), rule.clears, frame, rule.cooldown, now):
+                        triggered.append(rule_alert(rule.record, frame))
+            if zones and fixed[k] and (tracked or any_violated[k]):
+                row = violated[k]
+                for z in (range(len(zones)) if tracked else np.flatnonzero(row)):
+                    zone = zones[z]
+                    if step(f"{zone.id}:{vehicle_id}", bool(row[z]), None, frame, zone_cooldown, now):
+                        triggered.append(geofence_alert(zone, frame))
+        return triggered
+
+    async def _eval_loop(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < _EVAL_BATCH and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            by_org: dict[str, list[TelemetryFrame]] = {}
+            for org_id, frame in batch:
+                by_org.setdefault(org_id, []).append(frame)
+
+            triggered: list[tuple[str, AlertCreate]] = []
+            for org_id, frames in by_org.items():
+                try:
+                    if len(frames) >= _VECTOR_MIN_FRAMES:
+                        triggered.extend((org_id, alert) for alert in self.evaluate_batch(org_id, frames))
+                    else:
+                        for frame in frames:
+                            triggered.extend((org_id, alert) for alert in self.evaluate(org_id, frame))
+                except Exception as e:
+                    logger.error(f"Alert evaluation failed for org {org_id} ({len(frames)} frames): {e}")
+            for org_id, alert in triggered:
+                org = self.cache.get(org_id)
+                await alert_sink.submit(org_id, alert, org.channels_for(alert) if org else None)
+
+    async def _refresh_loop(self) -> None:
+        settings = get_base_settings()
+        reloaded_at = evicted_at = time.monotonic()
+        while True:
+            await asyncio.sleep(settings.ALERT_RULES_POLL_SECONDS)
+            if time.monotonic() - evicted_at >= settings.ALERT_STATE_SWEEP_SECONDS:
+                evicted_at = time.monotonic()
+                temporal_state.evict(settings.ALERT_WINDOW_IDLE_SECONDS)
+            try:
+                if not self.cache.loaded or time.monotonic() - reloaded_at >= settings.ALERT_RULES_RELOAD_SECONDS:
+                    await self.cache.load_all()
+                    reloaded_at = time.monotonic()
+                else:
+                    await self.cache.poll()
+            except Exception as e:
+                logger.error(f"Alert rule cache refresh failed: {e}")
+
+
+# Singleton instances
+alert_rule_cache = AlertRuleCache()
+alert_evaluator = AlertEvaluator(alert_rule_cache)
@@ -0,0 +1,204 @@
+"""
+Spatial index over an organization's geofence zones.
+Zones are prepared once when the rule cache loads:
+  - a bounding box per zone,
+  - polygon edges as (y1, x1, y2, slope) tuples with horizontal edges dropped,
+    so the ray cast does no division per frame,
+  - circle centres with a local equirectangular projection, so most points
+    are decided without a haversine.
+Zones are bucketed into a uniform lat/lng grid; a position only runs the exact
+test for the zones registered in its cell (plus the few too large to bucket),
+every other zone is known not to contain it. Results are identical to
+`rule_engine.check_geofence`.
+
+`violations_batch` evaluates K positions at once: zones loop in Python but
+each test (box, ray cast over all edges, haversine) is one NumPy expression
+over the positions inside the zone's box.
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from backend.shared.schemas.alert import GeofenceZone
+
+from .rule_engine import _haversine
+
+_EARTH_RADIUS = 6371000
+_METERS_PER_DEGREE = _EARTH_RADIUS * math.pi / 180
+# Projected distances within this relative margin of the radius fall back to haversine
+_PROJECTION_MARGIN = 0.01
+# Larger circles always use haversine, the projection error grows with distance
+_MAX_PROJECTED_RADIUS = 100_000.0
+
+
+class _PreparedZone:
+    """Precomputed geometry of one zone."""
+
+    def __init__(self, zone: GeofenceZone):
+        self.zone = zone
+        self.max_altitude = zone.max_altitude
+        self.min_altitude = zone.min_altitude
+        # Zones check_geofence never reports (circle without centre/radius)
+        self.inert = False
+        self.bbox: tuple[float, float, float, float] | None = None
+        self.edges: list[tuple[float, float, float, float]] = []
+        self.edge_columns = np.zeros((4, 1, 0))
+        self.circle: tuple[float, float, float, float] | None = None
+
+        if zone.type == "circle":
+            if not zone.coordinates or not zone.radius:
+                self.inert = True
+                return
+            center_lat, center_lng = zone.coordinates[0][0], zone.coordinates[0][1]
+            radius = zone.radius
+            self.circle = (center_lat, center_lng, radius, radius * radius)
+            # Padded so the box never cuts off points the exact test accepts
+            dlat = radius * (1 + _PROJECTION_MARGIN) / _METERS_PER_DEGREE
+            cos_lat = math.cos(math.radians(min(abs(center_lat) + dlat, 90.0)))
+            if center_lat - dlat <= -90 or center_lat + dlat >= 90 or cos_lat < 1e-6:
+                return  # polar circle: no useful box, always tested
+            dlng = dlat / cos_lat
+            if center_lng - dlng < -180 or center_lng + dlng > 180:
+                return  # wraps the antimeridian: always tested
+            self.bbox = (center_lat - dlat, center_lng - dlng, center_lat + dlat, center_lng + dlng)
+            return
+
+        polygon = zone.coordinates
+        if not polygon:
+            return
+        lats = [p[0] for p in polygon]
+        lngs = [p[1] for p in polygon]
+        self.bbox = (min(lats), min(lngs), max(lats), max(lngs))
+        j = len(polygon) - 1
+        for i in range(len(polygon)):
+            yi, xi = polygon[i][0], polygon[i][1]
+            yj, xj = polygon[j][0], polygon[j][1]
+            # A horizontal edge never straddles the ray's latitude
+            if yi != yj:
+                self.edges.append((yi, xi, yj, (xj - xi) / (yj - yi)))
+            j = i
+        # Edge columns for the vectorized ray cast, shaped (1, edges) to broadcast over points
+        self.edge_columns = np.array(self.edges, dtype=float).reshape(-1, 4).T[:, None, :]
+
+    def contains(self, lat: float, lng: float) -> bool:
+        """Horizontal containment, as check_geofence decides it."""
+        bbox = self.bbox
+        if bbox is not None and not (bbox[0] <= lat <= bbox[2] and bbox[1] <= lng <= bbox[3]):
+            return False
+        if self.circle is not None:
+            return self._in_circle(lat, lng)
+        inside = False
+        for y1, x1, y2, slope in self.edges:
+            if (y1 > lat) != (y2 > lat) and lng < slope * (lat - y1) + x1:
+                inside = not inside
+        return inside
+
+    def _in_circle(self, lat: float, lng: float) -> bool:
+        center_lat, center_lng, radius, radius_sq = self.circle
+        if radius <= _MAX_PROJECTED_RADIUS:
+            dlng = (lng - center_lng + 180) % 360 - 180
+            dx = dlng * math.cos(math.radians((lat + center_lat) / 2)) * _METERS_PER_DEGREE
+            dy = (lat - center_lat) * _METERS_PER_DEGREE
+            distance_sq = dx * dx + dy * dy
+            if distance_sq <= radius_sq * (1 - _PROJECTION_MARGIN) ** 2:
+                return True
+            if distance_sq >= radius_sq * (1 + _PROJECTION_MARGIN) ** 2:
+                return False
+        return _haversine(lat, lng, center_lat, center_lng) <= radius
+
+    def contains_batch(self, lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+        """Vectorized `contains` over arrays of positions."""
+        inside = np.zeros(len(lat), dtype=bool)
+        bbox = self.bbox
+        if bbox is not None:
+            candidates = np.flatnonzero((lat >= bbox[0]) & (lat <= bbox[2]) & (lng >= bbox[1]) & (lng <= bbox[3]))
+        else:
+            candidates = np.arange(len(lat))
+        if not len(candidates):
+            return inside
+        lat_c = lat[candidates]
+        lng_c = lng[candidates]
+        if self.circle is not None:
+            center_lat, center_lng, radius, _ = self.circle
+            inside[candidates] = _haversine_batch(lat_c, lng_c, center_lat, center_lng) <= radius
+            return inside
+        y1, x1, y2, slope = self.edge_columns
+        lat_col = lat_c[:, None]
+        crossings = ((y1 > lat_col) != (y2 > lat_col)) & (lng_c[:, None] < slope * (lat_col - y1) + x1)
+        inside[candidates] = (np.count_nonzero(crossings, axis=1) & 1).astype(bool)
+        return inside
+
+
+def _haversine_batch(lat: np.ndarray, lng: np.ndarray, center_lat: float, center_lng: float) -> np.ndarray:
+    phi1, phi2 = np.radians(lat), math.radians(center_lat)
+    dphi = np.radians(center_lat - lat)
+    dlambda = np.radians(center_lng - lng)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * math.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return _EARTH_RADIUS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+class GeofenceIndex:
+    """Zones of one organization, bucketed into a uniform lat/lng grid by bounding box."""
+
+    def __init__(self, zones: list[GeofenceZone], cell_degrees: float, max_cells: int):
+        self.zones = zones
+        self.cell_degrees = cell_degrees
+        self._prepared = [_PreparedZone(zone) for zone in zones]
+        # cell -> indices of zones whose box overlaps it
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        # Zones without a usable box or spanning more than max_cells
+        self._wide: list[int] = []
+        # Result for a point outside every zone: each (non-inert) zone is violated
+        self._outside = [not prepared.inert for prepared in self._prepared]
+        for i, prepared in enumerate(self._prepared):
+            if prepared.inert:
+                continue
+            cells = self._cells_of(prepared.bbox, max_cells) if prepared.bbox is not None else None
+            if cells is None:
+                self._wide.append(i)
+                continue
+            for cell in cells:
+                self._cells.setdefault(cell, []).append(i)
+
+    def containing(self, lat: float, lng: float) -> set[int]:
+        """Indices of the zones whose area contains the point."""
+        cell = (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+        prepared = self._prepared
+        inside = {i for i in self._wide if prepared[i].contains(lat, lng)}
+        inside.update(i for i in self._cells.get(cell, ()) if prepared[i].contains(lat, lng))
+        return inside
+
+    def violations(self, lat: float, lng: float, alt: float) -> list[bool]:
+        """Per zone (in `zones` order), whether the position violates it."""
+        result = self._outside.copy()
+        for i in self.containing(lat, lng):
+            prepared = self._prepared[i]
+            result[i] = (
+                (prepared.max_altitude is not None and alt > prepared.max_altitude)
+                or (prepared.min_altitude is not None and alt < prepared.min_altitude)
+            )
+        return result
+
+    def violations_batch(self, lat: np.ndarray, lng: np.ndarray, alt: np.ndarray) -> np.ndarray:
+        """Boolean (positions, zones) matrix of violations for K positions."""
+        result = np.zeros((len(lat), len(self._prepared)), dtype=bool)
+        for i, prepared in enumerate(self._prepared):
+            if prepared.inert:
+                continue
+            violated = ~prepared.contains_batch(lat, lng)
+            if prepared.max_altitude is not None:
+                violated |= alt > prepared.max_altitude
+            if prepared.min_altitude is not None:
+                violated |= alt < prepared.min_altitude
+            result[:, i] = violated
+        return result
+
+    def _cells_of(self, bbox: tuple[float, float, float, float], max_cells: int) -> list[tuple[int, int]] | None:
+        min_lat, min_lng, max_lat, max_lng = bbox
+        lat_range = range(math.floor(min_lat / self.cell_degrees), math.floor(max_lat / self.cell_degrees) + 1)
+        lng_range = range(math.floor(min_lng / self.cell_degrees), math.floor(max_lng / self.cell_degrees) + 1)
+        if len(lat_range) * len(lng_range) > max_cells:
+            return None
+        return [(y, x) for y in lat_range for x in lng_range]
@@ -4,7 +4,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, DateTime, Enum, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, Enum, Float, ForeignKey, Index, Integer, String, Text, text
 from sqlalchemy.dialects.postgresql import ARRAY, JSON, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -14,10 +14,17 @@ from backend.shared.schemas.alert import AlertCategory, AlertSeverity
 
 class Alert(PostgresBase):
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Keyset pagination, newest first (scanned backwards); also serves plain org lookups
+        Index("ix_alerts_org_created", "organization_id", "created_at", "id"),
+        # Open alerts are a small, hot subset: listing and counting them skips the history
+        Index("ix_alerts_org_unresolved", "organization_id", "created_at", postgresql_where=text("NOT resolved")),
+        Index("ix_alerts_org_unacknowledged", "organization_id", "created_at", postgresql_where=text("NOT acknowledged")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     vehicle_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True, index=True)
-    organization_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+    organization_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
     severity: Mapped[AlertSeverity] = mapped_column(Enum(AlertSeverity, name="alert_severity"), nullable=False)
     category: Mapped[AlertCategory] = mapped_column(Enum(AlertCategory, name="alert_category"), nullable=False)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -0,0 +1,239 @@
+"""
+Out-of-band alert notifications (email, webhooks).
+`alert_sink.submit` hands every triggered alert, with the notification channels
+of the rule that raised it, to `notification_dispatcher.submit`, which only
+enqueues it; a pool of ALERT_NOTIFY_WORKERS workers resolves recipients and
+delivers. Channels are the rule's `notification_channels` entries, either a
+channel name or an object naming its target:
+
+    "email"                                  admins of the organization
+    {"type": "email", "to": ["ops@x.io"]}    explicit addresses
+    "webhook"                                ALERT_WEBHOOK_URL
+    {"type": "webhook", "url": "https://…"}  JSON alert POSTed to the URL
+    {"type": "slack", "url": "https://…"}    Slack incoming webhook
+
+"push" needs nothing here (alerts already reach WebSocket clients) and SMS is
+not wired to a provider, so both are ignored.
+
+Emails go through a small pool of reused SMTP connections. Each recipient gets
+at most one email per ALERT_EMAIL_INTERVAL_SECONDS: the first alert is sent
+at once, the ones after it are held and sent together as a digest
+("12 alerts in the last 5 minutes") when the interval is over. Webhooks share
+one pooled HTTP client and are not rate limited.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from uuid import UUID
+
+import httpx
+from sqlalchemy import select
+
+from backend.shared.config import get_base_settings
+from backend.shared.database.postgres import get_direct_postgres_session
+from backend.shared.email import SMTPConnectionPool
+from backend.shared.schemas.alert import AlertResponse
+from backend.shared.schemas.auth import Role
+
+from backend.services.auth.models import User
+
+logger = logging.getLogger(__name__)
+
+# Alerts listed in a digest body; the count covers all of them
+_DIGEST_MAX_LISTED = 50
+# How often held alerts are checked for a due digest
+_DIGEST_TICK_SECONDS = 5.0
+
+
+class _Recipient:
+    """Email rate-limit state of one address."""
+
+    __slots__ = ("last_sent", "held")
+
+    def __init__(self):
+        self.last_sent = float("-inf")
+        # (monotonic time, alert) held back for the next digest
+        self.held: list[tuple[float, AlertResponse]] = []
+
+
+def _subject(alert: AlertResponse) -> str:
+    return f"[AeroCommand] {alert.severity.value.upper()}: {alert.title}"
+
+
+def _line(alert: AlertResponse) -> str:
+    vehicle = f" (vehicle {alert.vehicle_id})" if alert.vehicle_id else ""
+    return f"{alert.created_at:%Y-%m-%d %H:%M:%S} UTC  [{alert.severity.value}] {alert.title}{vehicle}"
+
+
+def _body(alert: AlertResponse) -> str:
+    return f"{_line(alert)}\n\n{alert.message}\n"
+
+
+def _digest(held: list[tuple[float, AlertResponse]], now: float) -> tuple[str, str]:
+    minutes = max(1, round((now - held[0][0]) / 60))
+    count = len(held)
+    summary = f"{count} alert{'s' if count != 1 else ''} in the last {minutes} minute{'s' if minutes != 1 else ''}"
+    lines = [_line(alert) for _, alert in held[-_DIGEST_MAX_LISTED:]]
+    if count > _DIGEST_MAX_LISTED:
+        lines.insert(0, f"... {count - _DIGEST_MAX_LISTED} earlier alerts not listed")
+    return f"[AeroCommand] {summary}", f"{summary}:\n\n" + "\n".join(lines) + "\n"
+
+
+class NotificationDispatcher:
+    """Worker pool delivering triggered alerts to their notification channels."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue[tuple[str, AlertResponse, list]] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._http: httpx.AsyncClient | None = None
+        self._smtp: SMTPConnectionPool | None = None
+        self._recipients: dict[str, _Recipient] = {}
+        # org_id -> (admin emails, monotonic expiry)
+        self._admins: dict[str, tuple[list[str], float]] = {}
+        self.dropped = 0
+
+    def submit(self, org_id: str, alert: AlertResponse, channels: list) -> None:
+        """Queue an alert for delivery; never blocks."""
+        if not channels or self._queue is None:
+            return
+        try:
+            self._queue.put_nowait((org_id, alert, channels))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.error(f"Notification queue full, {self.dropped} alerts not notified")
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        settings = get_base_settings()
+        self._queue = asyncio.Queue(maxsize=settings.ALERT_NOTIFY_QUEUE_SIZE)
+        workers = settings.ALERT_NOTIFY_WORKERS
+        self._http = httpx.AsyncClient(
+            timeout=settings.ALERT_WEBHOOK_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=workers * 2, max_keepalive_connections=workers),
+        )
+        if settings.SMTP_HOST:
+            self._smtp = SMTPConnectionPool(settings, size=settings.ALERT_SMTP_POOL_SIZE)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(workers)]
+        self._tasks.append(asyncio.create_task(self._digest_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._queue = None
+        held = sum(len(r.held) for r in self._recipients.values())
+        if held:
+            logger.warning(f"Dropping {held} alerts held for email digests on shutdown")
+        self._recipients.clear()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._smtp is not None:
+            await self._smtp.close()
+            self._smtp = None
+
+    async def _worker(self) -> None:
+        while True:
+            org_id, alert, channels = await self._queue.get()
+            try:
+                await self._dispatch(org_id, alert, channels)
+            except Exception as e:
+                logger.error(f"Notification of alert {alert.id} failed: {e}")
+
+    async def _dispatch(self, org_id: str, alert: AlertResponse, channels: list) -> None:
+        emails: set[str] = set()
+        for channel in channels:
+            if isinstance(channel, str):
+                kind, target = channel, None
+            elif isinstance(channel, dict):
+                kind = channel.get("type")
+                target = channel.get("to") if kind == "email" else channel.get("url")
+            else:
+                continue
+
+            if kind == "email":
+                if target is None:
+                    emails.update(await self._org_admins(org_id))
+                else:
+                    emails.update([target] if isinstance(target, str) else target)
+            elif kind == "webhook":
+                url = target or get_base_settings().ALERT_WEBHOOK_URL
+                if url:
+                    await self._post(url, alert.model_dump(mode="json"))
+            elif kind == "slack" and target:
+                await self._post(target, {"text": f"{_subject(alert)}\n{alert.message}"})
+
+        for email in emails:
+            await self._notify_email(email, alert)
+
+    async def _notify_email(self, email: str, alert: AlertResponse) -> None:
+        if self._smtp is None:
+            return
+        recipient = self._recipients.setdefault(email, _Recipient())
+        now = time.monotonic()
+        if recipient.held or now - recipient.last_sent < get_base_settings().ALERT_EMAIL_INTERVAL_SECONDS:
+            recipient.held.append((now, alert))
+            return
+        recipient.last_sent = now
+        await self._send_email(email, _subject(alert), _body(alert))
+
+    async def _digest_loop(self) -> None:
+        while True:
+            await asyncio.sleep(_DIGEST_TICK_SECONDS)
+            interval = get_base_settings().ALERT_EMAIL_INTERVAL_SECONDS
+            now = time.monotonic()
+            for email, recipient in list(self._recipients.items()):
+                if not recipient.held:
+                    # Nothing pending and the interval is over: forget the address
+                    if now - recipient.last_sent >= interval:
+                        del self._recipients[email]
+                    continue
+                if now - recipient.last_sent < interval:
+                    continue
+                held, recipient.held = recipient.held, []
+                recipient.last_sent = now
+                subject, body = _digest(held, now)
+                await self._send_email(email, subject, body)
+
+    async def _send_email(self, email: str, subject: str, body: str) -> None:
+        try:
+            await self._smtp.send(to_email=email, subject=subject, body=body)
+        except Exception as e:
+            logger.error(f"Alert email to {email} failed: {e}")
+
+    async def _post(self, url: str, payload: dict) -> None:
+        try:
+            response = await self._http.post(url, json=payload)
+            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Alert webhook {url} failed: {e}")
+
+    async def _org_admins(self, org_id: str) -> list[str]:
+        cached = self._admins.get(org_id)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        session = await get_direct_postgres_session()
+        async with session:
+            emails = list((await session.execute(
+                select(User.email).where(
+                    User.organization_id == UUID(org_id),
+                    User.role == Role.ADMIN,
+                    User.is_active == True,
+                )
+            )).scalars().all())
+        ttl = get_base_settings().ALERT_RECIPIENTS_CACHE_SECONDS
+        self._admins[org_id] = (emails, time.monotonic() + ttl)
+        return emails
+
+
+# Singleton instance
+notification_dispatcher = NotificationDispatcher()
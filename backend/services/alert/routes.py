@@ -3,28 +3,48 @@ from __future__ import annotations
 
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.shared.database.postgres import get_postgres_session
-from backend.shared.schemas.alert import AlertCategory, AlertResponse, AlertSeverity
+from backend.shared.schemas.alert import AlertCategory, AlertResponse, AlertSeverity, AlertStats
 
 from backend.services.auth.dependencies import CurrentUser, OrgId
-from .service import acknowledge_alert, list_alerts, resolve_alert
+from .counters import open_alert_counts
+from .service import acknowledge_alert, decode_cursor, encode_cursor, list_alerts, resolve_alert
 
 router = APIRouter()
 
 
 @router.get("", response_model=list[AlertResponse])
 async def api_list_alerts(
+    response: Response,
     org_id: OrgId,
     severity: AlertSeverity | None = None,
     category: AlertCategory | None = None,
     acknowledged: bool | None = None,
+    resolved: bool | None = None,
     limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = Query(None, description="X-Next-Cursor of the previous page"),
     db: AsyncSession = Depends(get_postgres_session),
 ):
-    return await list_alerts(db, org_id, severity, category, acknowledged, limit)
+    """Alerts newest first. A full page carries an X-Next-Cursor header to fetch the next one."""
+    after = decode_cursor(cursor) if cursor else None
+    alerts = await list_alerts(
+        db, org_id, severity, category, acknowledged, limit, resolved=resolved, after=after,
+    )
+    if len(alerts) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(alerts[-1])
+    return alerts
+
+
+@router.get("/stats", response_model=AlertStats)
+async def api_alert_stats(
+    org_id: OrgId,
+    db: AsyncSession = Depends(get_postgres_session),
+):
+    """Open and unacknowledged alert counts by severity, from the Redis counters."""
+    return await open_alert_counts(db, org_id)
 
 
 @router.post("/{alert_id}/acknowledge", response_model=AlertResponse)
@@ -6,17 +6,39 @@ Supports conditions like:
   {"field": "battery.remaining", "operator": "lt", "value": 20}
   {"field": "gps.fix_type", "operator": "eq", "value": 0}
   {"field": "altitude", "operator": "gt", "value": 120}
+  {"field": "gps.alt", "operator": "between", "value": [10, 120]}
+  {"field": "system.mode", "operator": "in", "value": ["RTL", "LAND"]}
+  {"all": [...]}, {"any": [...]}, {"not": {...}}
+Temporal conditions keep per-vehicle state, held by a RuleState (see windows.py):
+  {"field": "battery.remaining", "window": {"seconds": 60, "aggregate": "delta"}, "operator": "lt", "value": -10}
+  {"field": "gps.fix_type", "operator": "lt", "value": 2, "for_seconds": 5}
+  {"field": "gps.alt", "operator": "gt", "value": 120, "for_frames": 3}
+`window` compares an aggregate (min/max/avg/delta) of the field over the last
+`seconds` instead of the current value; `for_seconds` / `for_frames` (on any
+condition) only match once it has held that long.
+A firing alert clears when its condition stops matching, or with hysteresis
+once `clear` matches / the value crosses back over `clear_value`:
+  {"field": "battery.remaining", "operator": "lt", "value": 20, "clear_value": 25}
+
+`compile_condition` turns a condition into a predicate once, so the streaming
+evaluator does no parsing or lookups per frame; `evaluate_condition`
+interprets a single comparison on every call.
 """
 from __future__ import annotations
 
+import itertools
 import logging
 import math
+import operator
+from collections.abc import Callable, Iterator
 from datetime import datetime, timezone
 
 from backend.shared.database.redis import RedisKeys, get_redis
 from backend.shared.schemas.alert import AlertCategory, AlertSeverity, GeofenceZone
 from backend.shared.schemas.telemetry import TelemetryFrame
 
+from .windows import AGGREGATES, RuleState, SlidingWindow, Sustained
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,6 +74,256 @@ def evaluate_condition(telemetry: TelemetryFrame, condition: dict) -> bool:
         return False
 
 
+_COMPARATORS = {
+    "eq": operator.eq,
+    "neq": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+# Alert operator -> operator that clears it once the value is back past `clear_value`
+_CLEAR_OPERATORS = {"gt": "lte", "gte": "lte", "lt": "gte", "lte": "gte"}
+
+_RANGE_OPERATORS = ("between", "outside")
+_SET_OPERATORS = ("in", "not_in")
+
+_SUSTAIN_KEYS = ("for_seconds", "for_frames")
+
+Predicate = Callable[[object], bool]
+
+
+def compile_condition(condition: dict, state: RuleState | None = None) -> Predicate:
+    """Compile a (possibly compound) condition into a predicate over a telemetry frame.
+
+    Temporal parts keep their per-vehicle state in `state` (a private one when
+    omitted), so a recompiled predicate can carry on where the last one was.
+    Raises ValueError for malformed conditions or unknown operators.
+    """
+    return _compile(condition, state if state is not None else RuleState(), itertools.count())
+
+
+def _compile(condition: dict, state: RuleState, nodes: Iterator[int]) -> Predicate:
+    if not isinstance(condition, dict):
+        raise ValueError(f"Condition must be an object, got {type(condition).__name__}")
+    if any(key in condition for key in _SUSTAIN_KEYS):
+        node = next(nodes)
+        inner = _compile({k: v for k, v in condition.items() if k not in _SUSTAIN_KEYS}, state, nodes)
+        return _sustained(inner, condition.get("for_seconds"), condition.get("for_frames"), state, node)
+    if "all" in condition or "any" in condition:
+        mode = "all" if "all" in condition else "any"
+        children = condition[mode]
+        if not isinstance(children, list) or not children:
+            raise ValueError(f"'{mode}' needs a non-empty list of conditions")
+        predicates = [_compile(child, state, nodes) for child in children]
+        # Stateful children must see every frame, so they are not short-circuited
+        eager = any(is_temporal(child) for child in children)
+        return _all_of(predicates, eager) if mode == "all" else _any_of(predicates, eager)
+    if "not" in condition:
+        inner = _compile(condition["not"], state, nodes)
+        return lambda frame: not inner(frame)
+    return _compile_comparison(condition, state, nodes)
+
+
+def compile_clear_condition(condition: dict) -> Predicate | None:
+    """Compile a condition's hysteresis clear predicate; None when it clears on no longer matching."""
+    if "clear" in condition:
+        # Only checked while firing, so it would miss the frames a window needs
+        if is_temporal(condition["clear"]):
+            raise ValueError("'clear' cannot be a temporal condition")
+        return compile_condition(condition["clear"])
+    if "clear_value" in condition:
+        if is_temporal(condition):
+            raise ValueError("'clear_value' is not supported on temporal conditions, use 'clear'")
+        reverse = _CLEAR_OPERATORS.get(condition.get("operator", "eq"))
+        if reverse is None:
+            raise ValueError("'clear_value' needs a gt/gte/lt/lte condition")
+        return compile_condition({"field": condition.get("field", ""), "operator": reverse, "value": condition["clear_value"]})
+    return None
+
+
+def is_temporal(condition) -> bool:
+    """Whether a condition (or any part of it) keeps per-vehicle state across frames."""
+    if not isinstance(condition, dict):
+        return False
+    if "window" in condition or any(key in condition for key in _SUSTAIN_KEYS):
+        return True
+    children = condition.get("all") or condition.get("any") or []
+    if "not" in condition:
+        children = [condition["not"]]
+    return any(is_temporal(child) for child in children) if isinstance(children, list) else False
+
+
+def compile_accessor(path: str) -> Callable[[object], object]:
+    """Resolve a dot-separated field path, returning None when any step is missing."""
+    if not path:
+        raise ValueError("Condition is missing 'field'")
+    get_attr = operator.attrgetter(path)
+
+    def access(obj):
+        try:
+            return get_attr(obj)
+        except AttributeError:
+            # Dict-valued fields (and None sub-models) take the slow path
+            return _get_nested_field(obj, path)
+
+    return access
+
+
+def _compile_comparison(condition: dict, state: RuleState, nodes: Iterator[int]) -> Predicate:
+    get = compile_accessor(condition.get("field", ""))
+    if "window" in condition:
+        get = _window_accessor(get, condition["window"], state, next(nodes))
+    op = condition.get("operator", "eq")
+    threshold = condition.get("value")
+
+    if op in _COMPARATORS:
+        compare = _COMPARATORS[op]
+        number = _as_number(threshold)
+        if number is None:
+            if op not in ("eq", "neq"):
+                raise ValueError(f"Operator '{op}' needs a numeric value")
+            number = threshold
+
+        def predicate(frame) -> bool:
+            value = get(frame)
+            if value is None:
+                return False
+            try:
+                return compare(value, number)
+            except TypeError:
+                return False
+
+        return predicate
+
+    if op in _RANGE_OPERATORS:
+        bounds = threshold if isinstance(threshold, (list, tuple)) else ()
+        low, high = (_as_number(b) for b in bounds) if len(bounds) == 2 else (None, None)
+        if low is None or high is None or low > high:
+            raise ValueError(f"Operator '{op}' needs a [low, high] value")
+        inside = op == "between"
+
+        def predicate(frame) -> bool:
+            value = get(frame)
+            if value is None:
+                return False
+            try:
+                return (low <= value <= high) == inside
+            except TypeError:
+                return False
+
+        return predicate
+
+    if op in _SET_OPERATORS:
+        if not isinstance(threshold, (list, tuple)):
+            raise ValueError(f"Operator '{op}' needs a list value")
+        members = frozenset(threshold)
+        wanted = op == "in"
+
+        def predicate(frame) -> bool:
+            value = get(frame)
+            if value is None:
+                return False
+            try:
+                return (value in members) == wanted
+            except TypeError:
+                return False
+
+        return predicate
+
+    raise ValueError(f"Unknown operator: {op}")
+
+
+def _window_accessor(
+    get: Callable[[object], object], spec, state: RuleState, node: int,
+) -> Callable[[object], float | None]:
+    """Feed the field into a per-vehicle sliding window and return its aggregate."""
+    if not isinstance(spec, dict):
+        raise ValueError("'window' must be an object")
+    seconds = _as_number(spec.get("seconds"))
+    aggregate = spec.get("aggregate", "avg")
+    if seconds is None or seconds <= 0:
+        raise ValueError("'window' needs a positive 'seconds'")
+    if aggregate not in AGGREGATES:
+        raise ValueError(f"Unknown window aggregate: {aggregate}")
+
+    def new_window() -> SlidingWindow:
+        return SlidingWindow(seconds)
+
+    def access(frame):
+        value = get(frame)
+        if value is None:
+            return None
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        window = state.node(frame.vehicle_id, node, new_window)
+        window.push(_frame_time(frame), value)
+        return window.aggregate(aggregate)
+
+    return access
+
+
+def _sustained(inner: Predicate, for_seconds, for_frames, state: RuleState, node: int) -> Predicate:
+    """Match once `inner` has held for at least `for_seconds` and `for_frames` in a row."""
+    seconds = _as_number(for_seconds) if for_seconds is not None else 0.0
+    frames = _as_number(for_frames) if for_frames is not None else 1.0
+    if seconds is None or seconds < 0 or frames is None or frames < 1:
+        raise ValueError("'for_seconds' must be >= 0 and 'for_frames' >= 1")
+
+    def predicate(frame) -> bool:
+        sustained = state.node(frame.vehicle_id, node, Sustained)
+        t = _frame_time(frame)
+        sustained.update(inner(frame), t)
+        return sustained.since is not None and sustained.frames >= frames and t - sustained.since >= seconds
+
+    return predicate
+
+
+def _frame_time(frame) -> float:
+    timestamp = getattr(frame, "timestamp", None)
+    return timestamp.timestamp() if isinstance(timestamp, datetime) else datetime.now(timezone.utc).timestamp()
+
+
+def _all_of(predicates: list[Predicate], eager: bool = False) -> Predicate:
+    if len(predicates) == 1:
+        return predicates[0]
+    if eager:
+        return lambda frame: all([p(frame) for p in predicates])
+
+    def predicate(frame) -> bool:
+        for p in predicates:
+            if not p(frame):
+                return False
+        return True
+
+    return predicate
+
+
+def _any_of(predicates: list[Predicate], eager: bool = False) -> Predicate:
+    if len(predicates) == 1:
+        return predicates[0]
+    if eager:
+        return lambda frame: any([p(frame) for p in predicates])
+
+    def predicate(frame) -> bool:
+        for p in predicates:
+            if p(frame):
+                return True
+        return False
+
+    return predicate
+
+
+def _as_number(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
 def _get_nested_field(obj, path: str):
     """Navigate dot-separated field path on a Pydantic model."""
     parts = path.split(".")
@@ -1,12 +1,13 @@
 """Alert business logic – CRUD, rule evaluation, notification dispatch."""
 from __future__ import annotations
 
+import base64
 import logging
 from datetime import datetime, timezone
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import func, select
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.shared.schemas.alert import (
@@ -18,6 +19,7 @@ from backend.shared.schemas.alert import (
 )
 from backend.shared.schemas.telemetry import TelemetryFrame
 
+from .counters import adjust_open_counts, open_field, unacked_field
 from .models import Alert, AlertRuleRecord, GeofenceZoneRecord
 from .rule_engine import check_geofence, evaluate_condition
 
@@ -37,14 +39,34 @@ async def create_alert(db: AsyncSession, org_id: UUID, data: AlertCreate) -> Ale
     db.add(alert)
     await db.flush()
     await db.refresh(alert)
-    return AlertResponse.model_validate(alert)
+    await adjust_open_counts({
+        (str(org_id), open_field(alert.severity)): 1,
+        (str(org_id), unacked_field(alert.severity)): 1,
+    })
+    return _alert_to_response(alert)
+
+
+def encode_cursor(alert: AlertResponse) -> str:
+    """Opaque keyset cursor pointing just after `alert` in listing order."""
+    raw = f"{alert.created_at.isoformat()}|{alert.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, _, alert_id = raw.partition("|")
+        return datetime.fromisoformat(created_at), UUID(alert_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 async def list_alerts(
     db: AsyncSession, org_id: UUID, severity: AlertSeverity | None = None,
     category: AlertCategory | None = None, acknowledged: bool | None = None,
-    limit: int = 100,
+    limit: int = 100, *, resolved: bool | None = None, after: tuple[datetime, UUID] | None = None,
 ) -> list[AlertResponse]:
+    """Newest first; pass the (created_at, id) of the last alert seen as `after` for the next page."""
     query = select(Alert).where(Alert.organization_id == org_id)
     if severity:
         query = query.where(Alert.severity == severity)
@@ -52,9 +74,14 @@ async def list_alerts(
         query = query.where(Alert.category == category)
     if acknowledged is not None:
         query = query.where(Alert.acknowledged == acknowledged)
-    query = query.order_by(Alert.created_at.desc()).limit(limit)
+    if resolved is not None:
+        query = query.where(Alert.resolved == resolved)
+    if after is not None:
+        # Row comparison so the (organization_id, created_at, id) index seeks straight to the page
+        query = query.where(tuple_(Alert.created_at, Alert.id) < after)
+    query = query.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(limit)
     result = await db.execute(query)
-    return [AlertResponse.model_validate(a) for a in result.scalars().all()]
+    return [_alert_to_response(a) for a in result.scalars().all()]
 
 
 async def acknowledge_alert(db: AsyncSession, org_id: UUID, alert_id: UUID, user_id: UUID) -> AlertResponse:
@@ -64,12 +91,15 @@ async def acknowledge_alert(db: AsyncSession, org_id: UUID, alert_id: UUID, user
     alert = result.scalar_one_or_none()
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
+    counted = not alert.acknowledged and not alert.resolved
     alert.acknowledged = True
     alert.acknowledged_by = user_id
     alert.acknowledged_at = datetime.now(timezone.utc)
     await db.flush()
     await db.refresh(alert)
-    return AlertResponse.model_validate(alert)
+    if counted:
+        await adjust_open_counts({(str(org_id), unacked_field(alert.severity)): -1})
+    return _alert_to_response(alert)
 
 
 async def resolve_alert(db: AsyncSession, org_id: UUID, alert_id: UUID) -> AlertResponse:
@@ -79,11 +109,29 @@ async def resolve_alert(db: AsyncSession, org_id: UUID, alert_id: UUID) -> Alert
     alert = result.scalar_one_or_none()
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
+    deltas = {}
+    if not alert.resolved:
+        deltas[(str(org_id), open_field(alert.severity))] = -1
+        if not alert.acknowledged:
+            deltas[(str(org_id), unacked_field(alert.severity))] = -1
     alert.resolved = True
     alert.resolved_at = datetime.now(timezone.utc)
     await db.flush()
     await db.refresh(alert)
-    return AlertResponse.model_validate(alert)
+    await adjust_open_counts(deltas)
+    return _alert_to_response(alert)
+
+
+def _alert_to_response(alert: Alert) -> AlertResponse:
+    # `Alert.metadata` is the declarative MetaData, the column is metadata_json
+    return AlertResponse(
+        id=alert.id, vehicle_id=alert.vehicle_id, organization_id=alert.organization_id,
+        severity=alert.severity, category=alert.category, title=alert.title,
+        message=alert.message, metadata=alert.metadata_json,
+        acknowledged=bool(alert.acknowledged), acknowledged_by=alert.acknowledged_by,
+        acknowledged_at=alert.acknowledged_at, resolved=bool(alert.resolved),
+        resolved_at=alert.resolved_at, created_at=alert.created_at,
+    )
 
 
 async def evaluate_telemetry_against_rules(
@@ -103,14 +151,7 @@ async def evaluate_telemetry_against_rules(
 
     for rule in rules:
         if evaluate_condition(telemetry, rule.condition):
-            triggered_alerts.append(AlertCreate(
-                vehicle_id=UUID(telemetry.vehicle_id) if telemetry.vehicle_id else None,
-                severity=rule.severity,
-                category=rule.category,
-                title=f"Rule triggered: {rule.name}",
-                message=f"Condition met: {rule.condition}",
-                metadata={"rule_id": str(rule.id), "telemetry_seq": telemetry.seq},
-            ))
+            triggered_alerts.append(rule_alert(rule, telemetry))
 
     # Check geofences
     result = await db.execute(
@@ -122,21 +163,39 @@ async def evaluate_telemetry_against_rules(
     zones = result.scalars().all()
 
     for zone_record in zones:
-        zone = GeofenceZone(
-            id=zone_record.id, name=zone_record.name, type=zone_record.type,
-            coordinates=zone_record.coordinates, radius=zone_record.radius,
-            max_altitude=zone_record.max_altitude, min_altitude=zone_record.min_altitude,
-            action=zone_record.action,
-        )
+        zone = zone_from_record(zone_record)
         if check_geofence(telemetry.gps.lat, telemetry.gps.lng, telemetry.gps.alt, zone):
-            triggered_alerts.append(AlertCreate(
-                vehicle_id=UUID(telemetry.vehicle_id) if telemetry.vehicle_id else None,
-                severity=AlertSeverity.CRITICAL,
-                category=AlertCategory.GEOFENCE,
-                title=f"Geofence violation: {zone.name}",
-                message=f"Vehicle exited zone '{zone.name}' at ({telemetry.gps.lat}, {telemetry.gps.lng})",
-                metadata={"zone_id": str(zone.id), "action": zone.action},
-            ))
+            triggered_alerts.append(geofence_alert(zone, telemetry))
 
     return triggered_alerts
 
+
+def zone_from_record(record: GeofenceZoneRecord) -> GeofenceZone:
+    return GeofenceZone(
+        id=record.id, name=record.name, type=record.type,
+        coordinates=record.coordinates, radius=record.radius,
+        max_altitude=record.max_altitude, min_altitude=record.min_altitude,
+        action=record.action,
+    )
+
+
+def rule_alert(rule: AlertRuleRecord, telemetry: TelemetryFrame) -> AlertCreate:
+    return AlertCreate(
+        vehicle_id=UUID(telemetry.vehicle_id) if telemetry.vehicle_id else None,
+        severity=rule.severity,
+        category=rule.category,
+        title=f"Rule triggered: {rule.name}",
+        message=f"Condition met: {rule.condition}",
+        metadata={"rule_id": str(rule.id), "telemetry_seq": telemetry.seq},
+    )
+
+
+def geofence_alert(zone: GeofenceZone, telemetry: TelemetryFrame) -> AlertCreate:
+    return AlertCreate(
+        vehicle_id=UUID(telemetry.vehicle_id) if telemetry.vehicle_id else None,
+        severity=AlertSeverity.CRITICAL,
+        category=AlertCategory.GEOFENCE,
+        title=f"Geofence violation: {zone.name}",
+        message=f"Vehicle exited zone '{zone.name}' at ({telemetry.gps.lat}, {telemetry.gps.lng})",
+        metadata={"zone_id": str(zone.id), "action": zone.action},
+    )
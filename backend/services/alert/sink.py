@@ -0,0 +1,293 @@
+"""
+Write-behind alert persistence with immediate real-time push.
+`alert_sink.submit` assigns the alert its id and timestamp, pushes it to the
+`alerts:{org_id}` WebSocket channel right away and queues the row; a
+background loop drains the queue and bulk-inserts the rows in one
+transaction per batch. Producers never wait for the database: when the
+queue is full (DB down for a long time) new rows are dropped and counted,
+after their WebSocket push. Alerts with notification channels are then
+handed to notification_dispatcher.
+
+Bursts of similar alerts are folded into incidents first (see correlator):
+an alert attached to an open incident is only persisted, and the incident is
+pushed and notified once when it opens, then re-pushed with its count. Rows
+are upserted by id, so an incident row is simply queued again when it changes.
+The open-alert counters (see counters) are adjusted for the rows of each
+committed insert only.
+
+A failed batch is retried whole; rows that have been in ALERT_SINK_MAX_ATTEMPTS
+failed batches are then inserted one at a time, so a row the database rejects
+(bad data, constraint violation) is moved to the `alert_dead_letter` Redis
+list instead of blocking every row queued behind it.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from backend.shared.config import get_base_settings
+from backend.shared.database.postgres import get_direct_postgres_session
+from backend.shared.database.redis import RedisKeys, get_redis
+from backend.shared.schemas.alert import AlertCreate, AlertResponse, AlertSeverity
+
+from backend.services.telemetry.websocket_manager import ws_manager
+
+from .correlator import AlertCorrelator, Incident
+from .counters import adjust_open_counts, open_field, unacked_field
+from .models import Alert
+from .notifier import notification_dispatcher
+
+logger = logging.getLogger(__name__)
+
+# Max rows per INSERT transaction
+_INSERT_BATCH = 1000
+# How often open incidents are checked for a count update
+_INCIDENT_TICK_SECONDS = 1.0
+# Rows kept in the dead-letter list
+_DEAD_LETTER_MAX = 10000
+# Errors meaning the database is unreachable rather than the row being bad
+_OUTAGE_ERRORS = (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)
+
+
+class _PendingRow:
+    """A queued alert row with the counter changes it brings once committed."""
+
+    __slots__ = ("row", "deltas", "attempts")
+
+    def __init__(self, row: dict, deltas: Counter[tuple[str, str]]):
+        self.row = row
+        # (org_id, counter field) -> change
+        self.deltas = deltas
+        # Failed batch inserts this row was part of
+        self.attempts = 0
+
+
+class AlertSink:
+    """Pushes triggered alerts to WebSocket clients and persists them in bulk."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue[_PendingRow] | None = None
+        self._task: asyncio.Task | None = None
+        self._incident_task: asyncio.Task | None = None
+        self._correlator = AlertCorrelator()
+        self.dropped = 0
+        self.dead_lettered = 0
+
+    async def submit(self, org_id: str, alert: AlertCreate, channels: list | None = None) -> AlertResponse:
+        """Publish an alert now and queue it for the next bulk insert and its notifications.
+
+        `channels` are the notification channels of the rule that raised the
+        alert; None (no rule) means ALERT_DEFAULT_NOTIFICATION_CHANNELS.
+        """
+        incident, opened = self._correlator.correlate(org_id, alert, time.monotonic())
+        metadata = alert.metadata
+        if incident is not None:
+            metadata = {**(metadata or {}), "incident_id": str(incident.id)}
+        row = {
+            "id": uuid.uuid4(),
+            "vehicle_id": alert.vehicle_id,
+            "organization_id": UUID(org_id),
+            "severity": alert.severity,
+            "category": alert.category,
+            "title": alert.title,
+            "message": alert.message,
+            "metadata_json": metadata,
+            "acknowledged": False,
+            "resolved": False,
+            "created_at": datetime.now(timezone.utc),
+        }
+        response = AlertResponse(
+            id=row["id"], vehicle_id=alert.vehicle_id, organization_id=row["organization_id"],
+            severity=alert.severity, category=alert.category, title=alert.title,
+            message=alert.message, metadata=metadata, created_at=row["created_at"],
+        )
+        if channels is None:
+            channels = get_base_settings().ALERT_DEFAULT_NOTIFICATION_CHANNELS
+        if incident is None:
+            await self._push(org_id, response)
+            notification_dispatcher.submit(org_id, response, channels)
+        elif opened:
+            incident_response = await self._publish(incident)
+            notification_dispatcher.submit(org_id, incident_response, channels)
+        self._enqueue(row, self._count(org_id, alert.severity, 1))
+        return response
+
+    async def _publish(self, incident: Incident) -> AlertResponse:
+        """Push the incident's current state and queue its row."""
+        row = incident.row()
+        response = incident.response(row)
+        org_id = str(incident.organization_id)
+        await self._push(org_id, response)
+        deltas = Counter()
+        if incident.severity != incident.counted_severity:
+            if incident.counted_severity is not None:
+                deltas.update(self._count(org_id, incident.counted_severity, -1))
+            deltas.update(self._count(org_id, incident.severity, 1))
+            incident.counted_severity = incident.severity
+        self._enqueue(row, deltas)
+        return response
+
+    @staticmethod
+    def _count(org_id: str, severity: AlertSeverity, delta: int) -> Counter[tuple[str, str]]:
+        return Counter({(org_id, open_field(severity)): delta, (org_id, unacked_field(severity)): delta})
+
+    async def _push(self, org_id: str, response: AlertResponse) -> None:
+        try:
+            await ws_manager.broadcast_alert(org_id, response.model_dump(mode="json"))
+        except Exception as e:
+            logger.error(f"Alert push failed for org {org_id}: {e}")
+
+    def _enqueue(self, row: dict, deltas: Counter[tuple[str, str]]) -> None:
+        if self._queue is None:
+            logger.warning(f"Alert sink not started, alert '{row['title']}' for org {row['organization_id']} not persisted")
+            return
+        try:
+            self._queue.put_nowait(_PendingRow(row, deltas))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.error(f"Alert sink queue full, {self.dropped} alerts not persisted")
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=get_base_settings().ALERT_SINK_QUEUE_SIZE)
+            self._task = asyncio.create_task(self._flush_loop())
+            self._incident_task = asyncio.create_task(self._incident_loop())
+
+    async def stop(self) -> None:
+        if self._incident_task is not None:
+            self._incident_task.cancel()
+            try:
+                await self._incident_task
+            except asyncio.CancelledError:
+                pass
+            self._incident_task = None
+            # Close open incidents so their rows hold the final count
+            for incident in self._correlator.due(time.monotonic(), final=True):
+                await self._publish(incident)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None:
+            batch = []
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if batch:
+                try:
+                    await self._insert([pending.row for pending in batch])
+                    await self._apply_counts(batch)
+                except Exception as e:
+                    logger.error(f"Final alert flush failed ({len(batch)} rows), inserting one by one: {e}")
+                    lost = await self._insert_each(batch)
+                    if lost:
+                        logger.error(f"{len(lost)} alerts not persisted on shutdown")
+            self._queue = None
+
+    async def _flush_loop(self) -> None:
+        settings = get_base_settings()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < _INSERT_BATCH and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._insert([pending.row for pending in batch])
+            except Exception as e:
+                logger.error(f"Alert insert failed ({len(batch)} rows), retrying: {e}")
+                retry, isolate = [], []
+                for pending in batch:
+                    pending.attempts += 1
+                    (isolate if pending.attempts >= settings.ALERT_SINK_MAX_ATTEMPTS else retry).append(pending)
+                if isolate:
+                    retry.extend(await self._insert_each(isolate))
+                # Rows are re-queued behind newer ones; created_at keeps the real order
+                for pending in retry:
+                    try:
+                        self._queue.put_nowait(pending)
+                    except asyncio.QueueFull:
+                        self.dropped += 1
+                if retry:
+                    await asyncio.sleep(settings.ALERT_SINK_RETRY_SECONDS)
+                continue
+            await self._apply_counts(batch)
+
+    async def _insert_each(self, batch: list[_PendingRow]) -> list[_PendingRow]:
+        """Insert rows one at a time, dead-lettering the ones the database rejects.
+
+        Returns the rows left over when the database became unreachable.
+        """
+        committed = []
+        for i, pending in enumerate(batch):
+            try:
+                await self._insert([pending.row])
+            except _OUTAGE_ERRORS as e:
+                logger.error(f"Alert insert failed, database unreachable: {e}")
+                await self._apply_counts(committed)
+                return batch[i:]
+            except Exception as e:
+                await self._dead_letter(pending.row, e)
+                continue
+            committed.append(pending)
+        await self._apply_counts(committed)
+        return []
+
+    async def _dead_letter(self, row: dict, error: Exception) -> None:
+        self.dead_lettered += 1
+        logger.error(f"Alert {row['id']} ('{row['title']}') rejected by the database, dead-lettered: {error}")
+        entry = json.dumps({"error": str(error), "row": row}, default=str)
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.lpush(RedisKeys.alert_dead_letter(), entry)
+            pipe.ltrim(RedisKeys.alert_dead_letter(), 0, _DEAD_LETTER_MAX - 1)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Dead-lettering alert {row['id']} failed: {e}")
+
+    @staticmethod
+    async def _apply_counts(committed: list[_PendingRow]) -> None:
+        deltas = Counter()
+        for pending in committed:
+            deltas.update(pending.deltas)
+        await adjust_open_counts(deltas)
+
+    async def _incident_loop(self) -> None:
+        while True:
+            await asyncio.sleep(_INCIDENT_TICK_SECONDS)
+            for incident in self._correlator.due(time.monotonic()):
+                await self._publish(incident)
+
+    async def _insert(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+        # An incident row queued twice in one batch keeps its latest state
+        rows = list({row["id"]: row for row in rows}.values())
+        stmt = insert(Alert)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Alert.id],
+            set_={
+                "severity": stmt.excluded.severity,
+                "title": stmt.excluded.title,
+                "message": stmt.excluded.message,
+                "metadata_json": stmt.excluded.metadata_json,
+            },
+        )
+        session = await get_direct_postgres_session()
+        async with session:
+            await session.execute(stmt, rows)
+            await session.commit()
+
+
+# Singleton instance
+alert_sink = AlertSink()
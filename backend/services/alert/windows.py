@@ -0,0 +1,156 @@
+"""
+Per-vehicle sliding windows for temporal alert conditions.
+Each window keeps the samples of the last `seconds` of one vehicle's field in
+a bounded deque, with a running sum and monotonic min/max deques, so pushing
+a sample and reading min/max/avg/delta is O(1) amortized. Nothing is read
+back from the telemetry history store.
+
+Window and sustained states live in `temporal_state`, keyed by
+(rule_id, vehicle_id), not in the compiled predicates: recompiling a rule on a
+cache reload picks its state back up unless the condition itself changed.
+Vehicles idle for ALERT_WINDOW_IDLE_SECONDS are evicted.
+"""
+from __future__ import annotations
+
+import json
+import time
+from collections import deque
+from collections.abc import Callable
+
+AGGREGATES = ("min", "max", "avg", "delta")
+
+# Hard cap on samples per window (60 s at 10 Hz is 600)
+MAX_WINDOW_SAMPLES = 1024
+
+
+class SlidingWindow:
+    """Time-bounded window over one series, aggregated incrementally."""
+
+    __slots__ = ("seconds", "_samples", "_mins", "_maxs", "_sum", "_seq")
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        # (seq, t, value) in arrival order
+        self._samples: deque[tuple[int, float, float]] = deque()
+        # (seq, value), values increasing / decreasing from the left
+        self._mins: deque[tuple[int, float]] = deque()
+        self._maxs: deque[tuple[int, float]] = deque()
+        self._sum = 0.0
+        self._seq = 0
+
+    def push(self, t: float, value: float) -> None:
+        samples = self._samples
+        # Out-of-order frames are treated as arriving now
+        if samples and t < samples[-1][1]:
+            t = samples[-1][1]
+        seq = self._seq
+        self._seq += 1
+        samples.append((seq, t, value))
+        self._sum += value
+        while self._mins and self._mins[-1][1] >= value:
+            self._mins.pop()
+        self._mins.append((seq, value))
+        while self._maxs and self._maxs[-1][1] <= value:
+            self._maxs.pop()
+        self._maxs.append((seq, value))
+
+        cutoff = t - self.seconds
+        while samples[0][1] < cutoff or len(samples) > MAX_WINDOW_SAMPLES:
+            old_seq, _, old_value = samples.popleft()
+            self._sum -= old_value
+            if self._mins[0][0] == old_seq:
+                self._mins.popleft()
+            if self._maxs[0][0] == old_seq:
+                self._maxs.popleft()
+
+    def aggregate(self, name: str) -> float:
+        if name == "min":
+            return self._mins[0][1]
+        if name == "max":
+            return self._maxs[0][1]
+        if name == "avg":
+            return self._sum / len(self._samples)
+        # delta: change from the oldest sample still in the window
+        return self._samples[-1][2] - self._samples[0][2]
+
+
+class Sustained:
+    """Tracks how long (in seconds and consecutive frames) a condition has held."""
+
+    __slots__ = ("since", "frames")
+
+    def __init__(self):
+        self.since: float | None = None
+        self.frames = 0
+
+    def update(self, held: bool, t: float) -> None:
+        if held:
+            if self.since is None:
+                self.since = t
+            self.frames += 1
+        else:
+            self.since = None
+            self.frames = 0
+
+
+class RuleState:
+    """Temporal state of one rule: per vehicle, one window/sustained state per condition node."""
+
+    __slots__ = ("fingerprint", "_vehicles")
+
+    def __init__(self, fingerprint: str = ""):
+        self.fingerprint = fingerprint
+        # vehicle_id -> [monotonic time of the last update, {node: state}]
+        self._vehicles: dict[str, list] = {}
+
+    def node(self, vehicle_id: str, node: int, factory: Callable[[], object]):
+        """State of one temporal node of the condition for a vehicle, created on first use."""
+        now = time.monotonic()
+        entry = self._vehicles.get(vehicle_id)
+        if entry is None:
+            entry = self._vehicles[vehicle_id] = [now, {}]
+        else:
+            entry[0] = now
+        state = entry[1].get(node)
+        if state is None:
+            state = entry[1][node] = factory()
+        return state
+
+    def evict(self, before: float) -> int:
+        """Drop vehicles not updated since the monotonic time `before`; returns how many."""
+        idle = [vehicle_id for vehicle_id, entry in self._vehicles.items() if entry[0] < before]
+        for vehicle_id in idle:
+            del self._vehicles[vehicle_id]
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._vehicles)
+
+
+class TemporalStateStore:
+    """Rule states by rule id, outliving the predicates compiled from them."""
+
+    def __init__(self):
+        self._rules: dict[str, RuleState] = {}
+
+    def rule(self, rule_id: str, condition: dict) -> RuleState:
+        """State of a rule, kept across recompiles while its condition is unchanged."""
+        fingerprint = json.dumps(condition, sort_keys=True, default=str)
+        state = self._rules.get(rule_id)
+        if state is None or state.fingerprint != fingerprint:
+            state = self._rules[rule_id] = RuleState(fingerprint)
+        return state
+
+    def retain(self, rule_ids: set[str]) -> None:
+        """Forget the rules not in `rule_ids` (deleted or disabled)."""
+        for rule_id in [rule_id for rule_id in self._rules if rule_id not in rule_ids]:
+            del self._rules[rule_id]
+
+    def evict(self, idle_seconds: float) -> int:
+        """Drop the state of vehicles idle for `idle_seconds` in every rule; returns how many."""
+        before = time.monotonic() - idle_seconds
+        return sum(state.evict(before) for state in self._rules.values())
+
+
+# Singleton instance
+temporal_state = TemporalStateStore()
@@ -25,6 +25,7 @@ from backend.shared.schemas.command import (
     MAVLinkCommand,
 )
 
+from backend.services.telemetry.presence import presence_tracker
 from .models import CommandRecord
 
 logger = logging.getLogger(__name__)
@@ -157,9 +158,7 @@ async def _validate_command(data: CommandRequest) -> None:
     """Validate command preconditions."""
     # Check vehicle is online
     try:
-        redis = get_redis()
-        status = await redis.get(RedisKeys.vehicle_status(str(data.vehicle_id)))
-        if status != "online":
+        if not await presence_tracker.is_online(str(data.vehicle_id)):
             raise HTTPException(status_code=409, detail="Vehicle is offline")
     except RuntimeError:
         pass  # Redis down, skip check
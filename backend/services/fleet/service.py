@@ -7,6 +7,8 @@ from fastapi import HTTPException
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.shared.database.postgres import after_commit
+
 from backend.shared.schemas.auth import Role
 from backend.shared.schemas.vehicle import (
     FleetCreate,
@@ -23,6 +25,7 @@ from backend.shared.schemas.vehicle import (
 
 from backend.services.auth.models import User
 from .models import Fleet, FleetUserAssignment, Vehicle
+from .vehicle_index import vehicle_fleet_index
 
 
 # ── Vehicle CRUD ──
@@ -46,6 +49,8 @@ async def create_vehicle(db: AsyncSession, org_id: UUID, data: VehicleCreate) ->
     db.add(vehicle)
     await db.flush()
     await db.refresh(vehicle)
+    vehicle_id, fleet_id = vehicle.id, vehicle.fleet_id
+    after_commit(db, lambda: vehicle_fleet_index.assign(vehicle_id, org_id, fleet_id))
     return _vehicle_to_response(vehicle)
 
 
@@ -107,6 +112,7 @@ async def update_vehicle(
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     await _assert_vehicle_access(db, org_id, vehicle, user)
+    previous_fleet_id = vehicle.fleet_id
 
     for field, value in data.model_dump(exclude_unset=True).items():
         if field == "home_position" and value:
@@ -120,6 +126,9 @@ async def update_vehicle(
 
     await db.flush()
     await db.refresh(vehicle)
+    if vehicle.fleet_id != previous_fleet_id:
+        fleet_id = vehicle.fleet_id
+        after_commit(db, lambda: vehicle_fleet_index.assign(vehicle_id, org_id, fleet_id, previous_fleet_id))
     return _vehicle_to_response(vehicle)
 
 
@@ -131,7 +140,9 @@ async def delete_vehicle(db: AsyncSession, org_id: UUID, vehicle_id: UUID, *, us
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     await _assert_vehicle_access(db, org_id, vehicle, user)
+    fleet_id = vehicle.fleet_id
     await db.delete(vehicle)
+    after_commit(db, lambda: vehicle_fleet_index.remove(vehicle_id, fleet_id))
 
 
 # ── Fleet CRUD ──
@@ -189,6 +200,8 @@ async def delete_fleet(db: AsyncSession, org_id: UUID, fleet_id: UUID) -> None:
         raise HTTPException(status_code=409, detail="Fleet has assigned vehicles")
 
     await db.delete(fleet)
+    after_commit(db, lambda: vehicle_fleet_index.drop_fleet(fleet_id))
+    after_commit(db, lambda: _invalidate_ws_access(org_id, fleet_id=fleet_id))
 
 
 async def assign_users_to_fleet(
@@ -230,6 +243,8 @@ async def assign_users_to_fleet(
         assignments.append(assignment)
 
     await db.flush()
+    assigned = [a.user_id for a in assignments]
+    after_commit(db, lambda: _invalidate_ws_access(org_id, assigned))
     return [
         FleetUserAssignmentResponse(
             fleet_id=a.fleet_id,
@@ -250,6 +265,7 @@ async def remove_user_from_fleet(db: AsyncSession, org_id: UUID, fleet_id: UUID,
     if not assignment:
         raise HTTPException(status_code=404, detail="Assignment not found")
     await db.delete(assignment)
+    after_commit(db, lambda: _invalidate_ws_access(org_id, [user_id]))
 
 
 async def list_fleet_users(db: AsyncSession, org_id: UUID, fleet_id: UUID) -> list[FleetUserAssignmentResponse]:
@@ -328,6 +344,53 @@ async def ensure_vehicle_access(db: AsyncSession, org_id: UUID, vehicle_id: UUID
     await _assert_vehicle_access(db, org_id, vehicle, user)
 
 
+async def list_accessible_vehicle_ids(
+    db: AsyncSession, org_id: UUID, user: dict | None, fleet_id: UUID | None = None,
+) -> list[UUID]:
+    """Resolve every vehicle id the user may see, optionally scoped to one fleet, in a single query."""
+    allowed = await _get_allowed_fleet_ids(db, org_id, user)
+    if fleet_id:
+        fleet = (await db.execute(
+            select(Fleet.id).where(Fleet.id == fleet_id, Fleet.organization_id == org_id)
+        )).scalar_one_or_none()
+        if not fleet:
+            raise HTTPException(status_code=404, detail="Fleet not found")
+        if allowed is not None and fleet_id not in allowed:
+            raise HTTPException(status_code=403, detail="Fleet access denied")
+
+    query = select(Vehicle.id).where(Vehicle.organization_id == org_id)
+    if fleet_id:
+        query = query.where(Vehicle.fleet_id == fleet_id)
+    elif allowed is not None:
+        if not allowed:
+            return []
+        query = query.where(Vehicle.fleet_id.in_(allowed))
+    result = await db.execute(query)
+    return [row[0] for row in result.all()]
+
+
+async def list_accessible_fleet_ids(db: AsyncSession, org_id: UUID, user: dict | None) -> list[UUID]:
+    """Ids of the fleets the user may see, without building full fleet responses."""
+    allowed = await _get_allowed_fleet_ids(db, org_id, user)
+    if allowed is not None:
+        return list(allowed)
+    result = await db.execute(select(Fleet.id).where(Fleet.organization_id == org_id))
+    return [row[0] for row in result.all()]
+
+
+async def get_allowed_vehicle_ids(db: AsyncSession, org_id: UUID, user: dict | None) -> set[UUID] | None:
+    """Vehicle ids the user is restricted to, or None when the user may see the whole org."""
+    allowed = await _get_allowed_fleet_ids(db, org_id, user)
+    if allowed is None:
+        return None
+    if not allowed:
+        return set()
+    result = await db.execute(
+        select(Vehicle.id).where(Vehicle.organization_id == org_id, Vehicle.fleet_id.in_(allowed))
+    )
+    return {row[0] for row in result.all()}
+
+
 # ── Helpers ──
 
 def _vehicle_to_response(v: Vehicle) -> VehicleResponse:
@@ -362,3 +425,13 @@ async def _fleet_to_response(db: AsyncSession, f: Fleet) -> FleetResponse:
         organization_id=f.organization_id, created_at=f.created_at,
     )
 
+
+
+async def _invalidate_ws_access(org_id: UUID, user_ids: list[UUID] | None = None, fleet_id: UUID | None = None) -> None:
+    """Drop WebSocket fleet ACLs made stale by an assignment change (all users when None)."""
+    # Imported here: ws_access builds on this module
+    from backend.services.telemetry.ws_access import ws_access
+
+    ws_access.invalidate(str(org_id), None if user_ids is None else [str(uid) for uid in user_ids])
+    if fleet_id is not None:
+        ws_access.forget_fleet(str(fleet_id))
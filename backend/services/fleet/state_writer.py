@@ -0,0 +1,189 @@
+"""
+Write-behind of live vehicle state to PostgreSQL.
+The telemetry and heartbeat paths record the latest state per vehicle in
+memory; a background loop flushes it every few seconds with one bulk
+UPDATE ... FROM (VALUES ...) statement, so `vehicles` reflects live position,
+battery, mode and online status without a row update per frame. Every entry
+carries the organization the vehicle was resolved to, and the UPDATE matches
+on it as well as on the id.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, String, case, cast, column, func, literal, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+
+from backend.shared.config import get_base_settings
+from backend.shared.database.postgres import get_direct_postgres_session
+from backend.shared.schemas.telemetry import TelemetryFrame
+from backend.shared.schemas.vehicle import VehicleStatus
+
+from .models import Vehicle
+
+logger = logging.getLogger(__name__)
+
+# Statuses the live state may override; the rest are set by operators
+_LIVE_STATUSES = (VehicleStatus.OFFLINE, VehicleStatus.IDLE, VehicleStatus.ARMED)
+_MANUAL_STATUSES = (VehicleStatus.MAINTENANCE, VehicleStatus.CHARGING, VehicleStatus.ERROR)
+
+# Keeps each statement well under asyncpg's 32767 bind-parameter limit
+_FLUSH_CHUNK = 2000
+
+_COLUMNS = (
+    "lat", "lng", "alt", "battery", "gps_fix", "satellites", "mode", "armed", "last_seen", "status",
+)
+
+
+class VehicleStateWriter:
+    """Coalesces live vehicle state in memory and flushes it to Postgres in bulk."""
+
+    def __init__(self):
+        # (org_id, vehicle_id) -> latest known live fields (missing keys keep the DB value)
+        self._pending: dict[tuple[UUID, UUID], dict] = {}
+        self._task: asyncio.Task | None = None
+
+    def record_telemetry(self, org_id: str, frame: TelemetryFrame) -> None:
+        key = _parse_key(org_id, frame.vehicle_id)
+        if key is None:
+            return
+        self._pending[key] = {
+            "lat": frame.gps.lat,
+            "lng": frame.gps.lng,
+            "alt": frame.gps.alt,
+            "battery": frame.battery.remaining,
+            "gps_fix": frame.gps.fix_type,
+            "satellites": frame.gps.satellites_visible,
+            "mode": frame.system.mode,
+            "armed": frame.system.armed,
+            "last_seen": frame.timestamp,
+            "status": VehicleStatus.ARMED if frame.system.armed else VehicleStatus.IDLE,
+        }
+
+    def record_heartbeat(self, org_id: str, vehicle_id: str, seen_at: datetime | None = None) -> None:
+        key = _parse_key(org_id, vehicle_id)
+        if key is None:
+            return
+        state = self._pending.setdefault(key, {})
+        state["last_seen"] = seen_at or datetime.now(timezone.utc)
+        if state.get("status") == VehicleStatus.OFFLINE:
+            del state["status"]
+
+    def mark_offline(self, org_id: str, vehicle_id: str) -> None:
+        key = _parse_key(org_id, vehicle_id)
+        if key is None:
+            return
+        self._pending.setdefault(key, {})["status"] = VehicleStatus.OFFLINE
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final vehicle state flush failed: {e}")
+
+    async def _flush_loop(self) -> None:
+        interval = get_base_settings().VEHICLE_STATE_FLUSH_SECONDS
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Vehicle state flush failed: {e}")
+
+    async def flush(self) -> int:
+        """Write all pending vehicle state in bulk. Returns the number of vehicles flushed."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        rows = [
+            (org_id, vid, *(state.get(name) for name in _COLUMNS))
+            for (org_id, vid), state in pending.items()
+        ]
+
+        try:
+            session = await get_direct_postgres_session()
+            async with session:
+                for start in range(0, len(rows), _FLUSH_CHUNK):
+                    await session.execute(_bulk_update(rows[start:start + _FLUSH_CHUNK]))
+                await session.commit()
+        except Exception:
+            # Put the batch back unless newer state has arrived meanwhile
+            for key, state in pending.items():
+                self._pending.setdefault(key, state)
+            raise
+        return len(rows)
+
+
+def _bulk_update(rows: list[tuple]):
+    """UPDATE vehicles SET ... FROM (VALUES ...) v WHERE vehicles.id = v.id AND vehicles.organization_id = v.org_id."""
+    types = {
+        "lat": Float,
+        "lng": Float,
+        "alt": Float,
+        "battery": Float,
+        "gps_fix": Integer,
+        "satellites": Integer,
+        "mode": String(50),
+        "armed": Boolean,
+        "last_seen": DateTime(timezone=True),
+        "status": Vehicle.__table__.c.status.type,
+    }
+    v = values(
+        column("org_id", PGUUID(as_uuid=True)),
+        column("id", PGUUID(as_uuid=True)),
+        *(column(name, types[name]) for name in _COLUMNS),
+        name="v",
+    ).data(rows)
+    # A column that is NULL in every row would be typed as text by Postgres
+    live = {name: cast(v.c[name], types[name]) for name in _COLUMNS}
+
+    status = case(
+        (Vehicle.status.in_(_MANUAL_STATUSES), Vehicle.status),
+        (live["status"] == VehicleStatus.OFFLINE, live["status"]),
+        # Telemetry-derived idle/armed must not clobber mission-driven statuses
+        (Vehicle.status.in_(_LIVE_STATUSES), func.coalesce(live["status"], literal(VehicleStatus.IDLE, types["status"]))),
+        else_=Vehicle.status,
+    )
+
+    return (
+        update(Vehicle)
+        .where(Vehicle.id == v.c.id, Vehicle.organization_id == v.c.org_id)
+        .values(
+            current_lat=func.coalesce(live["lat"], Vehicle.current_lat),
+            current_lng=func.coalesce(live["lng"], Vehicle.current_lng),
+            current_alt=func.coalesce(live["alt"], Vehicle.current_alt),
+            battery=func.coalesce(live["battery"], Vehicle.battery),
+            gps_fix=func.coalesce(live["gps_fix"], Vehicle.gps_fix),
+            satellites=func.coalesce(live["satellites"], Vehicle.satellites),
+            mode=func.coalesce(live["mode"], Vehicle.mode),
+            armed=func.coalesce(live["armed"], Vehicle.armed),
+            last_seen=func.coalesce(live["last_seen"], Vehicle.last_seen),
+            status=status,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _parse_key(org_id: str, vehicle_id: str) -> tuple[UUID, UUID] | None:
+    try:
+        return UUID(org_id), UUID(vehicle_id)
+    except (ValueError, TypeError):
+        return None
+
+
+# Singleton instance
+vehicle_state_writer = VehicleStateWriter()
@@ -0,0 +1,124 @@
+"""
+Cached vehicle → (organization, fleet) index.
+The telemetry pipeline needs a vehicle's org and fleet for every frame
+(org-/fleet-scoped broadcasts, presence counters). Lookups are served from an
+in-process cache; misses fall back to the Redis scope entries, then to
+Postgres. Fleet/vehicle CRUD keeps the Redis side current (scope entries plus
+the `fleet_vehicles` sets) once its transaction has committed. Entries expire
+locally after VEHICLE_INDEX_TTL_SECONDS, which bounds staleness on other
+replicas, and in Redis after VEHICLE_SCOPE_TTL_SECONDS, after which the next
+lookup rebuilds them from Postgres.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from uuid import UUID
+
+from sqlalchemy import select
+
+from backend.shared.config import get_base_settings
+from backend.shared.database.postgres import get_direct_postgres_session
+from backend.shared.database.redis import RedisKeys, get_redis
+
+from .models import Vehicle
+
+logger = logging.getLogger(__name__)
+
+
+class VehicleFleetIndex:
+    """vehicle_id -> (org_id, fleet_id), cached locally and in Redis."""
+
+    def __init__(self):
+        # vehicle_id -> (org_id, fleet_id, expires_at); org_id None = unknown vehicle
+        self._cache: dict[str, tuple[str | None, str | None, float]] = {}
+
+    async def scope(self, vehicle_id: str) -> tuple[str | None, str | None]:
+        """Resolve a vehicle's (org_id, fleet_id); (None, None) for unknown vehicles."""
+        cached = self._cache.get(vehicle_id)
+        if cached is not None and cached[2] > time.monotonic():
+            return cached[0], cached[1]
+
+        try:
+            encoded = await get_redis().get(RedisKeys.vehicle_scope(vehicle_id))
+        except Exception as e:
+            logger.error(f"Vehicle scope lookup failed for {vehicle_id}: {e}")
+            encoded = None
+        if encoded:
+            org_id, _, fleet_id = encoded.partition(":")
+            return self._remember(vehicle_id, org_id, fleet_id or None)
+
+        return await self._load(vehicle_id)
+
+    async def assign(
+        self, vehicle_id: UUID, org_id: UUID, fleet_id: UUID | None, previous_fleet_id: UUID | None = None,
+    ) -> None:
+        """Record a vehicle's (new) fleet once its create/update has committed."""
+        await self._write(str(vehicle_id), str(org_id), str(fleet_id) if fleet_id else None,
+                          str(previous_fleet_id) if previous_fleet_id else None)
+
+    async def remove(self, vehicle_id: UUID, fleet_id: UUID | None) -> None:
+        """Forget a vehicle once its deletion has committed."""
+        vid = str(vehicle_id)
+        self._cache.pop(vid, None)
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.delete(RedisKeys.vehicle_scope(vid))
+            if fleet_id:
+                pipe.srem(RedisKeys.fleet_vehicles(str(fleet_id)), vid)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Vehicle index removal failed for {vid}: {e}")
+
+    async def drop_fleet(self, fleet_id: UUID) -> None:
+        """Delete a removed fleet's membership set."""
+        try:
+            await get_redis().delete(RedisKeys.fleet_vehicles(str(fleet_id)))
+        except Exception as e:
+            logger.error(f"Fleet index removal failed for {fleet_id}: {e}")
+
+    async def _load(self, vehicle_id: str) -> tuple[str | None, str | None]:
+        try:
+            vehicle_uuid = UUID(vehicle_id)
+        except ValueError:
+            return None, None
+        try:
+            session = await get_direct_postgres_session()
+            async with session:
+                row = (await session.execute(
+                    select(Vehicle.organization_id, Vehicle.fleet_id).where(Vehicle.id == vehicle_uuid)
+                )).one_or_none()
+        except Exception as e:
+            logger.error(f"Vehicle scope load failed for {vehicle_id}: {e}")
+            return None, None
+        if row is None:
+            # Negative entry: unregistered senders must not cost a query per frame
+            return self._remember(vehicle_id, None, None)
+        org_id, fleet_id = row
+        await self._write(vehicle_id, str(org_id), str(fleet_id) if fleet_id else None, None)
+        return str(org_id), str(fleet_id) if fleet_id else None
+
+    async def _write(self, vehicle_id: str, org_id: str, fleet_id: str | None, previous_fleet_id: str | None) -> None:
+        self._remember(vehicle_id, org_id, fleet_id)
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.set(
+                RedisKeys.vehicle_scope(vehicle_id), f"{org_id}:{fleet_id or ''}",
+                ex=get_base_settings().VEHICLE_SCOPE_TTL_SECONDS,
+            )
+            if previous_fleet_id and previous_fleet_id != fleet_id:
+                pipe.srem(RedisKeys.fleet_vehicles(previous_fleet_id), vehicle_id)
+            if fleet_id:
+                pipe.sadd(RedisKeys.fleet_vehicles(fleet_id), vehicle_id)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Vehicle index write failed for {vehicle_id}: {e}")
+
+    def _remember(self, vehicle_id: str, org_id: str | None, fleet_id: str | None) -> tuple[str | None, str | None]:
+        expires_at = time.monotonic() + get_base_settings().VEHICLE_INDEX_TTL_SECONDS
+        self._cache[vehicle_id] = (org_id, fleet_id, expires_at)
+        return org_id, fleet_id
+
+
+# Singleton instance
+vehicle_fleet_index = VehicleFleetIndex()
@@ -27,7 +27,13 @@ from backend.shared.database.mongo import init_mongo, close_mongo
 
 from backend.services.mission.mqtt_listener import start_mission_status_listener
 from backend.services.telemetry.mqtt_listener import start_telemetry_listener
+from backend.services.alert.evaluator import alert_evaluator
+from backend.services.alert.notifier import notification_dispatcher
+from backend.services.alert.sink import alert_sink
 from backend.services.auth.seed import ensure_auth_runtime_schema, ensure_owner_account
+from backend.services.fleet.state_writer import vehicle_state_writer
+from backend.services.telemetry.presence import presence_tracker
+from backend.services.telemetry.ws_broker import ws_broker
 from backend.shared.mqtt_runtime import close_mqtt
 
 from .middleware.rate_limiter import RateLimiterMiddleware
@@ -49,6 +55,12 @@ async def lifespan(app: FastAPI):
             break
     await init_redis()
     await init_mongo()
+    await vehicle_state_writer.start()
+    await notification_dispatcher.start()
+    await alert_sink.start()
+    await presence_tracker.start()
+    await ws_broker.start()
+    await alert_evaluator.start()
 
     # MQTT topic subscriptions (these return quickly after registering handlers)
     mission_task = asyncio.create_task(start_mission_status_listener())
@@ -58,6 +70,12 @@ async def lifespan(app: FastAPI):
     for task in (mission_task, telemetry_task):
         task.cancel()
     await close_mqtt()
+    await presence_tracker.stop()
+    await alert_evaluator.stop()
+    await alert_sink.stop()
+    await notification_dispatcher.stop()
+    await ws_broker.stop()
+    await vehicle_state_writer.stop()
     await close_redis()
     await close_mongo()
 
@@ -82,6 +100,7 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
     # ── Custom middleware (outermost → innermost) ──
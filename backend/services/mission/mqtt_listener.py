@@ -60,5 +60,5 @@ async def start_mission_status_listener() -> None:
         except Exception as exc:
             logger.error("Mission status update failed: %s", exc)
 
-    await mqtt.subscribe("aerocommand/+/mission/+/status", _handle)
-    await mqtt.subscribe("aerocommand/+/mission/+/progress", _handle)
+    await mqtt.subscribe("aerocommand/+/mission/+/status", _handle, shared=True)
+    await mqtt.subscribe("aerocommand/+/mission/+/progress", _handle, shared=True)
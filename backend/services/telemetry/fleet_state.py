@@ -0,0 +1,218 @@
+"""
+In-process columnar live fleet state.
+Keeps the latest position / battery / mode of every vehicle of an organization
+in NumPy arrays indexed by vehicle slot, so fleet-wide aggregates (counts by
+mode, low-battery list, viewport filter) are vectorized array operations
+instead of thousands of Redis reads per dashboard refresh.
+
+The arrays are fed by the local telemetry pipeline and periodically re-synced
+from the Redis snapshot cache, which stays the cross-replica source of truth.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from datetime import datetime
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+
+from backend.shared.config import get_base_settings
+from backend.shared.database.postgres import get_postgres_session
+from backend.shared.database.redis import RedisKeys, get_redis
+from backend.shared.schemas.telemetry import TelemetryFrame
+
+from backend.services.fleet.models import Vehicle
+
+logger = logging.getLogger(__name__)
+
+_INITIAL_CAPACITY = 64
+
+
+class _OrgFleetState:
+    """Struct-of-arrays for a single organization."""
+
+    def __init__(self):
+        self.slots: dict[str, int] = {}
+        self.vehicle_ids: list[str] = []
+        self.mode_names: list[str] = []
+        self.mode_codes: dict[str, int] = {}
+        self.synced_at = 0.0
+        self._alloc(_INITIAL_CAPACITY)
+
+    def _alloc(self, capacity: int) -> None:
+        self.lat = np.full(capacity, np.nan)
+        self.lng = np.full(capacity, np.nan)
+        self.alt = np.full(capacity, np.nan)
+        self.battery = np.full(capacity, np.nan)
+        self.mode = np.full(capacity, -1, dtype=np.int32)
+        self.armed = np.zeros(capacity, dtype=bool)
+        self.updated = np.zeros(capacity)
+
+    def _grow(self) -> None:
+        old = (self.lat, self.lng, self.alt, self.battery, self.mode, self.armed, self.updated)
+        size = len(self.lat)
+        self._alloc(size * 2)
+        for new, prev in zip(
+            (self.lat, self.lng, self.alt, self.battery, self.mode, self.armed, self.updated), old,
+        ):
+            new[:size] = prev
+
+    def _slot(self, vehicle_id: str) -> int:
+        slot = self.slots.get(vehicle_id)
+        if slot is None:
+            slot = len(self.vehicle_ids)
+            if slot >= len(self.lat):
+                self._grow()
+            self.slots[vehicle_id] = slot
+            self.vehicle_ids.append(vehicle_id)
+        return slot
+
+    def _mode_code(self, mode: str) -> int:
+        code = self.mode_codes.get(mode)
+        if code is None:
+            code = len(self.mode_names)
+            self.mode_codes[mode] = code
+            self.mode_names.append(mode)
+        return code
+
+    def upsert(
+        self, vehicle_id: str, lat: float, lng: float, alt: float,
+        battery: float, mode: str, armed: bool, ts: float,
+    ) -> None:
+        slot = self._slot(vehicle_id)
+        if ts < self.updated[slot]:
+            return
+        self.lat[slot] = lat
+        self.lng[slot] = lng
+        self.alt[slot] = alt
+        self.battery[slot] = battery
+        self.mode[slot] = self._mode_code(mode)
+        self.armed[slot] = armed
+        self.updated[slot] = ts
+
+    def mask(self, allowed: set[str] | None, online_within: float) -> np.ndarray:
+        n = len(self.vehicle_ids)
+        if allowed is None:
+            selected = np.ones(n, dtype=bool)
+        else:
+            selected = np.zeros(n, dtype=bool)
+            idx = [self.slots[v] for v in allowed if v in self.slots]
+            if idx:
+                selected[idx] = True
+        return selected & (self.updated[:n] >= time.time() - online_within)
+
+
+class LiveFleetState:
+    """Per-organization columnar store of live vehicle state."""
+
+    def __init__(self):
+        self._orgs: dict[str, _OrgFleetState] = {}
+
+    def update(self, org_id: str, frame: TelemetryFrame) -> None:
+        """Record a telemetry frame (called from the ingest pipeline)."""
+        state = self._orgs.get(org_id)
+        if state is None:
+            state = self._orgs[org_id] = _OrgFleetState()
+        state.upsert(
+            frame.vehicle_id, frame.gps.lat, frame.gps.lng, frame.gps.alt,
+            frame.battery.remaining, frame.system.mode, frame.system.armed,
+            frame.timestamp.timestamp(),
+        )
+
+    def position(self, org_id: str, vehicle_id: str) -> tuple[float, float] | None:
+        """Last known lat/lng of a vehicle seen by this replica, without resyncing."""
+        state = self._orgs.get(org_id)
+        slot = state.slots.get(vehicle_id) if state is not None else None
+        if slot is None or np.isnan(state.lat[slot]):
+            return None
+        return float(state.lat[slot]), float(state.lng[slot])
+
+    async def ensure_synced(self, org_id: str) -> _OrgFleetState:
+        """Merge in snapshots written by other replicas if the local view is stale."""
+        state = self._orgs.get(org_id)
+        if state is None:
+            state = self._orgs[org_id] = _OrgFleetState()
+        if time.monotonic() - state.synced_at < get_base_settings().FLEET_STATE_RESYNC_SECONDS:
+            return state
+        state.synced_at = time.monotonic()
+
+        try:
+            vehicle_ids: list[str] = []
+            async for db in get_postgres_session():
+                result = await db.execute(select(Vehicle.id).where(Vehicle.organization_id == UUID(org_id)))
+                vehicle_ids = [str(row[0]) for row in result.all()]
+                break
+            blobs = []
+            if vehicle_ids:
+                blobs = await get_redis().mget([RedisKeys.telemetry(vid) for vid in vehicle_ids])
+        except Exception as e:
+            logger.error(f"Fleet state resync failed for org {org_id}: {e}")
+            return state
+
+        for blob in filter(None, blobs):
+            snap = json.loads(blob)
+            state.upsert(
+                snap["vehicle_id"], snap["lat"], snap["lng"], snap["alt"],
+                snap["battery"], snap["mode"], snap["armed"],
+                datetime.fromisoformat(snap["timestamp"]).timestamp(),
+            )
+        return state
+
+    async def summary(
+        self, org_id: str, allowed: set[str] | None, low_battery: float, online_within: float,
+    ) -> dict:
+        """Online/armed counts, counts by mode and the low-battery list."""
+        state = await self.ensure_synced(org_id)
+        n = len(state.vehicle_ids)
+        selected = state.mask(allowed, online_within)
+
+        modes = state.mode[:n][selected]
+        counts = np.bincount(modes, minlength=len(state.mode_names)) if modes.size else []
+        by_mode = {state.mode_names[i]: int(c) for i, c in enumerate(counts) if c}
+
+        battery = state.battery[:n]
+        low_idx = np.flatnonzero(selected & (battery < low_battery))
+        low_idx = low_idx[np.argsort(battery[low_idx])]
+
+        return {
+            "online": int(selected.sum()),
+            "armed": int((state.armed[:n] & selected).sum()),
+            "by_mode": by_mode,
+            "battery_avg": float(battery[selected].mean()) if selected.any() else None,
+            "low_battery": [
+                {"vehicle_id": state.vehicle_ids[i], "battery": float(battery[i])} for i in low_idx
+            ],
+        }
+
+    async def within_bbox(
+        self, org_id: str, allowed: set[str] | None, online_within: float,
+        min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+    ) -> list[dict]:
+        """Live vehicles inside a lat/lng bounding box."""
+        state = await self.ensure_synced(org_id)
+        n = len(state.vehicle_ids)
+        lat, lng = state.lat[:n], state.lng[:n]
+        selected = (
+            state.mask(allowed, online_within)
+            & (lat >= min_lat) & (lat <= max_lat)
+            & (lng >= min_lng) & (lng <= max_lng)
+        )
+        return [
+            {
+                "vehicle_id": state.vehicle_ids[i],
+                "lat": float(lat[i]),
+                "lng": float(lng[i]),
+                "alt": float(state.alt[i]),
+                "battery": float(state.battery[i]),
+                "mode": state.mode_names[state.mode[i]],
+                "armed": bool(state.armed[i]),
+            }
+            for i in np.flatnonzero(selected)
+        ]
+
+
+# Singleton instance
+fleet_state = LiveFleetState()
@@ -0,0 +1,140 @@
+"""
+Redis GEO index of live vehicle positions.
+One GEO set per organization is maintained by the snapshot writer so that
+spatial questions ("what is within 2 km of this incident", "what is in this
+map viewport") are answered by GEOSEARCH instead of loading every snapshot.
+"""
+from __future__ import annotations
+
+import logging
+import math
+
+from backend.shared.database.redis import RedisKeys, get_redis
+
+from backend.services.alert.rule_engine import _haversine
+
+logger = logging.getLogger(__name__)
+
+# Redis GEO cannot index the polar caps
+_MAX_GEO_LAT = 85.05112878
+# Half the Earth's circumference – a radius that covers the whole globe
+_GLOBE_RADIUS_M = 20_037_508
+
+
+def is_indexable(lat: float, lng: float) -> bool:
+    """Whether a coordinate can be stored in a Redis GEO set."""
+    return -_MAX_GEO_LAT <= lat <= _MAX_GEO_LAT and -180.0 <= lng <= 180.0
+
+
+async def remove_vehicle_position(org_id: str, vehicle_id: str) -> None:
+    """Drop a vehicle from its organization's GEO set (e.g. when it goes offline)."""
+    try:
+        redis = get_redis()
+        await redis.zrem(RedisKeys.vehicle_positions(org_id), vehicle_id)
+    except Exception as e:
+        logger.error(f"GEO removal failed for {vehicle_id}: {e}")
+
+
+async def search_radius(
+    org_id: str, lat: float, lng: float, radius_m: float,
+    limit: int | None = None, allowed: set[str] | None = None,
+) -> list[str]:
+    """Vehicles within `radius_m` of a point, nearest first, as JSON-encoded hits."""
+    return await _search(
+        org_id, lat, lng, limit, allowed,
+        radius=radius_m,
+    )
+
+
+async def search_nearest(
+    org_id: str, lat: float, lng: float, count: int, allowed: set[str] | None = None,
+) -> list[str]:
+    """The `count` vehicles nearest to a point, as JSON-encoded hits."""
+    return await _search(
+        org_id, lat, lng, count, allowed,
+        radius=_GLOBE_RADIUS_M,
+    )
+
+
+async def search_bbox(
+    org_id: str, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+    limit: int | None = None, allowed: set[str] | None = None,
+) -> list[str]:
+    """Vehicles inside a lat/lng bounding box, as JSON-encoded hits."""
+    center_lat = (min_lat + max_lat) / 2
+    center_lng = (min_lng + max_lng) / 2
+    # GEOSEARCH BYBOX is a metric rectangle; size it from the edge nearest the
+    # equator (the widest one) and trim the corners with an exact bbox test.
+    widest_lat = 0.0 if min_lat <= 0 <= max_lat else min(abs(min_lat), abs(max_lat))
+    width_m = _haversine(widest_lat, min_lng, widest_lat, max_lng) + 1
+    height_m = _haversine(min_lat, center_lng, max_lat, center_lng) + 1
+
+    def _inside(hit_lat: float, hit_lng: float) -> bool:
+        return min_lat <= hit_lat <= max_lat and min_lng <= hit_lng <= max_lng
+
+    return await _search(
+        org_id, center_lat, center_lng, limit, allowed,
+        width=width_m, height=height_m, predicate=_inside,
+    )
+
+
+async def _search(
+    org_id: str,
+    lat: float,
+    lng: float,
+    limit: int | None,
+    allowed: set[str] | None,
+    *,
+    radius: float | None = None,
+    width: float | None = None,
+    height: float | None = None,
+    predicate=None,
+) -> list[str]:
+    """Run a GEOSEARCH, filter by access, and join each hit with its cached snapshot."""
+    redis = get_redis()
+    key = RedisKeys.vehicle_positions(org_id)
+    # With an access filter or an exact-shape predicate, COUNT would cut the
+    # result before filtering, so truncate afterwards instead.
+    count = limit if allowed is None and predicate is None else None
+    try:
+        raw = await redis.geosearch(
+            key,
+            longitude=lng,
+            latitude=lat,
+            unit="m",
+            radius=radius,
+            width=width,
+            height=height,
+            sort="ASC",
+            count=count,
+            withdist=True,
+            withcoord=True,
+        )
+    except Exception as e:
+        logger.error(f"GEOSEARCH failed for org {org_id}: {e}")
+        return []
+
+    hits: list[tuple[str, float]] = []
+    for member, dist, (hit_lng, hit_lat) in raw:
+        if allowed is not None and member not in allowed:
+            continue
+        if predicate is not None and not predicate(hit_lat, hit_lng):
+            continue
+        hits.append((member, dist))
+        if limit is not None and len(hits) >= limit:
+            break
+    if not hits:
+        return []
+
+    blobs = await redis.mget([RedisKeys.telemetry(vid) for vid, _ in hits])
+    results: list[str] = []
+    stale: list[str] = []
+    for (vid, dist), blob in zip(hits, blobs):
+        if not blob:
+            # Snapshot TTL lapsed: the vehicle is offline, prune it from the index
+            stale.append(vid)
+            continue
+        results.append(f'{{"vehicle_id":"{vid}","distance_m":{float(dist):.1f},"snapshot":{blob}}}')
+    if stale:
+        await redis.zrem(key, *stale)
+    return results
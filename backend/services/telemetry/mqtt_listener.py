@@ -44,5 +44,5 @@ async def start_telemetry_listener() -> None:
         except Exception as exc:
             logger.error("Telemetry MQTT handler failed for %s: %s", topic, exc)
 
-    await mqtt.subscribe("aerocommand/+/telemetry/+/raw", _handle)
-    await mqtt.subscribe("aerocommand/+/telemetry/+/heartbeat", _handle)
+    await mqtt.subscribe("aerocommand/+/telemetry/+/raw", _handle, shared=True)
+    await mqtt.subscribe("aerocommand/+/telemetry/+/heartbeat", _handle, shared=True)
@@ -0,0 +1,203 @@
+"""
+Vehicle presence engine.
+Heartbeats are buffered in memory and written in batches into a single Redis
+sorted set (member = vehicle_id, score = last-seen epoch). A sweeper pops every
+member older than the presence timeout with one range query, so offline
+vehicles are detected proactively in O(log n + m) and online/offline
+transitions are emitted as events:
+  - `presence` messages on the WebSocket `org:{org_id}` channel
+  - a CONNECTION alert (via the alert sink) when a vehicle drops offline
+  - per-fleet online counters maintained incrementally in Redis
+
+Both the heartbeat write and the sweep are Lua scripts: the membership check,
+the score/scope update and the fleet counter change happen atomically, so
+concurrent flushes, sweeps and replicas see each transition exactly once and
+the counters follow vehicles that move between fleets.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from uuid import UUID
+
+from backend.shared.config import get_base_settings
+from backend.shared.database.redis import RedisKeys, get_redis
+from backend.shared.schemas.alert import AlertCategory, AlertCreate, AlertSeverity
+
+from backend.services.alert.sink import alert_sink
+from backend.services.fleet.state_writer import vehicle_state_writer
+
+from .geo_index import remove_vehicle_position
+from .websocket_manager import ws_manager
+
+logger = logging.getLogger(__name__)
+
+# Vehicles per script call, so one call never holds Redis for long
+_SCRIPT_BATCH = 1000
+
+# KEYS: presence zset, scope hash, fleet online counts; ARGV: vehicle_id, seen, "org:fleet", ...
+# Returns the vehicles that were not online before this heartbeat.
+PRESENCE_FLUSH_SCRIPT = """
+local online = {}
+for i = 1, #ARGV, 3 do
+    local vid, seen, scope = ARGV[i], ARGV[i + 1], ARGV[i + 2]
+    local fleet = string.match(scope, ':(.*)$') or ''
+    local previous = redis.call('ZSCORE', KEYS[1], vid)
+    redis.call('ZADD', KEYS[1], 'GT', seen, vid)
+    local old_scope = redis.call('HGET', KEYS[2], vid)
+    redis.call('HSET', KEYS[2], vid, scope)
+    if not previous then
+        if fleet ~= '' then redis.call('HINCRBY', KEYS[3], fleet, 1) end
+        table.insert(online, vid)
+    elseif old_scope ~= scope then
+        local old_fleet = old_scope and string.match(old_scope, ':(.*)$') or ''
+        if old_fleet ~= fleet then
+            if old_fleet ~= '' then redis.call('HINCRBY', KEYS[3], old_fleet, -1) end
+            if fleet ~= '' then redis.call('HINCRBY', KEYS[3], fleet, 1) end
+        end
+    end
+end
+return online
+"""
+
+# KEYS: presence zset, scope hash, fleet online counts; ARGV: cutoff epoch, max vehicles
+# Pops expired vehicles and returns vehicle_id, last seen, "org:fleet" triples.
+PRESENCE_SWEEP_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[2])
+local gone = {}
+for i = 1, #expired, 2 do
+    local vid = expired[i]
+    redis.call('ZREM', KEYS[1], vid)
+    local scope = redis.call('HGET', KEYS[2], vid) or ':'
+    local fleet = string.match(scope, ':(.*)$') or ''
+    if fleet ~= '' then redis.call('HINCRBY', KEYS[3], fleet, -1) end
+    table.insert(gone, vid)
+    table.insert(gone, expired[i + 1])
+    table.insert(gone, scope)
+end
+return gone
+"""
+
+
+class PresenceTracker:
+    """Batches heartbeats into a Redis sorted set and detects online/offline transitions."""
+
+    def __init__(self):
+        # vehicle_id -> (last seen epoch, org_id, fleet_id)
+        self._pending: dict[str, tuple[float, str | None, str | None]] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def record(self, vehicle_id: str, org_id: str | None, fleet_id: str | None) -> None:
+        """Buffer a heartbeat; it is written with the next batch."""
+        self._pending[vehicle_id] = (time.time(), org_id, fleet_id)
+
+    async def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._run_every(get_base_settings().PRESENCE_FLUSH_SECONDS, self.flush)),
+                asyncio.create_task(self._run_every(get_base_settings().PRESENCE_SWEEP_SECONDS, self.sweep)),
+            ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def _run_every(self, interval: float, fn) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await fn()
+            except Exception as e:
+                logger.error(f"Presence {fn.__name__} failed: {e}")
+
+    async def flush(self) -> None:
+        """Write buffered heartbeats and emit online transitions."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        keys = (RedisKeys.presence(), RedisKeys.presence_scope(), RedisKeys.fleet_online_counts())
+        items = list(batch.items())
+        came_online: list[str] = []
+        for start in range(0, len(items), _SCRIPT_BATCH):
+            args = []
+            for vid, (seen, org_id, fleet_id) in items[start:start + _SCRIPT_BATCH]:
+                args += [vid, seen, f"{org_id or ''}:{fleet_id or ''}"]
+            came_online += await get_redis().eval(PRESENCE_FLUSH_SCRIPT, len(keys), *keys, *args)
+
+        if came_online:
+            await self._emit_transitions(
+                "online", [(vid, batch[vid][0], batch[vid][1], batch[vid][2]) for vid in came_online],
+            )
+
+    async def sweep(self) -> None:
+        """Atomically pop every vehicle whose last heartbeat is older than the timeout."""
+        cutoff = time.time() - get_base_settings().PRESENCE_TIMEOUT_SECONDS
+        keys = (RedisKeys.presence(), RedisKeys.presence_scope(), RedisKeys.fleet_online_counts())
+        while True:
+            # The pop is atomic, so only one replica emits each offline event
+            popped = await get_redis().eval(PRESENCE_SWEEP_SCRIPT, len(keys), *keys, cutoff, _SCRIPT_BATCH)
+            gone = []
+            for i in range(0, len(popped), 3):
+                org_id, _, fleet_id = popped[i + 2].partition(":")
+                gone.append((popped[i], float(popped[i + 1]), org_id or None, fleet_id or None))
+            if gone:
+                await self._emit_transitions("offline", gone)
+            if len(gone) < _SCRIPT_BATCH:
+                return
+
+    async def _emit_transitions(
+        self, status: str, vehicles: list[tuple[str, float, str | None, str | None]],
+    ) -> None:
+        """Publish transitions; the fleet counters were already moved by the scripts."""
+        for vehicle_id, last_seen, org_id, _ in vehicles:
+            seen_at = datetime.fromtimestamp(last_seen, timezone.utc)
+            logger.info(f"Vehicle {vehicle_id} is {status}")
+            if status == "offline" and org_id:
+                vehicle_state_writer.mark_offline(org_id, vehicle_id)
+            if not org_id:
+                continue
+            if status == "offline":
+                await remove_vehicle_position(org_id, vehicle_id)
+                await _raise_offline_alert(org_id, vehicle_id, seen_at)
+            await ws_manager.publish(org_id, [f"org:{org_id}"], {
+                "type": "presence",
+                "vehicle_id": vehicle_id,
+                "status": status,
+                "last_seen": seen_at.isoformat(),
+            })
+
+    async def is_online(self, vehicle_id: str) -> bool:
+        score = await get_redis().zscore(RedisKeys.presence(), vehicle_id)
+        return score is not None and score >= time.time() - get_base_settings().PRESENCE_TIMEOUT_SECONDS
+
+    async def fleet_online_counts(self, fleet_ids: list[str]) -> dict[str, int]:
+        if not fleet_ids:
+            return {}
+        counts = await get_redis().hmget(RedisKeys.fleet_online_counts(), fleet_ids)
+        return {fid: max(int(c or 0), 0) for fid, c in zip(fleet_ids, counts)}
+
+
+async def _raise_offline_alert(org_id: str, vehicle_id: str, last_seen: datetime) -> None:
+    try:
+        await alert_sink.submit(org_id, AlertCreate(
+            vehicle_id=UUID(vehicle_id),
+            severity=AlertSeverity.WARNING,
+            category=AlertCategory.CONNECTION,
+            title="Vehicle offline",
+            message=f"No heartbeat from vehicle {vehicle_id} since {last_seen.isoformat()}",
+            metadata={"last_seen": last_seen.isoformat()},
+        ))
+    except Exception as e:
+        logger.error(f"Offline alert failed for {vehicle_id}: {e}")
+
+
+# Singleton instance
+presence_tracker = PresenceTracker()
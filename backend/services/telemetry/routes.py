@@ -4,20 +4,36 @@ from __future__ import annotations
 from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, Query, Response, WebSocket, WebSocketDisconnect
 
 from backend.services.auth.dependencies import CurrentUser, OrgId
+from backend.services.auth.security import decode_token
 from backend.shared.database.postgres import get_postgres_session
-from backend.services.fleet.service import ensure_vehicle_access
+from backend.shared.database.redis import RedisKeys, get_redis
+from backend.services.fleet.service import (
+    ensure_vehicle_access,
+    get_allowed_vehicle_ids,
+    list_accessible_fleet_ids,
+    list_accessible_vehicle_ids,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.shared.schemas.telemetry import TelemetryHistoryResponse
 
-from .service import get_latest_snapshot, get_telemetry_history
-from .websocket_manager import ws_manager
+from .fleet_state import fleet_state
+from .geo_index import search_bbox, search_nearest, search_radius
+from .presence import presence_tracker
+from .service import get_latest_snapshot, get_latest_snapshots, get_telemetry_history
+from .websocket_manager import SUBPROTOCOL_MSGPACK, ws_manager
 
 router = APIRouter()
 
 
+def _snapshot_list_response(blobs: list[str]) -> Response:
+    """Splice pre-encoded snapshot blobs into a JSON response without re-encoding them."""
+    body = f'{{"items":[{",".join(blobs)}],"total":{len(blobs)}}}'
+    return Response(content=body, media_type="application/json")
+
+
 @router.get("/vehicles/{vehicle_id}/latest")
 async def api_latest_telemetry(
     vehicle_id: UUID,
@@ -31,7 +47,142 @@ async def api_latest_telemetry(
     if not data:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="No telemetry data available")
-    return data
+    return Response(content=data, media_type="application/json")
+
+
+@router.get("/fleets/{fleet_id}/latest")
+async def api_fleet_latest_telemetry(
+    fleet_id: UUID,
+    org_id: OrgId,
+    user: CurrentUser,
+    db: AsyncSession = Depends(get_postgres_session),
+):
+    """Get the latest cached snapshot of every vehicle in a fleet."""
+    vehicle_ids = await list_accessible_vehicle_ids(db, org_id, user, fleet_id=fleet_id)
+    blobs = await get_latest_snapshots([str(v) for v in vehicle_ids])
+    return _snapshot_list_response(blobs)
+
+
+@router.get("/latest")
+async def api_org_latest_telemetry(
+    org_id: OrgId,
+    user: CurrentUser,
+    db: AsyncSession = Depends(get_postgres_session),
+):
+    """Get the latest cached snapshot of every vehicle the caller can access in the organization."""
+    vehicle_ids = await list_accessible_vehicle_ids(db, org_id, user)
+    blobs = await get_latest_snapshots([str(v) for v in vehicle_ids])
+    return _snapshot_list_response(blobs)
+
+
+async def _allowed_vehicle_strs(db: AsyncSession, org_id: UUID, user: dict) -> set[str] | None:
+    allowed = await get_allowed_vehicle_ids(db, org_id, user)
+    return None if allowed is None else {str(v) for v in allowed}
+
+
+@router.get("/geo/radius")
+async def api_geo_radius(
+    org_id: OrgId,
+    user: CurrentUser,
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(..., gt=0, le=500_000),
+    limit: int = Query(200, ge=1, le=5000),
+    db: AsyncSession = Depends(get_postgres_session),
+):
+    """Live vehicles within a radius of a point, nearest first."""
+    allowed = await _allowed_vehicle_strs(db, org_id, user)
+    hits = await search_radius(str(org_id), lat, lng, radius_m, limit, allowed)
+    return _snapshot_list_response(hits)
+
+
+@router.get("/geo/bbox")
+async def api_geo_bbox(
+    org_id: OrgId,
+    user: CurrentUser,
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: AsyncSession = Depends(get_postgres_session),
+):
+    """Live vehicles inside a map viewport."""
+    if min_lat > max_lat or min_lng > max_lng:
+        from fastapi import HTTPException
+        raise HTTPException(status_code=422, detail="Invalid bounding box")
+    allowed = await _allowed_vehicle_strs(db, org_id, user)
+    hits = await search_bbox(str(org_id), min_lat, min_lng, max_lat, max_lng, limit, allowed)
+    return _snapshot_list_response(hits)
+
+
+@router.get("/geo/nearest")
+async def api_geo_nearest(
+    org_id: OrgId,
+    user: CurrentUser,
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    count: int = Query(10, ge=1, le=500),
+    db: AsyncSession = Depends(get_postgres_session),
+):
+    """The N live vehicles nearest to a point."""
+    allowed = await _allowed_vehicle_strs(db, org_id, user)
+    hits = await search_nearest(str(org_id), lat, lng, count, allowed)
+    return _snapshot_list_response(hits)
+
+
+async def _fleet_state_scope(
+    db: AsyncSession, org_id: UUID, user: dict, fleet_id: UUID | None,
+) -> set[str] | None:
+    if fleet_id:
+        return {str(v) for v in await list_accessible_vehicle_ids(db, org_id, user, fleet_id=fleet_id)}
+    return await _allowed_vehicle_strs(db, org_id, user)
+
+
+@router.get("/fleet-state/summary")
+async def api_fleet_state_summary(
+    org_id: OrgId,
+    user: CurrentUser,
+    fleet_id: UUID | None = None,
+    low_battery: float = Query(20.0, ge=0, le=100),
+    online_within: float = Query(30.0, gt=0, le=3600),
+    db: AsyncSession = Depends(get_postgres_session),
+):
+    """Live aggregates over the in-memory fleet state: counts by mode, armed, low battery."""
+    allowed = await _fleet_state_scope(db, org_id, user, fleet_id)
+    return await fleet_state.summary(str(org_id), allowed, low_battery, online_within)
+
+
+@router.get("/fleet-state/bbox")
+async def api_fleet_state_bbox(
+    org_id: OrgId,
+    user: CurrentUser,
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    fleet_id: UUID | None = None,
+    online_within: float = Query(30.0, gt=0, le=3600),
+    db: AsyncSession = Depends(get_postgres_session),
+):
+    """Live vehicles inside a bounding box, filtered from the in-memory fleet state."""
+    allowed = await _fleet_state_scope(db, org_id, user, fleet_id)
+    items = await fleet_state.within_bbox(
+        str(org_id), allowed, online_within, min_lat, min_lng, max_lat, max_lng,
+    )
+    return {"items": items, "total": len(items)}
+
+
+@router.get("/presence/fleets")
+async def api_fleet_presence(
+    org_id: OrgId,
+    user: CurrentUser,
+    db: AsyncSession = Depends(get_postgres_session),
+):
+    """Online vehicle count per accessible fleet, from the presence engine's counters."""
+    fleet_ids = await list_accessible_fleet_ids(db, org_id, user)
+    counts = await presence_tracker.fleet_online_counts([str(f) for f in fleet_ids])
+    return {"items": [{"fleet_id": fid, "online": n} for fid, n in counts.items()]}
 
 
 @router.get("/vehicles/{vehicle_id}/history", response_model=TelemetryHistoryResponse)
@@ -57,13 +208,78 @@ async def api_telemetry_history(
     )
 
 
+async def _authenticate_ws(ws: WebSocket) -> dict | None:
+    """User context from the `token` query param (the JWT middleware does not see WS upgrades)."""
+    token = ws.query_params.get("token")
+    if not token:
+        return None
+    try:
+        payload = decode_token(token)
+    except Exception:
+        return None
+    jti = payload.get("jti")
+    if jti:
+        try:
+            if await get_redis().exists(RedisKeys.token_blacklist(jti)):
+                return None
+        except RuntimeError:
+            pass  # Redis unavailable – degrade gracefully, like the HTTP middleware
+    if not payload.get("sub"):
+        return None
+    return {"user_id": payload["sub"], "role": payload.get("role"), "org_id": payload.get("org_id")}
+
+
+def _apply_max_hz(ws: WebSocket, value) -> None:
+    try:
+        ws_manager.set_max_hz(ws, float(value))
+    except (TypeError, ValueError):
+        ws_manager.reject(ws, "max_hz", "max_hz must be a non-negative number")
+
+
+async def _apply_viewport(ws: WebSocket, org_id: str | None, bbox) -> None:
+    try:
+        await ws_manager.set_viewport(ws, org_id, bbox)
+    except ValueError as e:
+        ws_manager.reject(ws, "viewport", str(e))
+
+
 @router.websocket("/ws")
 async def telemetry_websocket(ws: WebSocket):
     """
     WebSocket endpoint for real-time telemetry streaming.
 
     Connect with query params:
-        ?channels=vehicle:abc123,org:myorg,alerts:myorg
+        ?token=<access token>&channels=vehicle:abc123,org:myorg,alerts:myorg&max_hz=5
+
+    Channels are checked against the user's organization and fleet assignments;
+    the first message is {"type": "subscribed", "channels": [...], "rejected": {channel: reason}},
+    and every subscribe message is acknowledged the same way.
+
+    `max_hz` (also accepted in a subscribe message) caps telemetry per vehicle:
+    only the latest frame of each vehicle is sent, at most max_hz times a second.
+
+    `delta=true` opts into keyframe + delta telemetry:
+        {"type": "telemetry", "vehicle_id": "...", "seq": 1, "keyframe": true, "data": {...}}
+        {"type": "telemetry_delta", "vehicle_id": "...", "seq": 2, "data": {changed fields}}
+    On a sequence gap the client sends {"action": "resync", "vehicle_ids": [...]}
+    (omit vehicle_ids for all) and receives keyframes next.
+
+    Map views can receive only the telemetry inside their viewport, updated on pan/zoom:
+        {"action": "viewport", "bbox": [min_lat, min_lng, max_lat, max_lng], "org_id": "..."}
+    (org_id defaults to the token's organization; "bbox": null removes it).
+    The initial viewport may also be given as ?bbox=min_lat,min_lng,max_lat,max_lng.
+
+    Every message carries a `cursor`. After a reconnect, pass the last one seen as
+    ?resume_from=<cursor> to receive the messages missed in between (kept for
+    a short window per channel), followed by
+        {"type": "resume", "status": "ok" | "gap", "cursor": "..."}
+    where "gap" means some messages were not buffered and REST history is needed.
+
+    Offer the `aero.msgpack` subprotocol to receive MessagePack binary frames
+    instead of JSON text; client control messages stay JSON text.
+
+    An invalid max_hz, viewport or message is answered with
+        {"type": "max_hz" | "viewport" | "message", "status": "rejected", "reason": "..."}
 
     Messages sent to client:
         {"type": "telemetry", "vehicle_id": "...", "data": {...}}
@@ -72,11 +288,28 @@ async def telemetry_websocket(ws: WebSocket):
     channels_param = ws.query_params.get("channels", "")
     channels = [c.strip() for c in channels_param.split(",") if c.strip()]
 
-    if not channels:
+    viewport = ws.query_params.get("bbox")
+
+    if not channels and not viewport:
         await ws.close(code=4000, reason="No channels specified")
         return
 
-    await ws_manager.connect(ws, channels)
+    user = await _authenticate_ws(ws)
+    if user is None:
+        await ws.close(code=4001, reason="Unauthorized")
+        return
+
+    subprotocol = SUBPROTOCOL_MSGPACK if SUBPROTOCOL_MSGPACK in ws.scope.get("subprotocols", []) else None
+    await ws_manager.connect(
+        ws, channels, subprotocol, user,
+        delta=ws.query_params.get("delta", "").lower() in ("1", "true"),
+        resume_from=ws.query_params.get("resume_from"),
+    )
+    if viewport:
+        await _apply_viewport(ws, None, viewport.split(","))
+    max_hz = ws.query_params.get("max_hz")
+    if max_hz:
+        _apply_max_hz(ws, max_hz)
 
     try:
         while True:
@@ -85,18 +318,28 @@ async def telemetry_websocket(ws: WebSocket):
             # Client can send subscription changes
             try:
                 import json
-                msg = json.loads(data)
+                try:
+                    msg = json.loads(data)
+                except ValueError:
+                    msg = None
+                if not isinstance(msg, dict):
+                    ws_manager.reject(ws, "message", "Expected a JSON object")
+                    continue
                 if msg.get("action") == "subscribe":
-                    new_channels = msg.get("channels", [])
-                    for ch in new_channels:
-                        ws_manager._subscriptions[ch].add(ws)
-                        ws_manager._ws_channels[ws].add(ch)
+                    if await ws_manager.subscribe(ws, msg.get("channels", [])):
+                        # Newly subscribed vehicles start from a keyframe
+                        ws_manager.resync(ws)
+                    if msg.get("max_hz") is not None:
+                        _apply_max_hz(ws, msg["max_hz"])
+                elif msg.get("action") == "viewport":
+                    await _apply_viewport(ws, msg.get("org_id"), msg.get("bbox"))
+                elif msg.get("action") == "resync":
+                    ws_manager.resync(ws, msg.get("vehicle_ids"))
                 elif msg.get("action") == "unsubscribe":
-                    for ch in msg.get("channels", []):
-                        ws_manager._subscriptions[ch].discard(ws)
-                        ws_manager._ws_channels[ws].discard(ch)
+                    await ws_manager.unsubscribe(ws, msg.get("channels", []))
             except Exception:
                 pass
     except WebSocketDisconnect:
+        pass
+    finally:
         await ws_manager.disconnect(ws)
-
@@ -4,52 +4,28 @@ Receives raw telemetry from MQTT, processes it, and distributes to:
   1. MongoDB – time-series persistence
   2. Redis – latest snapshot cache
   3. WebSocket – real-time dashboard push
+  4. Alert evaluation – queued, checked against cached rules off the ingest path
 """
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timezone
-from uuid import UUID
+from datetime import datetime
 
 from backend.shared.database.mongo import get_mongo_db
 from backend.shared.database.redis import RedisKeys, get_redis
-from backend.shared.database.postgres import get_postgres_session
 from backend.shared.schemas.telemetry import TelemetryFrame, TelemetrySnapshot
 
-from backend.services.fleet.models import Vehicle
-from sqlalchemy import select
+from backend.services.alert.evaluator import alert_evaluator
+from backend.services.fleet.state_writer import vehicle_state_writer
+from backend.services.fleet.vehicle_index import vehicle_fleet_index
 
+from .fleet_state import fleet_state
+from .geo_index import is_indexable
+from .presence import presence_tracker
 from .websocket_manager import ws_manager
 
 logger = logging.getLogger(__name__)
 
-_vehicle_org_cache: dict[str, str] = {}
-
-
-async def _get_vehicle_org_id(vehicle_id: str) -> str | None:
-    """Resolve a vehicle's org_id for org-scoped WebSocket broadcasts."""
-    cached = _vehicle_org_cache.get(vehicle_id)
-    if cached:
-        return cached
-
-    try:
-        vehicle_uuid = UUID(vehicle_id)
-    except Exception:
-        return None
-
-    try:
-        async for db in get_postgres_session():
-            result = await db.execute(select(Vehicle.organization_id).where(Vehicle.id == vehicle_uuid))
-            org_id = result.scalar_one_or_none()
-            if org_id:
-                _vehicle_org_cache[vehicle_id] = str(org_id)
-                return _vehicle_org_cache[vehicle_id]
-            break
-    except Exception:
-        return None
-    return None
-
-
 async def process_telemetry(vehicle_id: str, payload: dict) -> None:
     """
     Main telemetry processing pipeline.
@@ -60,13 +36,23 @@ async def process_telemetry(vehicle_id: str, payload: dict) -> None:
     except Exception as e:
         logger.warning(f"Invalid telemetry frame from {vehicle_id}: {e}")
         return
+    # Scope and access come from the topic; a payload naming another vehicle would write to it
+    if frame.vehicle_id != vehicle_id:
+        logger.warning(f"Telemetry on the topic of {vehicle_id} names vehicle {frame.vehicle_id}, dropped")
+        return
+
+    org_id, fleet_id = await vehicle_fleet_index.scope(vehicle_id)
+    if org_id:
+        fleet_state.update(org_id, frame)
+        alert_evaluator.submit(org_id, frame)
+        vehicle_state_writer.record_telemetry(org_id, frame)
 
     # Pipeline stages run concurrently
     import asyncio
     await asyncio.gather(
         _store_in_mongodb(frame),
-        _cache_in_redis(frame),
-        _broadcast_via_websocket(vehicle_id, frame),
+        _cache_in_redis(frame, org_id),
+        _broadcast_via_websocket(vehicle_id, org_id, fleet_id, frame),
         return_exceptions=True,
     )
 
@@ -83,8 +69,8 @@ async def _store_in_mongodb(frame: TelemetryFrame) -> None:
         logger.error(f"MongoDB write failed for {frame.vehicle_id}: {e}")
 
 
-async def _cache_in_redis(frame: TelemetryFrame) -> None:
-    """Cache latest telemetry snapshot in Redis for fast lookups."""
+async def _cache_in_redis(frame: TelemetryFrame, org_id: str | None) -> None:
+    """Cache latest telemetry snapshot in Redis and index the position in the org GEO set."""
     try:
         redis = get_redis()
         snapshot = TelemetrySnapshot(
@@ -101,41 +87,40 @@ async def _cache_in_redis(frame: TelemetryFrame) -> None:
             satellites=frame.gps.satellites_visible,
             gps_fix=frame.gps.fix_type,
         )
-        await redis.hset(
+        pipe = redis.pipeline(transaction=False)
+        # Stored pre-encoded so readers can splice the blob straight into a response
+        pipe.set(
             RedisKeys.telemetry(frame.vehicle_id),
-            mapping={k: str(v) for k, v in snapshot.model_dump().items()},
+            snapshot.model_dump_json(),
+            ex=300,  # 5-min TTL
         )
-        await redis.expire(RedisKeys.telemetry(frame.vehicle_id), 300)  # 5-min TTL
+        if org_id and frame.gps.fix_type >= 2 and is_indexable(frame.gps.lat, frame.gps.lng):
+            pipe.geoadd(
+                RedisKeys.vehicle_positions(org_id),
+                (frame.gps.lng, frame.gps.lat, frame.vehicle_id),
+            )
+        await pipe.execute()
     except Exception as e:
         logger.error(f"Redis cache failed for {frame.vehicle_id}: {e}")
 
 
-async def _broadcast_via_websocket(vehicle_id: str, frame: TelemetryFrame) -> None:
+async def _broadcast_via_websocket(
+    vehicle_id: str, org_id: str | None, fleet_id: str | None, frame: TelemetryFrame,
+) -> None:
     """Push telemetry to connected dashboard WebSocket clients."""
     try:
         data = frame.model_dump(mode="json")
-        org_id = await _get_vehicle_org_id(vehicle_id)
-        await ws_manager.broadcast_telemetry(vehicle_id, org_id or "default", data)
+        await ws_manager.broadcast_telemetry(vehicle_id, org_id or "default", data, fleet_id)
     except Exception as e:
         logger.error(f"WebSocket broadcast failed for {vehicle_id}: {e}")
 
 
 async def process_heartbeat(vehicle_id: str, payload: dict) -> None:
     """Process heartbeat message – update vehicle online status."""
-    try:
-        redis = get_redis()
-        await redis.setex(
-            RedisKeys.heartbeat(vehicle_id),
-            30,  # 30-second TTL – if heartbeat stops, key expires
-            datetime.now(timezone.utc).isoformat(),
-        )
-        await redis.setex(
-            RedisKeys.vehicle_status(vehicle_id),
-            60,
-            "online",
-        )
-    except Exception as e:
-        logger.error(f"Heartbeat processing failed for {vehicle_id}: {e}")
+    org_id, fleet_id = await vehicle_fleet_index.scope(vehicle_id)
+    if org_id:
+        vehicle_state_writer.record_heartbeat(org_id, vehicle_id)
+    presence_tracker.record(vehicle_id, org_id, fleet_id)
 
 
 async def get_telemetry_history(
@@ -158,12 +143,27 @@ async def get_telemetry_history(
         return []
 
 
-async def get_latest_snapshot(vehicle_id: str) -> dict | None:
-    """Get latest telemetry snapshot from Redis."""
+async def get_latest_snapshot(vehicle_id: str) -> str | None:
+    """Get latest telemetry snapshot from Redis as a JSON-encoded string."""
     try:
         redis = get_redis()
-        data = await redis.hgetall(RedisKeys.telemetry(vehicle_id))
-        return data if data else None
+        return await redis.get(RedisKeys.telemetry(vehicle_id))
     except Exception:
         return None
 
+
+async def get_latest_snapshots(vehicle_ids: list[str]) -> list[str]:
+    """Fetch the JSON-encoded snapshots of many vehicles in one Redis round trip.
+
+    Vehicles without a cached snapshot (offline for longer than the TTL) are skipped.
+    """
+    if not vehicle_ids:
+        return []
+    try:
+        redis = get_redis()
+        blobs = await redis.mget([RedisKeys.telemetry(vid) for vid in vehicle_ids])
+    except Exception as e:
+        logger.error(f"Bulk snapshot fetch failed: {e}")
+        return []
+    return [b for b in blobs if b]
+
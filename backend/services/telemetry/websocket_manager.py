@@ -1,18 +1,372 @@
 """
 WebSocket connection manager for real-time telemetry streaming.
 Manages per-vehicle and fleet-wide subscriptions from dashboard clients.
+
+Every connection owns a bounded outbound queue drained by its own writer
+task, so broadcasting is a non-blocking enqueue and a slow dashboard only
+delays itself. Keyed messages (latest telemetry per vehicle) are conflated
+in place; when the queue is full the oldest message is dropped, and a
+connection that keeps dropping is disconnected as a slow consumer.
+
+Clients may declare a `max_hz` telemetry rate: keyed messages are then held
+as latest-per-vehicle and flushed at most `max_hz` times per second, while
+unkeyed messages (alerts, missions, presence) are still sent immediately.
+
+Delta mode (opt-in per connection) replaces telemetry messages with a full
+keyframe on first send and every WS_DELTA_KEYFRAME_SECONDS, and field-level
+deltas against the last frame sent to that connection in between. Deltas are
+computed by the writer at send time, so conflated or dropped frames never
+break the chain; per-vehicle sequence numbers let clients detect a gap and
+request a resync.
+
+Clients that negotiate the `aero.msgpack` subprotocol (Sec-WebSocket-Protocol)
+receive the same messages as MessagePack binary frames; JSON text stays the
+default. Each payload is encoded at most once per encoding, and both are
+compressed by permessage-deflate when the client offers it.
+
+Map clients can register a viewport (lat/lng bounding box) per organization;
+telemetry is matched against those through a uniform grid index, so a
+zoomed-in map only receives the vehicles it can show.
+
+Every broadcast carries a `cursor` ("{epoch}:{seq}", seq increasing per
+process) and is kept in a short per-channel replay ring while the channel has
+(or recently had) subscribers. A client reconnecting with `resume_from` set to
+the last cursor it saw gets the missed messages first, then a `resume` status
+message, then live data.
+
+`publish` also hands each message to the attached cross-replica broker
+(see ws_broker), which tracks the organizations this replica's clients need.
 """
 from __future__ import annotations
 
 import asyncio
 import json
 import logging
-from collections import defaultdict
+import math
+import time
+import uuid
+from collections import defaultdict, deque
 
+import msgpack
 from fastapi import WebSocket
 
+from backend.shared.config import get_base_settings
+
+from .ws_access import ws_access
+
 logger = logging.getLogger(__name__)
 
+# Close code sent to clients that cannot keep up
+SLOW_CONSUMER_CLOSE_CODE = 4008
+
+# Longest channel name accepted from a client
+_MAX_CHANNEL_LENGTH = 128
+
+# Binary subprotocol; connections without it get JSON text frames
+SUBPROTOCOL_MSGPACK = "aero.msgpack"
+
+
+def _encode_json(data: dict) -> str:
+    return json.dumps(data, separators=(",", ":"))
+
+
+_ENCODERS = {
+    None: _encode_json,
+    SUBPROTOCOL_MSGPACK: msgpack.packb,
+}
+
+
+def _diff(prev: dict, data: dict) -> dict:
+    """Changed leaves of `data` relative to `prev`; removed keys map to None."""
+    changes = {}
+    for name, value in data.items():
+        old = prev.get(name)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = _diff(old, value)
+            if nested:
+                changes[name] = nested
+        elif name not in prev or old != value:
+            changes[name] = value
+    for name in prev.keys() - data.keys():
+        changes[name] = None
+    return changes
+
+
+class _DeltaEncoder:
+    """Per-connection telemetry delta state: last frame sent and sequence per vehicle."""
+
+    def __init__(self, keyframe_interval: float):
+        self.keyframe_interval = keyframe_interval
+        self._last: dict[str, dict] = {}
+        self._seq: dict[str, int] = {}
+        self._keyframe_due: dict[str, float] = {}
+
+    def encode(self, message: dict, now: float) -> dict:
+        vehicle_id = message["vehicle_id"]
+        data = message["data"]
+        seq = self._seq.get(vehicle_id, 0) + 1
+        prev = self._last.get(vehicle_id)
+        if prev is None or now >= self._keyframe_due[vehicle_id]:
+            out = {**message, "seq": seq, "keyframe": True}
+            self._keyframe_due[vehicle_id] = now + self.keyframe_interval
+        else:
+            out = {"type": "telemetry_delta", "vehicle_id": vehicle_id, "seq": seq, "data": _diff(prev, data)}
+            if "cursor" in message:
+                out["cursor"] = message["cursor"]
+        self._last[vehicle_id] = data
+        self._seq[vehicle_id] = seq
+        return out
+
+    def resync(self, vehicle_ids: list[str] | None = None) -> None:
+        """Force a keyframe on the next send (for the given vehicles, or all)."""
+        if vehicle_ids is None:
+            self._last.clear()
+        else:
+            for vehicle_id in vehicle_ids:
+                self._last.pop(vehicle_id, None)
+
+
+class _GeoSubscriptionIndex:
+    """Viewport subscriptions per organization, bucketed into a uniform lat/lng grid.
+
+    A point only checks the sockets registered in its own cell plus the few
+    viewports too large to bucket (whole-continent zoom levels).
+    """
+
+    def __init__(self, cell_degrees: float, max_cells: int):
+        self.cell_degrees = cell_degrees
+        self.max_cells = max_cells
+        # org_id -> cell -> sockets whose viewport overlaps the cell
+        self._cells: dict[str, dict[tuple[int, int], set[WebSocket]]] = {}
+        # org_id -> sockets whose viewport spans more than max_cells
+        self._wide: dict[str, set[WebSocket]] = {}
+        # ws -> org_id -> (min_lat, min_lng, max_lat, max_lng)
+        self._viewports: dict[WebSocket, dict[str, tuple[float, float, float, float]]] = {}
+
+    def set(self, ws: WebSocket, org_id: str, bbox: tuple[float, float, float, float] | None) -> None:
+        self._remove(ws, org_id)
+        if bbox is None:
+            return
+        self._viewports.setdefault(ws, {})[org_id] = bbox
+        cells = self._cells_of(bbox)
+        if cells is None:
+            self._wide.setdefault(org_id, set()).add(ws)
+            return
+        org_cells = self._cells.setdefault(org_id, {})
+        for cell in cells:
+            org_cells.setdefault(cell, set()).add(ws)
+
+    def remove_socket(self, ws: WebSocket) -> None:
+        for org_id in list(self._viewports.get(ws, ())):
+            self._remove(ws, org_id)
+
+    def orgs(self, ws: WebSocket) -> set[str]:
+        return set(self._viewports.get(ws, ()))
+
+    def match(self, org_id: str, lat: float, lng: float) -> set[WebSocket]:
+        """Sockets whose viewport for `org_id` contains the point."""
+        candidates = set(self._wide.get(org_id, ()))
+        org_cells = self._cells.get(org_id)
+        if org_cells:
+            candidates.update(org_cells.get(self._cell(lat, lng), ()))
+        return {ws for ws in candidates if _bbox_contains(self._viewports[ws][org_id], lat, lng)}
+
+    def _remove(self, ws: WebSocket, org_id: str) -> None:
+        viewports = self._viewports.get(ws)
+        bbox = viewports.pop(org_id, None) if viewports else None
+        if bbox is None:
+            return
+        if not viewports:
+            del self._viewports[ws]
+        cells = self._cells_of(bbox)
+        if cells is None:
+            wide = self._wide[org_id]
+            wide.discard(ws)
+            if not wide:
+                del self._wide[org_id]
+            return
+        org_cells = self._cells[org_id]
+        for cell in cells:
+            sockets = org_cells[cell]
+            sockets.discard(ws)
+            if not sockets:
+                del org_cells[cell]
+        if not org_cells:
+            del self._cells[org_id]
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees)
+
+    def _cells_of(self, bbox: tuple[float, float, float, float]) -> list[tuple[int, int]] | None:
+        """Grid cells overlapped by a viewport, or None when it spans more than max_cells."""
+        min_lat, min_lng, max_lat, max_lng = bbox
+        # A viewport crossing the antimeridian has min_lng > max_lng
+        lng_spans = [(min_lng, max_lng)] if min_lng <= max_lng else [(min_lng, 180.0), (-180.0, max_lng)]
+        lat_lo, _ = self._cell(min_lat, 0.0)
+        lat_hi, _ = self._cell(max_lat, 0.0)
+        lng_ranges = [
+            range(self._cell(0.0, lo)[1], self._cell(0.0, hi)[1] + 1) for lo, hi in lng_spans
+        ]
+        if (lat_hi - lat_lo + 1) * sum(len(r) for r in lng_ranges) > self.max_cells:
+            return None
+        return [
+            (i, j) for i in range(lat_lo, lat_hi + 1) for lng_range in lng_ranges for j in lng_range
+        ]
+
+
+def _bbox_contains(bbox: tuple[float, float, float, float], lat: float, lng: float) -> bool:
+    min_lat, min_lng, max_lat, max_lng = bbox
+    if not min_lat <= lat <= max_lat:
+        return False
+    if min_lng <= max_lng:
+        return min_lng <= lng <= max_lng
+    return lng >= min_lng or lng <= max_lng
+
+
+def _parse_bbox(bbox) -> tuple[float, float, float, float]:
+    """Validate [min_lat, min_lng, max_lat, max_lng]; raises ValueError."""
+    try:
+        min_lat, min_lng, max_lat, max_lng = (float(v) for v in bbox)
+    except (TypeError, ValueError):
+        raise ValueError("Viewport must be [min_lat, min_lng, max_lat, max_lng]") from None
+    if not -90.0 <= min_lat <= max_lat <= 90.0:
+        raise ValueError("Invalid viewport latitude range")
+    if not (-180.0 <= min_lng <= 180.0 and -180.0 <= max_lng <= 180.0):
+        raise ValueError("Invalid viewport longitude range")
+    return min_lat, min_lng, max_lat, max_lng
+
+
+class _ReplayRing:
+    """Recent messages of one channel: (seq, monotonic time, data, key, delta)."""
+
+    def __init__(self, floor: int):
+        self.entries: deque[tuple[int, float, dict, str | None, bool]] = deque()
+        # Messages with seq <= floor may have been missed by this ring
+        self.floor = floor
+        self.idle_since: float | None = None
+
+    def append(self, entry: tuple[int, float, dict, str | None, bool], max_size: int) -> None:
+        if len(self.entries) >= max_size:
+            self.floor = self.entries.popleft()[0]
+        self.entries.append(entry)
+
+
+class _ClientConnection:
+    """Outbound queue + writer task for a single WebSocket."""
+
+    def __init__(
+        self, ws: WebSocket, max_queue: int, max_drops: int,
+        subprotocol: str | None = None, user: dict | None = None,
+    ):
+        self.ws = ws
+        self.user = user
+        self.org_id = user.get("org_id") if user else None
+        self.subprotocol = subprotocol
+        self.encode = _ENCODERS[subprotocol]
+        self.max_queue = max_queue
+        self.max_drops = max_drops
+        self.dropped = 0
+        # Entries are (key, message); keyed entries carry None and read _latest[key].
+        # Keyed messages are raw dicts for delta connections, encoded at send time.
+        self._queue: deque[tuple[str | None, str | bytes | None]] = deque()
+        self._latest: dict[str, str | bytes | dict] = {}
+        # Rate-limited keyed messages: key -> latest message, flushed every min_interval
+        self._throttled: dict[str, str | bytes | dict] = {}
+        self.delta: _DeltaEncoder | None = None
+        self.min_interval = 0.0
+        self._next_flush = 0.0
+        self._wakeup = asyncio.Event()
+        self._writer: asyncio.Task | None = None
+
+    def start(self, on_failure) -> None:
+        self._writer = asyncio.create_task(self._write_loop(on_failure))
+
+    def stop(self) -> None:
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    def set_max_hz(self, max_hz: float) -> None:
+        """Limit keyed messages to `max_hz` flushes per second (0 disables the limit)."""
+        self.min_interval = 1.0 / max_hz if max_hz > 0 else 0.0
+        self._wakeup.set()
+
+    def enqueue(self, message: str | bytes | dict, key: str | None = None) -> bool:
+        """Queue a message without blocking. Returns False once the client counts as a laggard."""
+        if key is not None and self.min_interval:
+            # Bounded by the number of keys, so this never counts as a drop
+            is_new = key not in self._throttled
+            self._throttled[key] = message
+            if is_new:
+                self._wakeup.set()
+            return True
+
+        if key is not None and key in self._latest:
+            # Conflate: a newer value replaces the pending one in place
+            self._latest[key] = message
+            return True
+
+        if len(self._queue) >= self.max_queue:
+            old_key, _ = self._queue.popleft()
+            if old_key is not None:
+                self._latest.pop(old_key, None)
+            self.dropped += 1
+            if self.dropped >= self.max_drops:
+                return False
+
+        if key is None:
+            self._queue.append((None, message))
+        else:
+            self._latest[key] = message
+            self._queue.append((key, None))
+        self._wakeup.set()
+        return True
+
+    async def _wait(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Sleep until there is something to send now, or the next throttled flush is due."""
+        timeout = None
+        if self._throttled:
+            timeout = self._next_flush - loop.time()
+            if timeout <= 0:
+                return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _send(self, message: str | bytes | dict, loop: asyncio.AbstractEventLoop) -> None:
+        if isinstance(message, dict):
+            message = self.encode(self.delta.encode(message, loop.time()))
+        if isinstance(message, bytes):
+            await self.ws.send_bytes(message)
+        else:
+            await self.ws.send_text(message)
+
+    async def _write_loop(self, on_failure) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                await self._wait(loop)
+                while self._queue:
+                    key, message = self._queue.popleft()
+                    if key is not None:
+                        message = self._latest.pop(key, None)
+                        if message is None:
+                            continue
+                    await self._send(message, loop)
+                if self._throttled and loop.time() >= self._next_flush:
+                    self._next_flush = loop.time() + self.min_interval
+                    batch, self._throttled = self._throttled, {}
+                    for message in batch.values():
+                        await self._send(message, loop)
+                if not self._queue:
+                    # Caught up: forgive earlier drops
+                    self.dropped = 0
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await on_failure(self.ws)
+
 
 class TelemetryWebSocketManager:
     """
@@ -23,6 +377,13 @@ class TelemetryWebSocketManager:
         fleet:{fleet_id}      – all vehicles in a fleet
         org:{org_id}          – all vehicles in an organization
         alerts:{org_id}       – alert stream
+
+    Plus per-connection viewports (see set_viewport) for telemetry by position.
+
+    Subscriptions go through connect/subscribe/unsubscribe/set_viewport only:
+    channels are checked against the connection user's access (ws_access)
+    and the per-connection limit, and the channel index is mutated under the
+    lock. A connection without a user (in-process callers) skips the ACL.
     """
 
     def __init__(self):
@@ -30,77 +391,384 @@ class TelemetryWebSocketManager:
         self._subscriptions: dict[str, set[WebSocket]] = defaultdict(set)
         # ws -> set of channels
         self._ws_channels: dict[WebSocket, set[str]] = defaultdict(set)
+        # ws -> outbound queue / writer
+        self._connections: dict[WebSocket, _ClientConnection] = {}
+        # ws -> organizations whose messages it may need; org -> number of such sockets
+        self._ws_orgs: dict[WebSocket, set[str]] = {}
+        self._org_refs: dict[str, int] = defaultdict(int)
+        settings = get_base_settings()
+        self._geo = _GeoSubscriptionIndex(settings.WS_GEO_CELL_DEGREES, settings.WS_GEO_MAX_CELLS)
+        # Replay state: process epoch, last broadcast seq, channel -> ring
+        self._epoch = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._replay: dict[str, _ReplayRing] = {}
+        self._broker = None
         self._lock = asyncio.Lock()
 
-    async def connect(self, ws: WebSocket, channels: list[str]) -> None:
-        """Accept a WebSocket connection and subscribe to channels."""
-        await ws.accept()
+    async def connect(
+        self, ws: WebSocket, channels: list[str],
+        subprotocol: str | None = None, user: dict | None = None,
+        delta: bool = False, resume_from: str | None = None,
+    ) -> None:
+        """Accept a WebSocket connection and subscribe to the channels it may see.
+
+        The client first gets a `subscribed` message listing accepted and
+        rejected channels. With `resume_from` (a cursor from an earlier
+        connection), buffered messages newer than it follow, ahead of live data.
+        """
+        await ws.accept(subprotocol=subprotocol)
+        settings = get_base_settings()
+        conn = _ClientConnection(
+            ws, settings.WS_SEND_QUEUE_SIZE, settings.WS_MAX_DROPPED_MESSAGES, subprotocol, user,
+        )
+        if delta:
+            conn.delta = _DeltaEncoder(settings.WS_DELTA_KEYFRAME_SECONDS)
+        granted, rejected = await self._authorize(conn, channels)
         async with self._lock:
-            for channel in channels:
-                self._subscriptions[channel].add(ws)
-                self._ws_channels[ws].add(channel)
-        logger.info(f"WS connected: subscribed to {channels}")
+            self._connections[ws] = conn
+            accepted = self._add_channels(ws, granted, rejected)
+            self._ack(conn, accepted, rejected)
+            # No await between subscribing and replaying: nothing live can slip in between
+            if resume_from:
+                self._replay_to(conn, accepted, resume_from)
+        conn.start(self.disconnect)
+        await self._refresh_orgs(ws)
+        logger.info(f"WS connected: subscribed to {accepted}, rejected {len(rejected)}")
 
     async def disconnect(self, ws: WebSocket) -> None:
         """Remove a WebSocket from all subscriptions."""
         async with self._lock:
+            conn = self._connections.pop(ws, None)
             channels = self._ws_channels.pop(ws, set())
             for channel in channels:
                 self._subscriptions[channel].discard(ws)
                 if not self._subscriptions[channel]:
                     del self._subscriptions[channel]
+                    self._release_replay(channel)
+            self._geo.remove_socket(ws)
+            self._prune_replay()
+        if conn is not None:
+            conn.stop()
+        await self._refresh_orgs(ws)
         logger.info(f"WS disconnected: removed from {len(channels)} channels")
 
-    async def broadcast_to_channel(self, channel: str, data: dict) -> None:
-        """Send data to all WebSocket connections subscribed to a channel."""
-        subscribers = self._subscriptions.get(channel, set()).copy()
-        if not subscribers:
+    async def subscribe(self, ws: WebSocket, channels: list[str]) -> list[str]:
+        """Add the permitted channels to a connection; returns the ones accepted."""
+        conn = self._connections.get(ws)
+        if conn is None:
+            return []
+        granted, rejected = await self._authorize(conn, channels)
+        async with self._lock:
+            if ws not in self._connections:
+                return []
+            accepted = self._add_channels(ws, granted, rejected)
+            self._ack(conn, accepted, rejected)
+        await self._refresh_orgs(ws)
+        return accepted
+
+    async def unsubscribe(self, ws: WebSocket, channels: list[str]) -> None:
+        """Remove channels from a connection."""
+        async with self._lock:
+            for channel in channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(ws)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+                        self._release_replay(channel)
+                if ws in self._ws_channels:
+                    self._ws_channels[ws].discard(channel)
+        await self._refresh_orgs(ws)
+
+    async def set_viewport(self, ws: WebSocket, org_id: str | None, bbox) -> None:
+        """Receive an organization's telemetry inside `bbox` ([min_lat, min_lng, max_lat, max_lng]).
+
+        Defaults to the connection's own organization; a None bbox removes the viewport.
+        """
+        parsed = _parse_bbox(bbox) if bbox is not None else None
+        conn = self._connections.get(ws)
+        org_id = org_id or (conn.org_id if conn is not None else None)
+        if conn is None or not org_id:
             return
+        if parsed is not None and conn.user is not None:
+            reason = await ws_access.check_viewport(conn.user, org_id)
+            if reason is not None:
+                self.reject(ws, "viewport", reason)
+                return
+        async with self._lock:
+            if ws not in self._connections:
+                return
+            self._geo.set(ws, org_id, parsed)
+        await self._refresh_orgs(ws)
 
-        message = json.dumps(data)
-        dead_connections = []
+    def reject(self, ws: WebSocket, kind: str, reason: str) -> None:
+        """Tell the client a request was refused: {"type": kind, "status": "rejected", "reason": ...}."""
+        conn = self._connections.get(ws)
+        if conn is not None:
+            conn.enqueue(conn.encode({"type": kind, "status": "rejected", "reason": reason}))
 
-        for ws in subscribers:
-            try:
-                await ws.send_text(message)
-            except Exception:
-                dead_connections.append(ws)
+    async def _authorize(self, conn: _ClientConnection, channels: list[str]) -> tuple[list[str], dict[str, str]]:
+        """Split requested channels into (granted, {rejected: reason})."""
+        granted: list[str] = []
+        rejected: dict[str, str] = {}
+        if not isinstance(channels, list):
+            return granted, rejected
+        limit = get_base_settings().WS_MAX_CHANNELS_PER_CONNECTION - len(self._ws_channels.get(conn.ws, ()))
+        for channel in dict.fromkeys(channels):
+            if not isinstance(channel, str) or not channel or len(channel) > _MAX_CHANNEL_LENGTH:
+                rejected[str(channel)[:_MAX_CHANNEL_LENGTH]] = "invalid channel"
+                continue
+            if len(granted) >= limit:
+                # Don't spend ACL lookups on channels that cannot fit anyway
+                rejected[channel] = "channel limit reached"
+                continue
+            reason = await ws_access.check_channel(conn.user, channel) if conn.user is not None else None
+            if reason is None:
+                granted.append(channel)
+            else:
+                rejected[channel] = reason
+        return granted, rejected
 
-        # Clean up dead connections
-        for ws in dead_connections:
-            await self.disconnect(ws)
+    def _add_channels(self, ws: WebSocket, channels: list[str], rejected: dict[str, str]) -> list[str]:
+        """Register granted channels up to the per-connection limit (call under the lock)."""
+        limit = get_base_settings().WS_MAX_CHANNELS_PER_CONNECTION
+        current = self._ws_channels[ws]
+        accepted = []
+        for channel in channels:
+            if channel not in current and len(current) >= limit:
+                rejected[channel] = "channel limit reached"
+                continue
+            self._subscriptions[channel].add(ws)
+            current.add(channel)
+            self._watch_replay(channel)
+            accepted.append(channel)
+        return accepted
 
-    async def broadcast_telemetry(self, vehicle_id: str, org_id: str, data: dict) -> None:
-        """Broadcast telemetry to all relevant channels."""
-        # Send to vehicle-specific subscribers
-        await self.broadcast_to_channel(f"vehicle:{vehicle_id}", {
-            "type": "telemetry",
-            "vehicle_id": vehicle_id,
-            "data": data,
-        })
+    def _ack(self, conn: _ClientConnection, accepted: list[str], rejected: dict[str, str]) -> None:
+        conn.enqueue(conn.encode({"type": "subscribed", "channels": accepted, "rejected": rejected}))
+
+    async def attach_broker(self, broker) -> None:
+        """Forward published messages to `broker` (None detaches) and watch the orgs in use."""
+        self._broker = broker
+        if broker is not None:
+            for org_id in list(self._org_refs):
+                await broker.watch(org_id)
+
+    async def _refresh_orgs(self, ws: WebSocket) -> None:
+        """Recount the organizations a socket needs and (un)watch them on the broker."""
+        conn = self._connections.get(ws)
+        wanted: set[str] = set()
+        if conn is not None:
+            if conn.org_id:
+                wanted.add(conn.org_id)
+            for channel in self._ws_channels.get(ws, ()):
+                kind, _, ident = channel.partition(":")
+                if kind in ("org", "alerts") and ident:
+                    wanted.add(ident)
+            wanted |= self._geo.orgs(ws)
+        current = self._ws_orgs.pop(ws, set())
+        if wanted:
+            self._ws_orgs[ws] = wanted
+
+        added, removed = [], []
+        for org_id in wanted - current:
+            self._org_refs[org_id] += 1
+            if self._org_refs[org_id] == 1:
+                added.append(org_id)
+        for org_id in current - wanted:
+            self._org_refs[org_id] -= 1
+            if self._org_refs[org_id] <= 0:
+                del self._org_refs[org_id]
+                removed.append(org_id)
 
-        # Send to org-wide subscribers
-        await self.broadcast_to_channel(f"org:{org_id}", {
+        broker = self._broker
+        if broker is not None:
+            for org_id in added:
+                await broker.watch(org_id)
+            # Keep receiving for the replay window so a reconnecting client can resume
+            for org_id in removed:
+                asyncio.get_running_loop().call_later(
+                    get_base_settings().WS_REPLAY_MAX_AGE_SECONDS,
+                    lambda org_id=org_id: asyncio.create_task(self._unwatch_if_idle(org_id)),
+                )
+
+    async def _unwatch_if_idle(self, org_id: str) -> None:
+        if org_id not in self._org_refs and self._broker is not None:
+            await self._broker.unwatch(org_id)
+
+    def _watch_replay(self, channel: str) -> None:
+        ring = self._replay.get(channel)
+        if ring is None:
+            self._replay[channel] = _ReplayRing(self._seq)
+        else:
+            ring.idle_since = None
+
+    def _release_replay(self, channel: str) -> None:
+        ring = self._replay.get(channel)
+        if ring is not None:
+            ring.idle_since = time.monotonic()
+
+    def _prune_replay(self) -> None:
+        """Drop rings of channels that have had no subscribers for the replay window."""
+        cutoff = time.monotonic() - get_base_settings().WS_REPLAY_MAX_AGE_SECONDS
+        idle = [
+            channel for channel, ring in self._replay.items()
+            if ring.idle_since is not None and ring.idle_since < cutoff
+        ]
+        for channel in idle:
+            del self._replay[channel]
+
+    def _record(self, channels: list[str], seq: int, data: dict, key: str | None, delta: bool) -> None:
+        settings = get_base_settings()
+        entry = (seq, time.monotonic(), data, key, delta)
+        for channel in channels:
+            ring = self._replay.get(channel)
+            if ring is not None:
+                ring.append(entry, settings.WS_REPLAY_BUFFER_SIZE)
+
+    def _replay_to(self, conn: _ClientConnection, channels: list[str], cursor: str) -> None:
+        """Queue buffered messages after `cursor`, then a resume status ("ok" or "gap")."""
+        epoch, _, seq = cursor.partition(":")
+        complete = epoch == self._epoch and seq.isdigit()
+        missed: dict[int, tuple[int, float, dict, str | None, bool]] = {}
+        if complete:
+            since = int(seq)
+            cutoff = time.monotonic() - get_base_settings().WS_REPLAY_MAX_AGE_SECONDS
+            for channel in channels:
+                ring = self._replay.get(channel)
+                if ring is None or since < ring.floor:
+                    complete = False
+                    continue
+                for entry in ring.entries:
+                    if entry[0] <= since:
+                        continue
+                    if entry[1] < cutoff:
+                        complete = False
+                        continue
+                    missed[entry[0]] = entry
+        ordered = [missed[s] for s in sorted(missed)]
+        # Leave room for the status message so the replay itself never overflows the queue
+        if len(ordered) > conn.max_queue - 1:
+            ordered = ordered[len(ordered) - (conn.max_queue - 1):]
+            complete = False
+
+        for _, _, data, _, delta in ordered:
+            conn.enqueue(data if delta and conn.delta is not None else conn.encode(data))
+        conn.enqueue(conn.encode({
+            "type": "resume",
+            "status": "ok" if complete else "gap",
+            "cursor": f"{self._epoch}:{self._seq}",
+        }))
+
+    def set_max_hz(self, ws: WebSocket, max_hz: float) -> None:
+        """Rate-limit telemetry for one connection, clamped to WS_MAX_CLIENT_HZ (0 = unthrottled).
+
+        Raises ValueError for negative or non-finite rates.
+        """
+        if not math.isfinite(max_hz) or max_hz < 0:
+            raise ValueError("max_hz must be a non-negative number")
+        conn = self._connections.get(ws)
+        if conn is not None:
+            conn.set_max_hz(min(max_hz, get_base_settings().WS_MAX_CLIENT_HZ))
+
+    def resync(self, ws: WebSocket, vehicle_ids: list[str] | None = None) -> None:
+        """Send a full keyframe next for the given vehicles (or all) on a delta connection."""
+        conn = self._connections.get(ws)
+        if conn is not None and conn.delta is not None:
+            conn.delta.resync(vehicle_ids)
+
+    async def publish(
+        self, org_id: str, channels: list[str], data: dict, key: str | None = None, delta: bool = False,
+        position: tuple[float, float] | None = None,
+    ) -> None:
+        """Broadcast locally and to the other replicas watching `org_id`."""
+        geo = (org_id, *position) if position is not None else None
+        await self.broadcast(channels, data, key, delta, geo)
+        if self._broker is not None:
+            self._broker.publish(org_id, channels, data, key, delta, position)
+
+    async def broadcast(
+        self, channels: list[str], data: dict, key: str | None = None, delta: bool = False,
+        geo: tuple[str, float, float] | None = None,
+    ) -> None:
+        """Queue data once for every local connection subscribed to any of `channels`.
+
+        Target sockets are the union across channels, so a client subscribed to
+        several matching channels receives the message once, and the payload is
+        encoded once per wire encoding regardless of channel or subscriber count.
+        Never waits on a client: each connection's writer task does the sending.
+        Messages sharing a `key` are conflated per connection (latest wins).
+        With `delta`, connections in delta mode get the dict and encode it
+        themselves against what they last sent. `geo` = (org_id, lat, lng) also
+        targets connections whose viewport contains that position.
+        """
+        self._seq += 1
+        data = {**data, "cursor": f"{self._epoch}:{self._seq}"}
+        self._record(channels, self._seq, data, key, delta)
+
+        targets: set[WebSocket] = set()
+        for channel in channels:
+            subscribers = self._subscriptions.get(channel)
+            if subscribers:
+                targets.update(subscribers)
+        if geo is not None:
+            targets |= self._geo.match(*geo)
+        if not targets:
+            return
+
+        encoded: dict[str | None, str | bytes] = {}
+        laggards = []
+
+        for ws in targets:
+            conn = self._connections.get(ws)
+            if conn is None:
+                continue
+            if delta and conn.delta is not None:
+                item = data
+            else:
+                item = encoded.get(conn.subprotocol)
+                if item is None:
+                    item = encoded[conn.subprotocol] = conn.encode(data)
+            if not conn.enqueue(item, key):
+                laggards.append(ws)
+
+        for ws in laggards:
+            await self._drop_slow_consumer(ws)
+
+    async def _drop_slow_consumer(self, ws: WebSocket) -> None:
+        logger.warning("WS slow consumer disconnected after repeated drops")
+        await self.disconnect(ws)
+        try:
+            await ws.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="Slow consumer")
+        except Exception:
+            pass
+
+    async def broadcast_telemetry(
+        self, vehicle_id: str, org_id: str, data: dict, fleet_id: str | None = None,
+    ) -> None:
+        """Broadcast telemetry to vehicle, fleet, org-wide and viewport subscribers."""
+        gps = data.get("gps") or {}
+        lat, lng = gps.get("lat"), gps.get("lng")
+        channels = [f"vehicle:{vehicle_id}", f"org:{org_id}"]
+        if fleet_id:
+            channels.append(f"fleet:{fleet_id}")
+        await self.publish(org_id, channels, {
             "type": "telemetry",
             "vehicle_id": vehicle_id,
             "data": data,
-        })
+        }, key=f"telemetry:{vehicle_id}", delta=True,
+            position=(lat, lng) if lat is not None and lng is not None else None)
 
     async def broadcast_alert(self, org_id: str, alert: dict) -> None:
         """Broadcast alert to org subscribers."""
-        await self.broadcast_to_channel(f"alerts:{org_id}", {
+        await self.publish(org_id, [f"alerts:{org_id}"], {
             "type": "alert",
             "data": alert,
         })
 
     async def broadcast_mission(self, vehicle_id: str, org_id: str, data: dict) -> None:
         """Broadcast mission assignment/status updates."""
-        await self.broadcast_to_channel(f"vehicle:{vehicle_id}", {
-            "type": "mission",
-            "vehicle_id": vehicle_id,
-            "data": data,
-        })
-        await self.broadcast_to_channel(f"org:{org_id}", {
+        await self.publish(org_id, [f"vehicle:{vehicle_id}", f"org:{org_id}"], {
             "type": "mission",
             "vehicle_id": vehicle_id,
             "data": data,
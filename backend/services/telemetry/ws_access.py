@@ -0,0 +1,144 @@
+"""
+Channel access control for WebSocket subscriptions.
+A channel is granted when it belongs to the user's organization and, for
+fleet-restricted users, to one of their assigned fleets. Fleet assignments
+are cached per user for WS_ACL_CACHE_SECONDS (at most WS_ACL_CACHE_SIZE
+users, least recently used first out) and vehicle scopes come from the
+vehicle → fleet index, so (re)subscribing costs no query in the common case.
+Fleet assignment changes invalidate the affected entries on the replica that
+made them; other replicas pick them up when their entries expire.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from uuid import UUID
+
+from sqlalchemy import select
+
+from backend.shared.config import get_base_settings
+from backend.shared.database.postgres import get_direct_postgres_session
+from backend.shared.schemas.auth import Role
+
+from backend.services.fleet.models import Fleet
+from backend.services.fleet.service import _get_allowed_fleet_ids
+from backend.services.fleet.vehicle_index import vehicle_fleet_index
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_KINDS = ("vehicle", "fleet", "org", "alerts")
+
+
+class WebSocketAccessControl:
+    """Decides whether a user may subscribe to a channel or an organization's viewport."""
+
+    def __init__(self):
+        # (org_id, user_id) -> (allowed fleet ids or None for unrestricted, expires_at), LRU order
+        self._allowed: OrderedDict[tuple[str, str], tuple[set[str] | None, float]] = OrderedDict()
+        # fleet_id -> org_id (fleets never change organization), LRU order
+        self._fleet_orgs: OrderedDict[str, str] = OrderedDict()
+
+    async def check_channel(self, user: dict, channel: str) -> str | None:
+        """Return None when allowed, otherwise the reason for rejecting the channel."""
+        kind, _, ident = channel.partition(":")
+        if kind not in CHANNEL_KINDS or not ident:
+            return "unknown channel"
+
+        if kind in ("org", "alerts"):
+            if not self._same_org(user, ident):
+                return "forbidden"
+            # A fleet-restricted user would see other fleets' vehicles on the org stream
+            if kind == "org" and await self._allowed_fleets(user, ident) is not None:
+                return "restricted to assigned fleets"
+            return None
+
+        if kind == "fleet":
+            org_id = await self._fleet_org(ident)
+            if org_id is None or not self._same_org(user, org_id):
+                return "forbidden"
+            allowed = await self._allowed_fleets(user, org_id)
+            return None if allowed is None or ident in allowed else "forbidden"
+
+        org_id, fleet_id = await vehicle_fleet_index.scope(ident)
+        if org_id is None or not self._same_org(user, org_id):
+            return "forbidden"
+        allowed = await self._allowed_fleets(user, org_id)
+        return None if allowed is None or fleet_id in allowed else "forbidden"
+
+    async def check_viewport(self, user: dict, org_id: str) -> str | None:
+        """Viewports stream every vehicle of an organization in the box, like `org:`."""
+        return await self.check_channel(user, f"org:{org_id}")
+
+    def invalidate(self, org_id: str, user_ids: Iterable[str] | None = None) -> None:
+        """Forget cached fleet ACLs of some users of an organization (all of them when None)."""
+        if user_ids is None:
+            for key in [key for key in self._allowed if key[0] == org_id]:
+                del self._allowed[key]
+            return
+        for user_id in user_ids:
+            self._allowed.pop((org_id, user_id), None)
+
+    def forget_fleet(self, fleet_id: str) -> None:
+        """Drop a deleted fleet."""
+        self._fleet_orgs.pop(fleet_id, None)
+
+    def _same_org(self, user: dict, org_id: str) -> bool:
+        return user.get("role") == Role.SUPER_ADMIN.value or user.get("org_id") == org_id
+
+    async def _allowed_fleets(self, user: dict, org_id: str) -> set[str] | None:
+        if user.get("role") in (Role.ADMIN.value, Role.SUPER_ADMIN.value):
+            return None
+        cache_key = (org_id, user.get("user_id") or "")
+        cached = self._allowed.get(cache_key)
+        if cached is not None:
+            if cached[1] > time.monotonic():
+                self._allowed.move_to_end(cache_key)
+                return cached[0]
+            del self._allowed[cache_key]
+
+        allowed: set[str] | None = set()
+        try:
+            session = await get_direct_postgres_session()
+            async with session:
+                fleet_ids = await _get_allowed_fleet_ids(session, UUID(org_id), user)
+            allowed = None if fleet_ids is None else {str(fid) for fid in fleet_ids}
+        except Exception as e:
+            # Fail closed, and do not cache the failure
+            logger.error(f"WS fleet ACL lookup failed for org {org_id}: {e}")
+            return set()
+        settings = get_base_settings()
+        self._allowed[cache_key] = (allowed, time.monotonic() + settings.WS_ACL_CACHE_SECONDS)
+        self._allowed.move_to_end(cache_key)
+        while len(self._allowed) > settings.WS_ACL_CACHE_SIZE:
+            self._allowed.popitem(last=False)
+        return allowed
+
+    async def _fleet_org(self, fleet_id: str) -> str | None:
+        if fleet_id in self._fleet_orgs:
+            self._fleet_orgs.move_to_end(fleet_id)
+            return self._fleet_orgs[fleet_id]
+        try:
+            fleet_uuid = UUID(fleet_id)
+        except ValueError:
+            return None
+        try:
+            session = await get_direct_postgres_session()
+            async with session:
+                org_id = (await session.execute(
+                    select(Fleet.organization_id).where(Fleet.id == fleet_uuid)
+                )).scalar_one_or_none()
+        except Exception as e:
+            logger.error(f"WS fleet lookup failed for {fleet_id}: {e}")
+            return None
+        if org_id is None:
+            return None
+        self._fleet_orgs[fleet_id] = str(org_id)
+        while len(self._fleet_orgs) > get_base_settings().WS_ACL_CACHE_SIZE:
+            self._fleet_orgs.popitem(last=False)
+        return str(org_id)
+
+
+# Singleton instance
+ws_access = WebSocketAccessControl()
@@ -0,0 +1,167 @@
+"""
+Cross-replica WebSocket fan-out over Redis pub/sub.
+Every message published through `ws_manager.publish` is delivered to local
+subscribers immediately and also queued here; a publisher task pipelines the
+queue into one Redis channel per organization. Each replica subscribes only to
+the organizations its connected clients need and replays received messages
+through the local fan-out, skipping the ones it published itself.
+
+Relaying is only exact when each source message is handled by one replica:
+ingest topics are MQTT shared subscriptions (MQTT_SHARED_GROUP), so a frame
+reaches one replica's pipeline and every client sees it once.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+
+from backend.shared.config import get_base_settings
+from backend.shared.database.redis import RedisKeys, get_redis
+
+from .websocket_manager import TelemetryWebSocketManager, ws_manager
+
+logger = logging.getLogger(__name__)
+
+# Max messages sent per pipelined round trip
+_PUBLISH_BATCH = 500
+
+
+class WebSocketBroker:
+    """Relays WebSocket broadcasts between replicas through per-org Redis channels."""
+
+    def __init__(self, manager: TelemetryWebSocketManager):
+        self.manager = manager
+        self.replica_id = uuid.uuid4().hex
+        self._outbox: asyncio.Queue[tuple[str, str]] | None = None
+        self._pubsub = None
+        self._watched: set[str] = set()
+        self._has_subscriptions = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self.dropped = 0
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._outbox = asyncio.Queue(maxsize=get_base_settings().WS_BROKER_QUEUE_SIZE)
+        self._pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        self._tasks = [
+            asyncio.create_task(self._publish_loop()),
+            asyncio.create_task(self._listen_loop()),
+        ]
+        await self.manager.attach_broker(self)
+
+    async def stop(self) -> None:
+        await self.manager.attach_broker(None)
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                pass
+            self._pubsub = None
+        self._watched.clear()
+
+    def publish(
+        self, org_id: str, channels: list[str], data: dict, key: str | None, delta: bool,
+        position: tuple[float, float] | None = None,
+    ) -> None:
+        """Queue a message for the other replicas without blocking the caller."""
+        if self._outbox is None:
+            return
+        envelope = json.dumps(
+            {"r": self.replica_id, "o": org_id, "c": channels, "k": key, "d": delta, "p": position, "m": data},
+            separators=(",", ":"),
+        )
+        try:
+            self._outbox.put_nowait((RedisKeys.ws_org_channel(org_id), envelope))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"WS broker outbox full, {self.dropped} messages dropped")
+
+    async def watch(self, org_id: str) -> None:
+        """Start receiving other replicas' messages for an organization."""
+        if org_id in self._watched or self._pubsub is None:
+            return
+        try:
+            await self._pubsub.subscribe(RedisKeys.ws_org_channel(org_id))
+        except Exception as e:
+            logger.error(f"WS broker subscribe failed for org {org_id}: {e}")
+            return
+        self._watched.add(org_id)
+        self._has_subscriptions.set()
+
+    async def unwatch(self, org_id: str) -> None:
+        if org_id not in self._watched or self._pubsub is None:
+            return
+        self._watched.discard(org_id)
+        try:
+            await self._pubsub.unsubscribe(RedisKeys.ws_org_channel(org_id))
+        except Exception as e:
+            logger.error(f"WS broker unsubscribe failed for org {org_id}: {e}")
+
+    async def _publish_loop(self) -> None:
+        while True:
+            batch = [await self._outbox.get()]
+            while len(batch) < _PUBLISH_BATCH and not self._outbox.empty():
+                batch.append(self._outbox.get_nowait())
+            try:
+                pipe = get_redis().pipeline(transaction=False)
+                for channel, envelope in batch:
+                    pipe.publish(channel, envelope)
+                await pipe.execute()
+            except Exception as e:
+                logger.error(f"WS broker publish failed ({len(batch)} messages): {e}")
+
+    async def _listen_loop(self) -> None:
+        while True:
+            if not self._watched:
+                self._has_subscriptions.clear()
+                await self._has_subscriptions.wait()
+                continue
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"WS broker receive failed: {e}")
+                await asyncio.sleep(1.0)
+                await self._resubscribe()
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            try:
+                envelope = json.loads(message["data"])
+                if envelope["r"] == self.replica_id:
+                    continue
+                position = envelope["p"]
+                geo = (envelope["o"], *position) if position else None
+                await self.manager.broadcast(envelope["c"], envelope["m"], envelope["k"], envelope["d"], geo)
+            except Exception as e:
+                logger.error(f"WS broker delivery failed: {e}")
+
+    async def _resubscribe(self) -> None:
+        """Recreate the pub/sub connection after an error and restore subscriptions."""
+        try:
+            await self._pubsub.aclose()
+        except Exception:
+            pass
+        self._pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        if self._watched:
+            try:
+                await self._pubsub.subscribe(*(RedisKeys.ws_org_channel(org) for org in self._watched))
+            except Exception as e:
+                logger.error(f"WS broker resubscribe failed: {e}")
+
+
+# Singleton instance
+ws_broker = WebSocketBroker(ws_manager)
@@ -17,7 +17,7 @@ class BaseServiceSettings(BaseSettings):
     # ── Service identity ──
     SERVICE_NAME: str = "aerocommand"
     SERVICE_VERSION: str = "1.0.0"
-    ENVIRONMENT: str = Field(default="development", pattern="^(development|staging|production)$")
+    ENVIRONMENT: str = Field(default="development", pattern="^(development|testing|staging|production)$")
     DEBUG: bool = False
     LOG_LEVEL: str = "INFO"
 
@@ -79,6 +79,101 @@ class BaseServiceSettings(BaseSettings):
     MQTT_CLIENT_ID_PREFIX: str = "aerocommand"
     MQTT_QOS: int = Field(default=1, ge=0, le=2)
     MQTT_KEEPALIVE: int = 60
+    # Shared-subscription group for ingest topics: each message goes to one replica,
+    # which relays it to the others' WebSocket clients (empty = every replica gets all)
+    MQTT_SHARED_GROUP: str = "aerocommand-backend"
+
+    # ── Live fleet state ──
+    # How often the in-process columnar fleet view re-merges snapshots from Redis
+    FLEET_STATE_RESYNC_SECONDS: float = 30.0
+    # Interval of the write-behind flush of live vehicle state to Postgres
+    VEHICLE_STATE_FLUSH_SECONDS: float = 5.0
+    # Local lifetime of cached vehicle -> fleet entries (bounds staleness across replicas)
+    VEHICLE_INDEX_TTL_SECONDS: float = 60.0
+    # Lifetime of the shared Redis scope entries; a miss rebuilds one from Postgres
+    VEHICLE_SCOPE_TTL_SECONDS: int = 3600
+
+    # ── Presence ──
+    # A vehicle without a heartbeat for this long is reported offline
+    PRESENCE_TIMEOUT_SECONDS: float = 30.0
+    PRESENCE_FLUSH_SECONDS: float = 1.0
+    PRESENCE_SWEEP_SECONDS: float = 2.0
+
+    # ── WebSocket fan-out ──
+    # Per-connection outbound queue length before the oldest message is dropped
+    WS_SEND_QUEUE_SIZE: int = 256
+    # Dropped messages (without catching up) before a client is disconnected
+    WS_MAX_DROPPED_MESSAGES: int = 512
+    # Upper bound for the per-client `max_hz` telemetry rate (0 in a request = unthrottled)
+    WS_MAX_CLIENT_HZ: float = 30.0
+    # Delta-mode clients get a full telemetry keyframe per vehicle at least this often
+    WS_DELTA_KEYFRAME_SECONDS: float = 10.0
+    # Messages buffered for cross-replica fan-out before new ones are dropped
+    WS_BROKER_QUEUE_SIZE: int = 10000
+    # Grid cell size of the viewport subscription index; larger viewports are matched linearly
+    WS_GEO_CELL_DEGREES: float = 0.25
+    WS_GEO_MAX_CELLS: int = 1024
+    # Per-channel replay buffer for clients reconnecting with resume_from
+    WS_REPLAY_BUFFER_SIZE: int = 256
+    WS_REPLAY_MAX_AGE_SECONDS: float = 30.0
+    # Subscription limits and lifetime of cached fleet ACLs
+    WS_MAX_CHANNELS_PER_CONNECTION: int = 200
+    WS_ACL_CACHE_SECONDS: float = 30.0
+    # Users (per organization) and fleets whose ACL data is cached, least recently used evicted
+    WS_ACL_CACHE_SIZE: int = 10000
+
+    # ── Alert evaluation ──
+    # Telemetry frames waiting for rule evaluation before new ones are dropped
+    ALERT_EVAL_QUEUE_SIZE: int = 10000
+    # How often cached rules are checked against the per-org revisions in Redis
+    ALERT_RULES_POLL_SECONDS: float = 5.0
+    # Full reload of the rule cache, catching edits made outside the API
+    ALERT_RULES_RELOAD_SECONDS: float = 300.0
+    # Interval of the write-behind of alert firing/cooldown states to Redis
+    ALERT_STATE_FLUSH_SECONDS: float = 1.0
+    # Firing/cooldown states of vehicles not evaluated for this long are dropped
+    ALERT_STATE_TTL_SECONDS: float = 3600.0
+    # How often states and rule windows are checked for expiry and for rules that no longer exist
+    ALERT_STATE_SWEEP_SECONDS: float = 60.0
+    # Windows and sustained-condition states of vehicles without frames for this long are dropped
+    ALERT_WINDOW_IDLE_SECONDS: float = 900.0
+    # Min seconds between repeated alerts for the same zone and vehicle
+    ALERT_GEOFENCE_COOLDOWN_SECONDS: float = 300.0
+    # Grid cell size of the geofence index; zones spanning more cells are tested linearly
+    ALERT_GEOFENCE_CELL_DEGREES: float = 0.1
+    ALERT_GEOFENCE_MAX_CELLS: int = 4096
+    # Triggered alerts waiting for the bulk insert before new ones are dropped (after their WS push)
+    ALERT_SINK_QUEUE_SIZE: int = 50000
+    # Pause before retrying a failed alert insert
+    ALERT_SINK_RETRY_SECONDS: float = 2.0
+    # Failed batch inserts before a row is retried alone and dead-lettered if the database rejects it
+    ALERT_SINK_MAX_ATTEMPTS: int = 3
+
+    # ── Alert notifications ──
+    # Channels of alerts not raised by a rule (geofences, offline vehicles), e.g. ["email"]
+    ALERT_DEFAULT_NOTIFICATION_CHANNELS: list[str] = Field(default_factory=list)
+    # Target of the plain "webhook" channel; rules can also name their own URL
+    ALERT_WEBHOOK_URL: str | None = None
+    ALERT_WEBHOOK_TIMEOUT_SECONDS: float = 5.0
+    # Alerts waiting for notification before new ones are dropped
+    ALERT_NOTIFY_QUEUE_SIZE: int = 10000
+    # Concurrent notification workers, and SMTP connections they share
+    ALERT_NOTIFY_WORKERS: int = 4
+    ALERT_SMTP_POOL_SIZE: int = 2
+    # A recipient gets at most one alert email per interval, later alerts go out as one digest
+    ALERT_EMAIL_INTERVAL_SECONDS: float = 300.0
+    # How long an organization's admin recipient list is cached
+    ALERT_RECIPIENTS_CACHE_SECONDS: float = 300.0
+    # Alerts of one category within the window that collapse into an incident (0 disables)
+    ALERT_STORM_THRESHOLD: int = 5
+    # An incident stays open until its category has been quiet for this long
+    ALERT_STORM_WINDOW_SECONDS: float = 60.0
+    # Split storms by last known vehicle position on a grid of this size; 0 groups the whole organization
+    ALERT_STORM_CELL_DEGREES: float = 0.0
+    # Min seconds between count updates of an open incident
+    ALERT_STORM_UPDATE_SECONDS: float = 10.0
+    # Lifetime of the cached open-alert counters; a recount from the table corrects any drift
+    ALERT_COUNTS_TTL_SECONDS: int = 300
 
     # ── JWT ──
     JWT_SECRET_KEY: str = "CHANGE_ME_IN_PRODUCTION_use_openssl_rand_hex_64"
@@ -1,16 +1,22 @@
 """PostgreSQL async engine & session factory using SQLAlchemy 2.0."""
 from __future__ import annotations
 
-from collections.abc import AsyncGenerator
+import logging
+from collections.abc import AsyncGenerator, Awaitable, Callable
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from backend.shared.config import get_base_settings
 
+logger = logging.getLogger(__name__)
+
 _engine = None
 _session_factory = None
 
+# Session.info key of the callbacks run once the request's transaction commits
+_AFTER_COMMIT = "after_commit"
+
 
 class PostgresBase(DeclarativeBase):
     """Base class for all SQLAlchemy ORM models."""
@@ -45,8 +51,23 @@ async def get_postgres_session() -> AsyncGenerator[AsyncSession, None]:
             yield session
             await session.commit()
         except Exception:
+            session.info.pop(_AFTER_COMMIT, None)
             await session.rollback()
             raise
+        for callback in session.info.pop(_AFTER_COMMIT, []):
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"After-commit callback failed: {e}")
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """Run `callback` once the request session commits; dropped if it rolls back.
+
+    For side effects outside the database (caches, indexes) that must not
+    describe rows which never got committed.
+    """
+    session.info.setdefault(_AFTER_COMMIT, []).append(callback)
 
 
 async def get_direct_postgres_session() -> AsyncSession:
@@ -16,15 +16,23 @@ class RedisKeys:
     Key Architecture:
         aero:session:{user_id}          → JWT session data (hash)
         aero:token:blacklist:{jti}      → Revoked token (string, TTL)
-        aero:telemetry:{vehicle_id}     → Latest telemetry snapshot (hash)
-        aero:vehicle:status:{vehicle_id}→ Vehicle online status (string, TTL)
-        aero:heartbeat:{vehicle_id}     → Last heartbeat timestamp (string, TTL)
+        aero:telemetry:{vehicle_id}     → Latest telemetry snapshot (JSON string, TTL)
+        aero:presence                   → Last heartbeat epoch per vehicle (sorted set)
+        aero:presence:scope             → vehicle_id → "org_id:fleet_id" (hash)
+        aero:presence:fleet_online      → Online vehicle count per fleet (hash)
         aero:rate_limit:{client_ip}     → Rate limit counter (string, TTL)
         aero:command:{command_id}       → Command status tracking (hash)
         aero:lock:{resource}            → Distributed lock (string, TTL)
         aero:cache:{key}                → General cache (string, TTL)
         aero:ws:connections             → WebSocket connection count (string)
+        aero:ws:org:{org_id}            → Cross-replica WebSocket fan-out (pub/sub channel)
         aero:fleet:{fleet_id}:vehicles  → Set of vehicle IDs in fleet (set)
+        aero:vehicle:{vehicle_id}:scope → "org_id:fleet_id" (string, TTL)
+        aero:geo:{org_id}:vehicles      → Live vehicle positions (GEO set)
+        aero:alert:rules:version        → org_id → alert rule/geofence revision (hash)
+        aero:alert:state                → "rule_id:vehicle_id" → "state:fired_at" (hash)
+        aero:alert:open:{org_id}        → Open / unacknowledged alert counts by severity (hash, TTL)
+        aero:alert:dead_letter          → Alert rows the database rejected, newest first (JSON list, capped)
     """
 
     @staticmethod
@@ -40,12 +48,16 @@ class RedisKeys:
         return f"aero:telemetry:{vehicle_id}"
 
     @staticmethod
-    def vehicle_status(vehicle_id: str) -> str:
-        return f"aero:vehicle:status:{vehicle_id}"
+    def presence() -> str:
+        return "aero:presence"
 
     @staticmethod
-    def heartbeat(vehicle_id: str) -> str:
-        return f"aero:heartbeat:{vehicle_id}"
+    def presence_scope() -> str:
+        return "aero:presence:scope"
+
+    @staticmethod
+    def fleet_online_counts() -> str:
+        return "aero:presence:fleet_online"
 
     @staticmethod
     def rate_limit(client_ip: str) -> str:
@@ -59,10 +71,38 @@ class RedisKeys:
     def lock(resource: str) -> str:
         return f"aero:lock:{resource}"
 
+    @staticmethod
+    def ws_org_channel(org_id: str) -> str:
+        return f"aero:ws:org:{org_id}"
+
     @staticmethod
     def fleet_vehicles(fleet_id: str) -> str:
         return f"aero:fleet:{fleet_id}:vehicles"
 
+    @staticmethod
+    def vehicle_scope(vehicle_id: str) -> str:
+        return f"aero:vehicle:{vehicle_id}:scope"
+
+    @staticmethod
+    def vehicle_positions(org_id: str) -> str:
+        return f"aero:geo:{org_id}:vehicles"
+
+    @staticmethod
+    def alert_rules_version() -> str:
+        return "aero:alert:rules:version"
+
+    @staticmethod
+    def alert_state() -> str:
+        return "aero:alert:state"
+
+    @staticmethod
+    def alert_open_counts(org_id: str) -> str:
+        return f"aero:alert:open:{org_id}"
+
+    @staticmethod
+    def alert_dead_letter() -> str:
+        return "aero:alert:dead_letter"
+
     @staticmethod
     def action_audit_stream() -> str:
         return "aero:audit:actions"
@@ -5,9 +5,11 @@ Kept dependency-free (stdlib only) so Docker images don't need extra packages.
 
 from __future__ import annotations
 
+import asyncio
 from email.message import EmailMessage
 from functools import partial
 import smtplib
+import time
 
 import anyio
 
@@ -18,14 +20,14 @@ class EmailSendError(RuntimeError):
     pass
 
 
-def _send_smtp_sync(
+def _build_message(
     settings: BaseServiceSettings,
     *,
     to_email: str,
     subject: str,
     body: str,
     reply_to: str | None = None,
-) -> None:
+) -> EmailMessage:
     if not settings.SMTP_HOST:
         raise EmailSendError("SMTP is not configured (SMTP_HOST is missing).")
 
@@ -40,20 +42,38 @@ def _send_smtp_sync(
     if reply_to:
         msg["Reply-To"] = reply_to
     msg.set_content(body)
+    return msg
 
+
+def _open_smtp(settings: BaseServiceSettings) -> smtplib.SMTP:
+    """Connect, upgrade to TLS and log in as configured."""
+    if settings.SMTP_USE_SSL:
+        server: smtplib.SMTP = smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT, timeout=15)
+    else:
+        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=15)
     try:
-        if settings.SMTP_USE_SSL:
-            server: smtplib.SMTP = smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT, timeout=15)
-        else:
-            server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=15)
+        if settings.SMTP_USE_STARTTLS and not settings.SMTP_USE_SSL:
+            server.starttls()
 
-        with server:
-            if settings.SMTP_USE_STARTTLS and not settings.SMTP_USE_SSL:
-                server.starttls()
+        if settings.SMTP_USERNAME and settings.SMTP_PASSWORD:
+            server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+    except Exception:
+        server.close()
+        raise
+    return server
 
-            if settings.SMTP_USERNAME and settings.SMTP_PASSWORD:
-                server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
 
+def _send_smtp_sync(
+    settings: BaseServiceSettings,
+    *,
+    to_email: str,
+    subject: str,
+    body: str,
+    reply_to: str | None = None,
+) -> None:
+    msg = _build_message(settings, to_email=to_email, subject=subject, body=body, reply_to=reply_to)
+    try:
+        with _open_smtp(settings) as server:
             server.send_message(msg)
     except Exception as e:
         raise EmailSendError(str(e)) from e
@@ -76,3 +96,70 @@ async def send_email_smtp(
         reply_to=reply_to,
     )
     await anyio.to_thread.run_sync(fn)
+
+
+class SMTPConnectionPool:
+    """Bounded set of logged-in SMTP connections reused across messages.
+
+    Meant for bulk senders (alert notifications): each message skips the
+    connect/TLS/login round trips of `send_email_smtp`. Connections idle for
+    longer than `idle_seconds` are closed instead of reused, and a connection
+    the server dropped is replaced once before the send is reported failed.
+    """
+
+    def __init__(self, settings: BaseServiceSettings, size: int = 2, idle_seconds: float = 60.0):
+        self._settings = settings
+        self._idle_seconds = idle_seconds
+        self._slots = asyncio.Semaphore(size)
+        # (connection, monotonic time it was last used)
+        self._idle: list[tuple[smtplib.SMTP, float]] = []
+
+    async def send(self, *, to_email: str, subject: str, body: str) -> None:
+        msg = _build_message(self._settings, to_email=to_email, subject=subject, body=body)
+        async with self._slots:
+            server = self._checkout()
+            try:
+                server = await anyio.to_thread.run_sync(partial(self._send_sync, server, msg))
+            except Exception as e:
+                raise EmailSendError(str(e)) from e
+            self._idle.append((server, time.monotonic()))
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for server, _ in idle:
+            await anyio.to_thread.run_sync(partial(self._quit, server))
+
+    def _checkout(self) -> smtplib.SMTP | None:
+        now = time.monotonic()
+        while self._idle:
+            server, used_at = self._idle.pop()
+            if now - used_at < self._idle_seconds:
+                return server
+            # Servers drop idle sessions after a while, don't wait to find out
+            server.close()
+        return None
+
+    def _send_sync(self, server: smtplib.SMTP | None, msg: EmailMessage) -> smtplib.SMTP:
+        if server is not None:
+            try:
+                server.send_message(msg)
+                return server
+            except smtplib.SMTPServerDisconnected:
+                server.close()
+            except Exception:
+                self._quit(server)
+                raise
+        server = _open_smtp(self._settings)
+        try:
+            server.send_message(msg)
+        except Exception:
+            self._quit(server)
+            raise
+        return server
+
+    @staticmethod
+    def _quit(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
@@ -7,6 +7,7 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import uuid
 from typing import Any, Callable, Coroutine
 
 import aiomqtt
@@ -24,12 +25,17 @@ class MQTTService:
         mqtt = MQTTService(client_id="telemetry-svc")
         await mqtt.start()
         await mqtt.subscribe("aerocommand/+/telemetry/#", handler)
+        await mqtt.subscribe("aerocommand/+/telemetry/+/raw", handler, shared=True)
         await mqtt.publish("aerocommand/org/command/v1/request", payload)
     """
 
     def __init__(self, client_id: str):
         self.client_id = client_id
+        # Client ids must be unique per broker, so every replica gets its own
+        self.replica_id = uuid.uuid4().hex[:8]
         self._handlers: dict[str, Callable] = {}
+        # Topics subscribed through the MQTT_SHARED_GROUP shared subscription
+        self._shared: set[str] = set()
         self._running = False
         self._client: aiomqtt.Client | None = None
         self._publish_queue: asyncio.Queue = asyncio.Queue()
@@ -70,13 +76,26 @@ class MQTTService:
         self._publish_task = None
         self._connection_task = None
 
-    async def subscribe(self, topic: str, handler: Callable) -> None:
-        """Register a handler for a topic pattern."""
+    async def subscribe(self, topic: str, handler: Callable, shared: bool = False) -> None:
+        """Register a handler for a topic pattern.
+
+        With `shared`, replicas subscribe as one MQTT_SHARED_GROUP and the
+        broker delivers each message to only one of them.
+        """
         self._handlers[topic] = handler
+        if shared:
+            self._shared.add(topic)
         if self._client:
             settings = get_base_settings()
-            await self._client.subscribe(topic, qos=settings.MQTT_QOS)
-            logger.info(f"Subscribed to {topic}")
+            await self._client.subscribe(self._subscription(topic), qos=settings.MQTT_QOS)
+            logger.info(f"Subscribed to {self._subscription(topic)}")
+
+    def _subscription(self, topic: str) -> str:
+        """Topic filter sent to the broker for a registered pattern."""
+        group = get_base_settings().MQTT_SHARED_GROUP
+        if group and topic in self._shared:
+            return f"$share/{group}/{topic}"
+        return topic
 
     async def publish(self, topic: str, payload: dict | str, qos: int | None = None, retain: bool = False) -> None:
         """Queue a message for publishing."""
@@ -95,7 +114,7 @@ class MQTTService:
                     port=settings.MQTT_BROKER_PORT,
                     username=settings.MQTT_USERNAME,
                     password=settings.MQTT_PASSWORD,
-                    identifier=f"{settings.MQTT_CLIENT_ID_PREFIX}-{self.client_id}",
+                    identifier=f"{settings.MQTT_CLIENT_ID_PREFIX}-{self.client_id}-{self.replica_id}",
                     keepalive=settings.MQTT_KEEPALIVE,
                     clean_session=True,
                 ) as client:
@@ -104,7 +123,7 @@ class MQTTService:
 
                     # Re-subscribe to all registered topics
                     for topic in self._handlers:
-                        await client.subscribe(topic, qos=settings.MQTT_QOS)
+                        await client.subscribe(self._subscription(topic), qos=settings.MQTT_QOS)
 
                     # Listen for messages
                     async for message in client.messages:
@@ -12,6 +12,7 @@ __all__ = [
     "AlertCategory",
     "AlertCreate",
     "AlertResponse",
+    "AlertStats",
     "AlertRule",
     "GeofenceZone",
     "NotificationChannel",
@@ -64,6 +65,14 @@ class AlertResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class AlertStats(BaseModel):
+    """Open (unresolved) and unacknowledged alert counts, by severity."""
+    open: dict[AlertSeverity, int]
+    unacknowledged: dict[AlertSeverity, int]
+    total_open: int
+    total_unacknowledged: int
+
+
 class NotificationChannel(str, enum.Enum):
     EMAIL = "email"
     PUSH = "push"
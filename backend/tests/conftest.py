@@ -0,0 +1,8 @@
+import fakeredis
+import pytest
+
+
+@pytest.fixture
+def redis():
+    """In-process Redis shared by every replica of a test."""
+    return fakeredis.aioredis.FakeRedis(decode_responses=True)
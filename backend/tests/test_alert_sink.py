@@ -0,0 +1,89 @@
+"""A row the database rejects is dead-lettered without holding up the rest of its batch."""
+import asyncio
+import json
+import uuid
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from backend.services.alert import counters as counters_module
+from backend.services.alert import sink as sink_module
+from backend.services.alert.counters import open_field
+from backend.services.alert.sink import AlertSink
+from backend.shared.config import get_base_settings
+from backend.shared.database.redis import RedisKeys
+from backend.shared.schemas.alert import AlertCategory, AlertCreate, AlertSeverity
+
+ORG = str(uuid.uuid4())
+
+
+class FakeTableSink(AlertSink):
+    """AlertSink whose insert goes to a list; titles in `rejected` violate a constraint."""
+
+    def __init__(self):
+        super().__init__()
+        self.table: dict = {}
+        self.rejected: set[str] = set()
+        self.outage = False
+
+    async def _insert(self, rows):
+        if self.outage:
+            raise OperationalError("INSERT", {}, ConnectionRefusedError("connection refused"))
+        if any(row["title"] in self.rejected for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("violates check constraint"))
+        self.table.update({row["id"]: row for row in rows})
+
+
+@pytest.fixture
+async def sink(redis, monkeypatch):
+    monkeypatch.setattr(sink_module, "get_redis", lambda: redis)
+    monkeypatch.setattr(counters_module, "get_redis", lambda: redis)
+    monkeypatch.setattr(get_base_settings(), "ALERT_SINK_RETRY_SECONDS", 0.01)
+    monkeypatch.setattr(get_base_settings(), "ALERT_STORM_THRESHOLD", 0)
+    sink = FakeTableSink()
+    yield sink
+    sink.outage = False
+    await sink.stop()
+
+
+def alert(title: str) -> AlertCreate:
+    return AlertCreate(severity=AlertSeverity.WARNING, category=AlertCategory.BATTERY, title=title, message=title)
+
+
+async def _wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+async def test_bad_row_is_dead_lettered_and_the_rest_committed(sink, redis):
+    sink.rejected = {"bad"}
+    await sink.start()
+    for title in ("good-1", "bad", "good-2"):
+        await sink.submit(ORG, alert(title), channels=[])
+
+    await _wait_for(lambda: sink.dead_lettered)
+    assert sorted(row["title"] for row in sink.table.values()) == ["good-1", "good-2"]
+
+    dead = [json.loads(entry) for entry in await redis.lrange(RedisKeys.alert_dead_letter(), 0, -1)]
+    assert [entry["row"]["title"] for entry in dead] == ["bad"]
+    # Only committed rows count as open alerts
+    counts = await redis.hgetall(RedisKeys.alert_open_counts(ORG))
+    assert counts[open_field(AlertSeverity.WARNING)] == "2"
+
+
+async def test_rows_are_kept_while_the_database_is_down(sink, redis):
+    sink.outage = True
+    await sink.start()
+    for title in ("a", "b"):
+        await sink.submit(ORG, alert(title), channels=[])
+
+    # Well past ALERT_SINK_MAX_ATTEMPTS failed batches
+    await asyncio.sleep(0.2)
+    assert sink.dead_lettered == 0
+    assert await redis.llen(RedisKeys.alert_dead_letter()) == 0
+    assert await redis.hgetall(RedisKeys.alert_open_counts(ORG)) == {}
+
+    sink.outage = False
+    await _wait_for(lambda: len(sink.table) == 2)
+    assert sorted(row["title"] for row in sink.table.values()) == ["a", "b"]
@@ -0,0 +1,64 @@
+"""Firing/cooldown states expire with their vehicle and with their rule."""
+import time
+
+import pytest
+
+from backend.services.alert import alert_state as alert_state_module
+from backend.services.alert.alert_state import COOLDOWN, FIRING, AlertStateTracker
+from backend.shared.config import get_base_settings
+from backend.shared.database.redis import RedisKeys
+
+
+@pytest.fixture
+def tracker(redis, monkeypatch):
+    monkeypatch.setattr(alert_state_module, "get_redis", lambda: redis)
+    return AlertStateTracker()
+
+
+def test_idle_firing_entry_expires(tracker):
+    ttl = get_base_settings().ALERT_STATE_TTL_SECONDS
+    assert tracker.step("rule-1:veh-1", True, None, None, 0.0, now=1000.0)
+    assert tracker.tracks("veh-1")
+
+    assert tracker.sweep(1000.0 + ttl / 2) == 0
+    assert tracker.sweep(1000.0 + ttl) == 1
+    assert not tracker.tracks("veh-1")
+
+
+def test_evaluated_entry_is_kept(tracker):
+    ttl = get_base_settings().ALERT_STATE_TTL_SECONDS
+    tracker.step("rule-1:veh-1", True, None, None, 0.0, now=1000.0)
+    # Still matching: no new alert, but the entry is refreshed
+    assert not tracker.step("rule-1:veh-1", True, None, None, 0.0, now=1000.0 + ttl - 1)
+
+    assert tracker.sweep(1000.0 + ttl + 1) == 0
+    assert tracker.tracks("veh-1")
+
+
+def test_entries_of_removed_rules_are_dropped(tracker):
+    tracker._known_ids = lambda: {"rule-1"}
+    tracker.step("rule-1:veh-1", True, None, None, 0.0, now=1000.0)
+    tracker.step("rule-2:veh-2", True, None, None, 0.0, now=1000.0)
+
+    assert tracker.sweep(1001.0) == 1
+    assert tracker.tracks("veh-1")
+    assert not tracker.tracks("veh-2")
+
+
+async def test_load_drops_expired_and_unknown_entries(tracker, redis):
+    ttl = get_base_settings().ALERT_STATE_TTL_SECONDS
+    now = time.time()
+    await redis.hset(RedisKeys.alert_state(), mapping={
+        "rule-1:fresh": f"{FIRING}:{now - 10}:{now - 5}",
+        "rule-1:idle": f"{FIRING}:{now - ttl - 10}:{now - ttl - 5}",
+        "rule-1:legacy": f"{COOLDOWN}:{now - ttl - 10}",
+        "gone:fresh": f"{FIRING}:{now - 10}:{now - 5}",
+    })
+    tracker._known_ids = lambda: {"rule-1"}
+
+    await tracker.load()
+    await tracker.flush()
+
+    assert tracker.tracks("fresh")
+    assert not tracker.tracks("idle") and not tracker.tracks("legacy")
+    assert set(await redis.hkeys(RedisKeys.alert_state())) == {"rule-1:fresh"}
@@ -0,0 +1,65 @@
+"""Window and sustained-condition state survives recompiles and is evicted when idle."""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from backend.services.alert.rule_engine import compile_condition
+from backend.services.alert.windows import TemporalStateStore
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+SUSTAINED = {"field": "battery.remaining", "operator": "lt", "value": 20, "for_frames": 3}
+WINDOW = {"field": "battery.remaining", "window": {"seconds": 60, "aggregate": "delta"}, "operator": "lt", "value": -10}
+
+
+def frame(remaining: float, second: int = 0, vehicle_id: str = "veh-1"):
+    return SimpleNamespace(
+        vehicle_id=vehicle_id,
+        timestamp=T0 + timedelta(seconds=second),
+        battery=SimpleNamespace(remaining=remaining),
+    )
+
+
+def test_sustained_state_survives_recompile():
+    store = TemporalStateStore()
+    predicate = compile_condition(SUSTAINED, store.rule("rule-1", SUSTAINED))
+    assert not predicate(frame(10))
+    assert not predicate(frame(10))
+
+    # A cache reload recompiles the unchanged rule: the third low frame still matches
+    predicate = compile_condition(SUSTAINED, store.rule("rule-1", SUSTAINED))
+    assert predicate(frame(10))
+
+
+def test_window_state_survives_recompile():
+    store = TemporalStateStore()
+    predicate = compile_condition(WINDOW, store.rule("rule-1", WINDOW))
+    assert not predicate(frame(50, 0))
+
+    predicate = compile_condition(WINDOW, store.rule("rule-1", WINDOW))
+    assert predicate(frame(35, 30))
+
+
+def test_changed_condition_starts_over():
+    store = TemporalStateStore()
+    predicate = compile_condition(SUSTAINED, store.rule("rule-1", SUSTAINED))
+    predicate(frame(10))
+    predicate(frame(10))
+
+    changed = {**SUSTAINED, "value": 25}
+    predicate = compile_condition(changed, store.rule("rule-1", changed))
+    assert not predicate(frame(10))
+
+
+def test_idle_vehicles_and_removed_rules_are_dropped():
+    store = TemporalStateStore()
+    state = store.rule("rule-1", SUSTAINED)
+    predicate = compile_condition(SUSTAINED, state)
+    predicate(frame(10, vehicle_id="veh-1"))
+    predicate(frame(10, vehicle_id="veh-2"))
+
+    assert store.evict(idle_seconds=3600) == 0
+    assert store.evict(idle_seconds=0) == 2
+    assert len(state) == 0
+
+    store.retain(set())
+    assert store.rule("rule-1", SUSTAINED) is not state
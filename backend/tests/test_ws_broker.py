@@ -0,0 +1,78 @@
+"""Cross-replica WebSocket fan-out delivers each message once per client."""
+import asyncio
+import json
+
+import pytest
+
+from backend.services.telemetry import ws_broker as ws_broker_module
+from backend.services.telemetry.websocket_manager import TelemetryWebSocketManager
+from backend.services.telemetry.ws_broker import WebSocketBroker
+from backend.shared.mqtt_client import MQTTService
+
+ORG = "3f1c2b9e-0000-4000-8000-000000000001"
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received: list[dict] = []
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text):
+        self.received.append(json.loads(text))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+    def alerts(self) -> list[dict]:
+        return [m for m in self.received if m.get("type") == "alert"]
+
+
+@pytest.fixture
+async def replicas(redis, monkeypatch):
+    monkeypatch.setattr(ws_broker_module, "get_redis", lambda: redis)
+    managers = [TelemetryWebSocketManager(), TelemetryWebSocketManager()]
+    brokers = [WebSocketBroker(manager) for manager in managers]
+    for broker in brokers:
+        await broker.start()
+    yield managers
+    for broker in brokers:
+        await broker.stop()
+
+
+async def _wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            return
+        await asyncio.sleep(0.01)
+
+
+async def test_remote_origin_message_is_delivered_once(replicas):
+    local, remote = replicas
+    ws_local, ws_remote = FakeWebSocket(), FakeWebSocket()
+    await local.connect(ws_local, [f"alerts:{ORG}"])
+    await remote.connect(ws_remote, [f"alerts:{ORG}"])
+
+    # The shared subscription hands the source message to one replica only
+    await local.publish(ORG, [f"alerts:{ORG}"], {"type": "alert", "data": {"id": "a1"}})
+
+    await _wait_for(lambda: ws_remote.alerts())
+    # Leave time for a duplicate (own echo or a second relay) to show up
+    await asyncio.sleep(0.3)
+    assert [m["data"]["id"] for m in ws_local.alerts()] == ["a1"]
+    assert [m["data"]["id"] for m in ws_remote.alerts()] == ["a1"]
+
+
+def test_ingest_topics_use_a_shared_subscription():
+    mqtt = MQTTService(client_id="gateway")
+    mqtt._handlers = {"aerocommand/+/telemetry/+/raw": None, "aerocommand/+/command/+/ack": None}
+    mqtt._shared = {"aerocommand/+/telemetry/+/raw"}
+
+    assert mqtt._subscription("aerocommand/+/telemetry/+/raw") == (
+        "$share/aerocommand-backend/aerocommand/+/telemetry/+/raw"
+    )
+    assert mqtt._subscription("aerocommand/+/command/+/ack") == "aerocommand/+/command/+/ack"
+    # Replicas connect under distinct client ids, or the broker would kick one off
+    assert mqtt.replica_id != MQTTService(client_id="gateway").replica_id
@@ -35,6 +35,8 @@ export const fleetAPI = {
   addVehicle: (fleetId, vehicleId) => apiClient.post(`/fleet/fleets/${fleetId}/vehicles/${vehicleId}`),
   removeVehicle: (fleetId, vehicleId) => apiClient.delete(`/fleet/fleets/${fleetId}/vehicles/${vehicleId}`),
   sendGroupCommand: (fleetId, command) => apiClient.post(`/fleet/fleets/${fleetId}/command`, command),
+  latestTelemetry: (fleetId) => apiClient.get(`/telemetry/fleets/${fleetId}/latest`),
+  orgLatestTelemetry: () => apiClient.get('/telemetry/latest'),
 };
 
 // ─── Mission Endpoints ───
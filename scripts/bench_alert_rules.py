@@ -0,0 +1,94 @@
+"""
+Microbenchmark: interpreted vs compiled vs vectorized alert conditions.
+
+Evaluates the same set of single-comparison rules against telemetry frames
+with `evaluate_condition` (parses the condition on every call), with the
+predicates built by `compile_condition`, and with `BatchRulePlan` over
+batches of frames, and reports rules/sec on one core.
+
+    python scripts/bench_alert_rules.py [--rules 50] [--frames 20000] [--batch 500]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.services.alert.batch_eval import BatchRulePlan  # noqa: E402
+from backend.services.alert.rule_engine import compile_condition, evaluate_condition  # noqa: E402
+from backend.shared.schemas.telemetry import TelemetryFrame  # noqa: E402
+
+_CONDITIONS = [
+    {"field": "battery.remaining", "operator": "lt", "value": 20},
+    {"field": "gps.fix_type", "operator": "eq", "value": 0},
+    {"field": "gps.alt", "operator": "gt", "value": 120},
+    {"field": "groundspeed", "operator": "gte", "value": 25},
+    {"field": "battery.voltage", "operator": "lte", "value": 10.5},
+    {"field": "gps.satellites_visible", "operator": "lt", "value": 6},
+    {"field": "system.cpu_load", "operator": "gt", "value": 90},
+]
+
+
+def _frame() -> TelemetryFrame:
+    return TelemetryFrame.model_validate({
+        "vehicle_id": "bench",
+        "timestamp": datetime.now(timezone.utc),
+        "seq": 1,
+        "attitude": {"roll": 0.0, "pitch": 0.0, "yaw": 90.0},
+        "gps": {"lat": 48.85, "lng": 2.35, "alt": 80.0, "fix_type": 3, "satellites_visible": 12},
+        "battery": {"voltage": 11.8, "current": 4.2, "remaining": 64.0},
+        "system": {"mode": "AUTO", "armed": True, "system_status": 4, "autopilot": "px4",
+                   "vehicle_type": 2, "cpu_load": 35.0},
+        "groundspeed": 12.0,
+        "heading": 90.0,
+        "throttle": 55.0,
+    })
+
+
+def _rate(label: str, n_evaluations: int, seconds: float) -> float:
+    rate = n_evaluations / seconds
+    print(f"{label:<12} {rate:>14,.0f} rules/s   ({seconds * 1000:.1f} ms)")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=500, help="frames per vectorized batch")
+    args = parser.parse_args()
+
+    conditions = [_CONDITIONS[i % len(_CONDITIONS)] for i in range(args.rules)]
+    predicates = [compile_condition(c) for c in conditions]
+    frame = _frame()
+    n = args.rules * args.frames
+
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        for condition in conditions:
+            evaluate_condition(frame, condition)
+    before = _rate("interpreted", n, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        for predicate in predicates:
+            predicate(frame)
+    compiled = _rate("compiled", n, time.perf_counter() - start)
+
+    plan = BatchRulePlan(list(zip(conditions, predicates)))
+    batch = [frame] * args.batch
+    batches = max(args.frames // args.batch, 1)
+    start = time.perf_counter()
+    for _ in range(batches):
+        plan.matches(batch)
+    vectorized = _rate("vectorized", args.rules * args.batch * batches, time.perf_counter() - start)
+
+    print(f"speedup      compiled {compiled / before:.1f}x, vectorized {vectorized / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()